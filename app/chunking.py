@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import ast
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+Chunk = Dict[str, object]
+Chunker = Callable[[str, int, int], Iterable[Chunk]]
+# (first line index, end line index exclusive, symbol names)
+Unit = Tuple[int, int, List[str]]
+
+# Bump when chunk boundaries change so existing indexes are rebuilt.
+CHUNKER_VERSION = 3
+# How full a chunk must be before it may end early at a unit boundary instead of splitting the next unit.
+_MIN_FILL = 0.75
+
+_DEFINITION = re.compile(
+    r"^(?:export\s+)?(?:default\s+)?(?:pub(?:\([\w:]+\))?\s+)?"
+    r"(?:(?:public|private|protected|internal|static|final|abstract|async|unsafe|extern)\s+)*"
+    r"(?:function\*?|class|interface|type|enum|struct|trait|impl|mod|fn|func|const|let|var|namespace)\s+"
+    r"(?:\([^)]*\)\s*)?([A-Za-z_$][\w$]*)"
+)
+_HEADING = re.compile(r"^#{1,6}\s+(.*\S)")
+
+
+def _line_cost(line: str) -> int:
+    return len(line) + 1
+
+
+def line_chunks(text: str, max_chars: int = 1200, overlap: int = 120) -> Iterator[Chunk]:
+    """Split on line boundaries into windows of at most ``max_chars``, repeating ~``overlap`` chars."""
+    yield from _line_windows(text.splitlines(), 0, max_chars, overlap, [])
+
+
+def _line_windows(
+    lines: Sequence[str], offset: int, max_chars: int, overlap: int, symbols: List[str]
+) -> Iterator[Chunk]:
+    start = 0
+    total = len(lines)
+    while start < total:
+        if len(lines[start]) > max_chars:
+            # A single huge line (minified code, data blobs) is cut by characters instead.
+            line = lines[start]
+            for pos in range(0, len(line), max_chars):
+                yield _chunk(line[pos : pos + max_chars], offset + start, offset + start, symbols)
+            start += 1
+            continue
+        end = start
+        size = 0
+        while end < total and len(lines[end]) <= max_chars and size + _line_cost(lines[end]) <= max_chars:
+            size += _line_cost(lines[end])
+            end += 1
+        if "".join(lines[start:end]).strip():
+            yield _chunk("\n".join(lines[start:end]), offset + start, offset + end - 1, symbols)
+        if end >= total:
+            return
+        # Repeat up to ``overlap`` chars, but never so many that the next line no longer fits.
+        budget = min(overlap, max_chars - _line_cost(lines[end]))
+        back = end
+        kept = 0
+        while back - 1 > start and kept + _line_cost(lines[back - 1]) <= budget:
+            back -= 1
+            kept += _line_cost(lines[back])
+        start = back
+
+
+def _chunk(text: str, first: int, last: int, symbols: List[str]) -> Chunk:
+    return {"text": text, "start": first + 1, "end": last + 1, "symbols": list(dict.fromkeys(symbols))}
+
+
+def _pack_units(lines: Sequence[str], units: Sequence[Unit], max_chars: int, overlap: int) -> Iterator[Chunk]:
+    """
+    Pack consecutive units into chunks of at most ``max_chars``.
+
+    A chunk ends at the last unit boundary that fits when that leaves it at
+    least ``_MIN_FILL`` full. Otherwise the unit that does not fit is split by
+    lines to fill the chunk (as is any unit larger than the budget), the next
+    chunk repeats up to ``overlap`` chars before the cut, and the rest of the
+    unit packs with the units after it.
+    """
+    units = [unit for unit in units if unit[1] > unit[0]]
+    if not units:
+        return
+    boundaries = {start for start, _, _ in units} | {units[-1][1]}
+    costs = [_line_cost(line) for line in lines]
+    pos = units[0][0]
+    total = units[-1][1]
+    first_unit = 0
+    while pos < total:
+        if costs[pos] - 1 > max_chars:
+            # A single huge line (minified code, data blobs) is cut by characters instead.
+            while units[first_unit][1] <= pos:
+                first_unit += 1
+            line = lines[pos]
+            for cut in range(0, len(line), max_chars):
+                yield _chunk(line[cut : cut + max_chars], pos, pos, units[first_unit][2])
+            pos += 1
+            continue
+        end = pos
+        size = 0
+        boundary = None
+        while end < total and size + costs[end] <= max_chars + 1:
+            size += costs[end]
+            end += 1
+            if end in boundaries:
+                boundary, boundary_size = end, size
+        cut = end
+        if end < total and boundary is not None and boundary_size >= max_chars * _MIN_FILL:
+            cut = boundary
+        while units[first_unit][1] <= pos:
+            first_unit += 1
+        symbols: List[str] = []
+        for start, _, names in units[first_unit:]:
+            if start >= cut:
+                break
+            symbols.extend(names)
+        if "".join(lines[pos:cut]).strip():
+            yield _chunk("\n".join(lines[pos:cut]), pos, cut - 1, symbols)
+        if cut in boundaries or cut >= total:
+            pos = cut
+            continue
+        # Cut inside a unit: repeat up to ``overlap`` chars, but never so many that the next line no longer fits.
+        budget = min(overlap, max_chars - costs[cut])
+        back = cut
+        kept = 0
+        while back - 1 > pos and kept + costs[back - 1] <= budget:
+            back -= 1
+            kept += costs[back]
+        pos = back
+
+
+def _with_gaps(units: List[Unit], total: int, cursor: int = 0) -> List[Unit]:
+    """Fill the spaces between units (imports, comments, module code) so no line is dropped."""
+    filled: List[Unit] = []
+    for start, end, symbols in units:
+        if start > cursor:
+            filled.append((cursor, start, []))
+        filled.append((start, end, symbols))
+        cursor = max(cursor, end)
+    if cursor < total:
+        filled.append((cursor, total, []))
+    return filled
+
+
+def _python_units(nodes: Sequence[ast.stmt], lines: Sequence[str], prefix: str, max_chars: int) -> List[Unit]:
+    units: List[Unit] = []
+    for node in nodes:
+        decorators = getattr(node, "decorator_list", [])
+        start = min([node.lineno] + [d.lineno for d in decorators]) - 1
+        end = node.end_lineno or node.lineno
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            name = f"{prefix}{node.name}"
+            cost = sum(_line_cost(line) for line in lines[start:end])
+            if isinstance(node, ast.ClassDef) and cost > max_chars and node.body:
+                # Too big for one chunk: keep the class header on its own and split per member.
+                body_start = min(
+                    [node.body[0].lineno] + [d.lineno for d in getattr(node.body[0], "decorator_list", [])]
+                ) - 1
+                units.append((start, body_start, [name]))
+                members = _python_units(node.body, lines, f"{name}.", max_chars)
+                units.extend(_with_gaps(members, end, cursor=body_start))
+                continue
+            units.append((start, end, [name]))
+        else:
+            units.append((start, end, []))
+    return units
+
+
+def python_chunks(text: str, max_chars: int = 1200, overlap: int = 120) -> Iterator[Chunk]:
+    """Chunk Python along top-level function and class boundaries using ``ast``."""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        yield from line_chunks(text, max_chars, overlap)
+        return
+    lines = text.splitlines()
+    units = _with_gaps(_python_units(tree.body, lines, "", max_chars), len(lines))
+    yield from _pack_units(lines, units, max_chars, overlap)
+
+
+def brace_chunks(text: str, max_chars: int = 1200, overlap: int = 120) -> Iterator[Chunk]:
+    """
+    Chunk brace-delimited languages (JS/TS, Go, Rust, Java, C++) at top-level boundaries.
+
+    A unit ends wherever brace depth returns to zero at the end of a statement
+    or block; unindented definition lines name the symbols it contains.
+    """
+    lines = text.splitlines()
+    units: List[Unit] = []
+    depth = 0
+    unit_start = 0
+    symbols: List[str] = []
+    for idx, line in enumerate(lines):
+        code = line.split("//", 1)[0]
+        if depth == 0:
+            match = _DEFINITION.match(code)
+            if match:
+                symbols.append(match.group(1))
+        depth = max(depth + code.count("{") - code.count("}"), 0)
+        stripped = code.rstrip()
+        if depth == 0 and (not stripped or stripped.endswith(("}", "};", ";", ");"))):
+            units.append((unit_start, idx + 1, symbols))
+            unit_start, symbols = idx + 1, []
+    if unit_start < len(lines):
+        units.append((unit_start, len(lines), symbols))
+    yield from _pack_units(lines, units, max_chars, overlap)
+
+
+def markdown_chunks(text: str, max_chars: int = 1200, overlap: int = 120) -> Iterator[Chunk]:
+    """Chunk Markdown by heading sections, tagging each chunk with its headings."""
+    lines = text.splitlines()
+    units: List[Unit] = []
+    unit_start = 0
+    heading: List[str] = []
+    in_fence = False
+    for idx, line in enumerate(lines):
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line)
+        if match and idx > unit_start:
+            units.append((unit_start, idx, heading))
+            unit_start = idx
+        if match:
+            heading = [match.group(1)]
+    if unit_start < len(lines):
+        units.append((unit_start, len(lines), heading))
+    yield from _pack_units(lines, units, max_chars, overlap)
+
+
+_CHUNKERS: Dict[str, Chunker] = {".py": python_chunks, ".md": markdown_chunks}
+for _suffix in (".ts", ".tsx", ".js", ".jsx", ".go", ".cpp", ".rs", ".java"):
+    _CHUNKERS[_suffix] = brace_chunks
+
+
+def register_chunker(suffixes: Iterable[str], chunker: Chunker) -> None:
+    """Use ``chunker`` for files with any of ``suffixes`` when the syntax strategy is active."""
+    for suffix in suffixes:
+        _CHUNKERS[suffix] = chunker
+
+
+def chunker_id(strategy: str, max_chars: int, overlap: int) -> str:
+    return f"{strategy}-v{CHUNKER_VERSION}-{max_chars}-{overlap}"
+
+
+def chunk_text(
+    text: str, suffix: str, *, strategy: str = "syntax", max_chars: int = 1200, overlap: int = 120
+) -> Iterator[Chunk]:
+    """
+    Split ``text`` into chunks of at most ``max_chars``.
+
+    Each chunk has ``text``, 1-based inclusive ``start``/``end`` lines and the
+    ``symbols`` it defines. ``strategy="lines"`` ignores file syntax.
+    """
+    chunker = _CHUNKERS.get(suffix, line_chunks) if strategy == "syntax" else line_chunks
+    return iter(chunker(text, max_chars, overlap))
@@ -2,7 +2,7 @@ import os
 from dataclasses import dataclass, field
 from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
 # Shared ignore list for project registry, indexer, and patch APIs.
 # These are hard exclusions that should never be indexed.
@@ -24,12 +24,56 @@ def _default_data_dir() -> Path:
     return Path.home() / ".decodifier"
 
 
+def _project_vector_storage() -> Dict[str, str]:
+    """Parse DECODIFIER_VECTOR_STORAGE_PROJECTS, e.g. ``big-repo=numpy,docs=int8``."""
+    pairs = (item.split("=", 1) for item in os.getenv("DECODIFIER_VECTOR_STORAGE_PROJECTS", "").split(",") if "=" in item)
+    return {project.strip(): backend.strip() for project, backend in pairs if project.strip()}
+
+
 @dataclass
 class Settings:
     data_dir: Path = field(default_factory=_default_data_dir)
     project_registry_name: str = "projects.json"
     default_ignore: List[str] = field(default_factory=lambda: list(DEFAULT_IGNORE))
     embedding_model: str = os.getenv("DECODIFIER_EMBED_MODEL", "all-MiniLM-L6-v2")
+    # Quiet period before the file watcher reindexes a path that keeps changing.
+    watch_debounce_ms: int = int(os.getenv("DECODIFIER_WATCH_DEBOUNCE_MS", "500"))
+    # Global cap on directories covered by file watchers (each costs an inotify watch).
+    watch_max_dirs: int = int(os.getenv("DECODIFIER_WATCH_MAX_DIRS", "8192"))
+    # Stop a project's watcher after this long without searches or index requests; 0 never evicts.
+    watch_idle_seconds: int = int(os.getenv("DECODIFIER_WATCH_IDLE_SECONDS", "7200"))
+    # Threads listing directories concurrently during index and tree scans; 1 scans inline.
+    scan_workers: int = int(os.getenv("DECODIFIER_SCAN_WORKERS", "8"))
+    # Files per /api/files/read_many request, and threads reading them concurrently.
+    read_many_max_files: int = int(os.getenv("DECODIFIER_READ_MANY_MAX_FILES", "100"))
+    read_workers: int = int(os.getenv("DECODIFIER_READ_WORKERS", "8"))
+    # Upper bound on projects indexed concurrently by background jobs.
+    index_workers: int = int(os.getenv("DECODIFIER_INDEX_WORKERS", "2"))
+    # Chunks embedded and upserted per batch; bounds indexer memory together with the byte ceiling.
+    index_batch_size: int = int(os.getenv("DECODIFIER_INDEX_BATCH_SIZE", "256"))
+    index_batch_max_bytes: int = int(os.getenv("DECODIFIER_INDEX_BATCH_MAX_BYTES", str(16 * 1024 * 1024)))
+    # Rows kept in the on-disk embedding cache before LRU eviction; 0 disables it.
+    embedding_cache_max_entries: int = int(os.getenv("DECODIFIER_EMBED_CACHE_MAX_ENTRIES", "500000"))
+    # Vector storage: "chroma", "numpy" for exact float32 search in process, or "int8"/"float16" to keep
+    # quantized vectors in memory; int8 re-ranks the top vector_rerank_factor * k candidates on float16 copies.
+    vector_storage: str = os.getenv("DECODIFIER_VECTOR_STORAGE", "chroma")
+    # Per-project overrides of vector_storage; a project that changes backend is copied over in the background.
+    vector_storage_projects: Dict[str, str] = field(default_factory=_project_vector_storage)
+    vector_rerank_factor: int = int(os.getenv("DECODIFIER_VECTOR_RERANK_FACTOR", "4"))
+    # Worker processes for embedding (each loads its own model); 0 or 1 encodes in-process.
+    embed_processes: int = int(os.getenv("DECODIFIER_EMBED_PROCESSES", "0"))
+    # Fewest texts per worker process; a batch is split over fewer workers (or none) rather than into
+    # smaller shards. Measure the break-even on the target machine with benchmarks/bench_embed_pool.py.
+    embed_pool_min_shard: int = int(os.getenv("DECODIFIER_EMBED_POOL_MIN_SHARD", "256"))
+    # Load the vector store and embedding model at startup instead of on first use.
+    preload_models: bool = os.getenv("DECODIFIER_PRELOAD", "0").lower() in ("1", "true", "yes")
+    # "syntax" splits code at function/class boundaries; "lines" uses plain line windows.
+    chunk_strategy: str = os.getenv("DECODIFIER_CHUNKER", "syntax")
+    chunk_max_chars: int = int(os.getenv("DECODIFIER_CHUNK_MAX_CHARS", "1200"))
+    chunk_overlap: int = int(os.getenv("DECODIFIER_CHUNK_OVERLAP", "120"))
+    # In-memory LRU sizes for /api/search; 0 disables either cache.
+    query_embedding_cache_size: int = int(os.getenv("DECODIFIER_QUERY_EMBED_CACHE_SIZE", "4096"))
+    search_result_cache_size: int = int(os.getenv("DECODIFIER_SEARCH_CACHE_SIZE", "1024"))
 
     @property
     def project_registry_path(self) -> Path:
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from .paths import data_root
+from .sqlite_db import batched, connect
+
+
+class EmbeddingCache:
+    """
+    Persistent, size-bounded cache of chunk embeddings.
+
+    Entries live in <DATA_ROOT>/embedding_cache.sqlite3, keyed by the embedding
+    model name and the sha256 of the chunk text, so identical chunks across
+    files, branches and projects are only ever encoded once per model. When
+    the cache grows past ``max_entries`` the least recently used rows are
+    evicted. ``max_entries=0`` disables the cache.
+    """
+
+    def __init__(self, root: Optional[Path] = None, max_entries: int = 500_000) -> None:
+        self.path = (root or data_root()) / "embedding_cache.sqlite3"
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = connect(self.path)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (model, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model: str, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Return cached vectors for whichever ``keys`` are present, refreshing their recency.
+
+        Vectors are read-only float32 views over the stored bytes; copy before mutating.
+        """
+        if not self.enabled or not keys:
+            return {}
+        unique = list(dict.fromkeys(keys))
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            conn = self._connect()
+            for batch in batched(unique):
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND key = ?",
+                    [(now, model, key) for key in found],
+                )
+                conn.commit()
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, np.ndarray | Sequence[float]]) -> None:
+        if not self.enabled or not vectors:
+            return
+        now = time.time()
+        rows = [
+            (model, key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in vectors.items()
+        ]
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, vector, last_used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (count,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+        # Trim a little below the cap so a steady stream of inserts does not evict on every batch.
+        overflow += self.max_entries // 20
+        conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+            (overflow,),
+        )
+        self.evictions += overflow
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        entries = 0
+        if self.enabled and self.path.exists():
+            with self._lock:
+                (entries,) = self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import stat as stat_module
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from . import git_index
+from .ignore import GitignoreTree
+from .scanner import ScanEntry, SkipFn, scan
+from .schemas import Project
+
+
+def _with_gitignore(skip: SkipFn, rules: GitignoreTree) -> SkipFn:
+    def skip_ignored(rel: str, is_dir: bool) -> bool:
+        return skip(rel, is_dir) or rules.match(rel, is_dir)
+
+    return skip_ignored
+
+
+def _tracked_entries(
+    root: Path,
+    tracked: Sequence[str],
+    skip: SkipFn,
+    start: Optional[Path],
+    want_stat: bool,
+) -> Iterator[ScanEntry]:
+    prefix = ""
+    if start is not None:
+        rel = os.path.relpath(start, root)
+        prefix = "" if rel == os.curdir else rel + os.sep
+    # Directories are derived from the file paths; each one is tested once and
+    # a skipped directory drops everything under it, as in a walk.
+    kept: Dict[str, bool] = {"": True, prefix.rstrip(os.sep): True}
+    base = os.path.join(root, "")
+    for rel in tracked:
+        if prefix and not rel.startswith(prefix):
+            continue
+        # Index paths are normalised, so plain string operations stand in for os.path here.
+        parent = rel.rpartition(os.sep)[0]
+        if parent not in kept:
+            undecided: List[str] = []
+            ancestor = parent
+            while ancestor not in kept:
+                undecided.append(ancestor)
+                ancestor = ancestor.rpartition(os.sep)[0]
+            keep = kept[ancestor]
+            for directory in reversed(undecided):
+                keep = keep and not skip(directory, True)
+                kept[directory] = keep
+                if keep:
+                    yield ScanEntry(directory, base + directory, True)
+        if not kept[parent] or skip(rel, False):
+            continue
+        path = base + rel
+        st = None
+        if want_stat:
+            try:
+                st = os.stat(path)
+            except OSError:
+                # Deleted from the working tree but not yet from the index.
+                continue
+            if not stat_module.S_ISREG(st.st_mode):
+                continue
+        yield ScanEntry(rel, path, False, st)
+
+
+def iter_entries(
+    project: Project,
+    skip: SkipFn,
+    start: Optional[Path] = None,
+    stat: bool = True,
+    workers: int = 1,
+) -> Iterator[ScanEntry]:
+    """
+    The project's files and directories under ``start`` that ``skip`` keeps, per its ``file_source``.
+
+    ``walk`` and ``gitignore`` walk the disk with ``scanner.scan``, the latter
+    also leaving out what the working tree's ``.gitignore`` files exclude.
+    ``git`` lists the files in ``.git/index`` without touching the
+    directories at all, so it reflects the index: files deleted but not yet
+    staged are only dropped when ``stat`` is requested, and untracked files
+    never appear. A project whose index cannot be read falls back to
+    ``gitignore``.
+    """
+    root = Path(project.path)
+    if project.file_source == "git":
+        tracked = git_index.tracked_files(root)
+        if tracked is not None:
+            return _tracked_entries(root, tracked, skip, start, stat)
+    if project.file_source != "walk":
+        skip = _with_gitignore(skip, GitignoreTree(root))
+    return scan(root, skip, start=start, stat=stat, workers=workers)
+
+
+def excluded(project: Project, rel: str, is_dir: bool = False, rules: Optional[GitignoreTree] = None) -> bool:
+    """
+    Whether ``iter_entries`` would leave out ``rel`` regardless of ``skip``, for paths checked one at a time.
+
+    Callers checking many paths pass the project's ``GitignoreTree`` as
+    ``rules`` (and drop it when a ``.gitignore`` changes) instead of having
+    the files re-read for every path.
+    """
+    if project.file_source == "walk":
+        return False
+    root = Path(project.path)
+    if project.file_source == "git" and not is_dir:
+        tracked = git_index.is_tracked(root, rel)
+        if tracked is not None:
+            return not tracked
+    return (rules or GitignoreTree(root)).ignored(rel, is_dir)
+
+
+def stamp(project: Project) -> Optional[tuple]:
+    """What a cached listing must also be keyed on: the git index it was read from, if any."""
+    if project.file_source != "git":
+        return None
+    return git_index.index_stamp(Path(project.path))
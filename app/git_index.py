@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import os
+import struct
+from pathlib import Path
+from typing import FrozenSet, List, Optional, Tuple
+
+from .search_cache import LRUCache
+
+# Parsed file lists keyed by index path and stat, so a rewritten index is read again.
+_tracked: LRUCache[Tuple[str, ...]] = LRUCache(8)
+_tracked_sets: LRUCache[FrozenSet[str]] = LRUCache(8)
+
+# Object types in the top bits of an entry's mode.
+_REGULAR, _SYMLINK, _DIRECTORY = 0o10, 0o12, 0o04
+
+
+class GitIndexError(ValueError):
+    """The index is damaged or in a form this reader does not handle."""
+
+
+def git_dir(root: Path) -> Optional[Path]:
+    """The repository directory for a working tree, following a ``.git`` file's ``gitdir:`` line."""
+    dot = root / ".git"
+    if dot.is_dir():
+        return dot
+    try:
+        line = dot.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if not line.startswith("gitdir:"):
+        return None
+    target = Path(line[len("gitdir:") :].strip())
+    return target if target.is_absolute() else (root / target).resolve()
+
+
+def _varint(data: bytes, pos: int) -> Tuple[int, int]:
+    # Git's offset encoding: big-endian 7-bit groups, each continuation adding one.
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, pos
+
+
+def parse_index(data: bytes) -> List[str]:
+    """
+    Paths of the files and symlinks in an index file, '/'-separated, in index order.
+
+    Reads versions 2 to 4. Submodules are left out, and a path with merge
+    conflicts is listed once. A sparse index (directories standing in for
+    the files below them) raises ``GitIndexError``.
+    """
+    if len(data) < 12 or data[:4] != b"DIRC":
+        raise GitIndexError("not a git index")
+    version, count = struct.unpack_from(">II", data, 4)
+    if version not in (2, 3, 4):
+        raise GitIndexError(f"unsupported index version {version}")
+    paths: List[str] = []
+    previous = b""
+    pos = 12
+    try:
+        for _ in range(count):
+            mode = struct.unpack_from(">I", data, pos + 24)[0]
+            flags = struct.unpack_from(">H", data, pos + 60)[0]
+            name_at = pos + 62
+            if version >= 3 and flags & 0x4000:
+                name_at += 2
+            if version == 4:
+                # Each path drops a number of trailing bytes from the previous one and appends the rest.
+                strip, name_at = _varint(data, name_at)
+                end = data.index(b"\0", name_at)
+                name = previous[: len(previous) - strip] + data[name_at:end]
+                pos = end + 1
+            else:
+                end = data.index(b"\0", name_at)
+                name = data[name_at:end]
+                # Entries are NUL-padded to a multiple of eight bytes.
+                pos += (end - pos + 8) & ~7
+            kind = mode >> 12
+            if kind == _DIRECTORY:
+                raise GitIndexError("sparse index")
+            if kind in (_REGULAR, _SYMLINK) and name != previous:
+                paths.append(name.decode("utf-8", errors="surrogateescape"))
+            previous = name
+    except GitIndexError:
+        raise
+    except (struct.error, ValueError, IndexError) as exc:
+        raise GitIndexError("truncated git index") from exc
+    return paths
+
+
+def _index_key(root: Path) -> Optional[Tuple[Path, Tuple]]:
+    repo = git_dir(root)
+    if repo is None:
+        return None
+    index = repo / "index"
+    try:
+        st = index.stat()
+    except OSError:
+        return None
+    # A rewritten index is a new file (git renames it into place), so the inode changes too.
+    return index, (str(index), st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _load(index: Path, key: Tuple) -> Optional[Tuple[str, ...]]:
+    def parse() -> Tuple[str, ...]:
+        paths = parse_index(index.read_bytes())
+        if os.sep != "/":
+            paths = [path.replace("/", os.sep) for path in paths]
+        return tuple(paths)
+
+    try:
+        return _tracked.get_or_compute(key, parse)
+    except (OSError, GitIndexError):
+        return None
+
+
+def tracked_files(root: Path) -> Optional[Tuple[str, ...]]:
+    """
+    Project-relative paths (OS separators) of the files git tracks under ``root``.
+
+    Read straight from ``.git/index`` rather than by running git, and cached
+    until the index file changes. None when ``root`` is not the top of a
+    working tree or its index cannot be read, so callers can fall back to a walk.
+    """
+    found = _index_key(root)
+    return _load(*found) if found else None
+
+
+def is_tracked(root: Path, rel: str) -> Optional[bool]:
+    """Whether git tracks the file ``rel``; None when ``tracked_files`` would be None."""
+    found = _index_key(root)
+    tracked = _load(*found) if found else None
+    if tracked is None:
+        return None
+    return rel in _tracked_sets.get_or_compute(found[1], lambda: frozenset(tracked))
+
+
+def index_stamp(root: Path) -> Optional[Tuple]:
+    """Identity of the current index file, for caches built from ``tracked_files``."""
+    found = _index_key(root)
+    return found[1] if found else None
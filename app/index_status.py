@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from .index_manifest import IndexManifest
+from .paths import data_root
+from .sqlite_db import add_missing_columns, connect
+
+_COLUMNS = (
+    "state",
+    "note",
+    "updated_at",
+    "last_indexed_at",
+    "last_incremental_at",
+    "file_count",
+    "chunk_count",
+    "model",
+    "chunker",
+    "pid",
+    "watcher",
+    "generation",
+)
+# Columns added after the table was first shipped, created on stores that predate them.
+_ADDED_COLUMNS = {"last_incremental_at": "REAL", "generation": "INTEGER"}
+
+
+def pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, owned by someone else.
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class IndexStatusStore:
+    """
+    Durable per-project index state shared by every worker process.
+
+    Rows live in <DATA_ROOT>/index_status.sqlite3 (WAL mode, so several uvicorn
+    workers can read while one writes). Each row records the current state and
+    note, when the project was last fully indexed and when a watcher last
+    caught up with every change it had seen, its file and chunk counts,
+    the embedding model and chunker used, the pid of the process that wrote
+    the row, the last watcher report and a generation counter that advances
+    on every write to the project's index.
+    """
+
+    def __init__(self, root: Optional[Path] = None) -> None:
+        self.path = (root or data_root()) / "index_status.sqlite3"
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = connect(self.path)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS index_status ("
+                " project_id TEXT PRIMARY KEY, state TEXT, note TEXT, updated_at REAL, last_indexed_at REAL,"
+                " file_count INTEGER, chunk_count INTEGER, model TEXT, chunker TEXT, pid INTEGER, watcher TEXT,"
+                " last_incremental_at REAL, generation INTEGER)"
+            )
+            add_missing_columns(conn, "index_status", _ADDED_COLUMNS)
+            self._conn = conn
+        return self._conn
+
+    def update(self, project_id: str, **fields: Any) -> None:
+        """Upsert the given columns for ``project_id``; columns not passed keep their stored values."""
+        unknown = set(fields) - set(_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown index status fields: {sorted(unknown)}")
+        if "watcher" in fields and fields["watcher"] is not None:
+            fields["watcher"] = json.dumps(fields["watcher"])
+        names = list(fields)
+        placeholders = ", ".join("?" * (len(names) + 1))
+        assignments = ", ".join(f"{name} = excluded.{name}" for name in names)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"INSERT INTO index_status (project_id, {', '.join(names)}) VALUES ({placeholders})"
+                f" ON CONFLICT(project_id) DO UPDATE SET {assignments}",
+                [project_id, *fields.values()],
+            )
+            conn.commit()
+
+    def get(self, project_id: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([project_id]).get(project_id)
+
+    def get_many(self, project_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        ids = list(project_ids)
+        if not ids or not self.path.exists():
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT project_id, {', '.join(_COLUMNS)} FROM index_status WHERE project_id IN ({placeholders})",
+                ids,
+            ).fetchall()
+        found = {}
+        for project_id, *values in rows:
+            row = dict(zip(_COLUMNS, values))
+            row["watcher"] = json.loads(row["watcher"]) if row["watcher"] else None
+            found[project_id] = row
+        return found
+
+    def bump_generation(self, project_id: str) -> None:
+        """Advance the project's generation; search caches in every process key on it."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO index_status (project_id, generation) VALUES (?, 1)"
+                " ON CONFLICT(project_id) DO UPDATE SET generation = COALESCE(generation, 0) + 1",
+                (project_id,),
+            )
+            conn.commit()
+
+    def generations(self, project_ids: Iterable[str]) -> Dict[str, int]:
+        ids = list(project_ids)
+        if not ids or not self.path.exists():
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT project_id, generation FROM index_status WHERE project_id IN ({placeholders})", ids
+            ).fetchall()
+        return {project_id: generation or 0 for project_id, generation in rows}
+
+    def delete(self, project_id: str) -> None:
+        if not self.path.exists():
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM index_status WHERE project_id = ?", (project_id,))
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def estimate_staleness(manifest: IndexManifest, root: Path, indexed_at: Optional[float]) -> Dict[str, Any]:
+    """
+    Cheaply estimate how far the files on disk have drifted from the index.
+
+    Only stats what the manifest already knows about, without walking the
+    tree: recorded files whose size or mtime changed or that disappeared, and
+    directories modified since ``indexed_at`` (a new, renamed or deleted entry
+    bumps its parent directory's mtime), which is where unindexed files would
+    appear. ``indexed_at`` is when the index last caught up with the disk: the
+    last full index, or a later watcher batch that left nothing pending.
+    """
+    changed = missing = 0
+    for rel, record in manifest.files.items():
+        try:
+            stat = (root / rel).stat()
+        except OSError:
+            missing += 1
+            continue
+        if not record.matches_stat(stat.st_size, stat.st_mtime_ns):
+            changed += 1
+    changed_dirs = 0
+    if indexed_at is not None:
+        dirs = {str(Path(rel).parent) for rel in manifest.files} | {"."}
+        for rel in dirs:
+            try:
+                if (root / rel).stat().st_mtime > indexed_at:
+                    changed_dirs += 1
+            except OSError:
+                continue
+    return {
+        "stale": bool(changed or missing or changed_dirs),
+        "changed_files": changed,
+        "missing_files": missing,
+        "changed_dirs": changed_dirs,
+    }
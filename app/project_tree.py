@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import file_source, indexer
+from .config import get_settings
+from .ignore import IgnoreMatcher
+from .schemas import Project
+from .search_cache import LRUCache
+
+# Each entry is a project's whole tree, so only a handful are kept.
+_trees: LRUCache["TreeSnapshot"] = LRUCache(16)
+
+
+def _key(rel: str) -> str:
+    # Separators sort below every other character, so a directory's contents directly follow it.
+    return rel.replace(os.sep, "\x00")
+
+
+@dataclass(frozen=True)
+class TreeSnapshot:
+    """Every visible entry of a project in path order, each directory followed by its contents."""
+
+    paths: List[str]
+    keys: List[str]
+    is_dir: List[bool]
+    version: str
+
+    @classmethod
+    def build(cls, entries: List[tuple]) -> "TreeSnapshot":
+        entries = sorted((_key(rel), rel, is_dir) for rel, is_dir in entries)
+        digest = hashlib.sha1()
+        for _, rel, is_dir in entries:
+            digest.update(f"{rel}\0{int(is_dir)}\n".encode("utf-8", errors="surrogateescape"))
+        return cls(
+            [rel for _, rel, _ in entries],
+            [key for key, _, _ in entries],
+            [is_dir for _, _, is_dir in entries],
+            digest.hexdigest(),
+        )
+
+    def subtree(self, i: int, lo: int, hi: int) -> int:
+        """Index just past the contents of the directory at ``i``."""
+        return bisect_left(self.keys, self.keys[i] + "\x01", lo, hi)
+
+
+def _tree_skip(ignore: IgnoreMatcher):
+    """Skip test for tree walks: hidden entries and the project's ignore rules."""
+
+    def skip(rel: str, is_dir: bool) -> bool:
+        # Walks never enter a skipped directory, so only the entry's own name and path need checking.
+        return os.path.basename(rel).startswith(".") or ignore.match(rel, is_dir)
+
+    return skip
+
+
+def _walk(project: Project) -> TreeSnapshot:
+    # The watcher's ignore rules, so every change to a listed entry reaches the watcher.
+    entries = file_source.iter_entries(
+        project,
+        _tree_skip(indexer._ignore_matcher(project)),
+        stat=False,
+        workers=get_settings().scan_workers,
+    )
+    return TreeSnapshot.build([(entry.rel, entry.is_dir) for entry in entries])
+
+
+def snapshot(project: Project) -> TreeSnapshot:
+    """
+    The project's tree, walked only when it may have changed.
+
+    While a watcher covers the project, a snapshot stays valid until the
+    watcher reports an entry created, deleted or moved. A change that lands
+    mid-walk bumps the generation first, so that walk's result is cached
+    under a key nobody asks for again. Without a watcher every call walks.
+    Git-backed listings are also keyed on the index file, which the watcher
+    does not see.
+    """
+    generation = indexer.tree_generation(project.id)
+    if generation is None:
+        return _walk(project)
+    key = (
+        project.id,
+        project.path,
+        tuple(project.ignore or ()),
+        project.file_source,
+        file_source.stamp(project),
+        generation,
+    )
+    return _trees.get_or_compute(key, lambda: _walk(project))
+
+
+def etag(tree: TreeSnapshot, **params: Any) -> str:
+    """ETag for one listing: the tree version plus the parameters that select the page."""
+    digest = hashlib.sha1(tree.version.encode())
+    digest.update(repr(sorted(params.items())).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def list_page(
+    tree: TreeSnapshot,
+    subpath: str = "",
+    max_depth: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = 2000,
+) -> Dict[str, Any]:
+    """
+    One page of the entries under ``subpath`` at most ``max_depth`` levels down.
+
+    ``cursor`` is the last path of the previous page; listing resumes after it
+    even if the tree changed in between. Subtrees below ``max_depth`` are
+    skipped with a binary search rather than visited.
+    """
+    if subpath:
+        base = len(subpath) + 1
+        start = bisect_left(tree.keys, _key(subpath) + "\x00")
+        end = bisect_left(tree.keys, _key(subpath) + "\x01", start)
+    else:
+        base, start, end = 0, 0, len(tree.keys)
+    if cursor:
+        start = max(start, bisect_right(tree.keys, _key(cursor), start, end))
+    visible = list(islice(_visible(tree, base, start, end, max_depth), limit + 1))
+    page = [{"path": tree.paths[i], "is_dir": tree.is_dir[i]} for i in visible[:limit]]
+    more = len(visible) > limit
+    return {"tree": page, "path": subpath, "next_cursor": page[-1]["path"] if more else None}
+
+
+def _visible(tree: TreeSnapshot, base: int, i: int, end: int, max_depth: Optional[int]) -> Iterator[int]:
+    """Indexes of entries in ``[i, end)`` at most ``max_depth`` levels below the listed directory."""
+    while i < end:
+        depth = tree.paths[i].count(os.sep, base) + 1
+        if max_depth is None or depth <= max_depth:
+            yield i
+        if max_depth is not None and depth >= max_depth and tree.is_dir[i]:
+            i = tree.subtree(i, i + 1, end)
+        else:
+            i += 1
+
+
+def is_directory(tree: TreeSnapshot, subpath: str) -> bool:
+    key = _key(subpath)
+    i = bisect_left(tree.keys, key)
+    return i < len(tree.keys) and tree.keys[i] == key and tree.is_dir[i]
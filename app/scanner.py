@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+# Called with a project-relative path and whether it is a directory; True drops
+# the entry (and, for a directory, everything under it).
+SkipFn = Callable[[str, bool], bool]
+
+
+@dataclass(frozen=True)
+class ScanEntry:
+    """A file or directory found by ``scan``; ``rel`` uses the OS separator, like ``str(Path.relative_to)``."""
+
+    rel: str
+    path: str
+    is_dir: bool
+    stat: Optional[os.stat_result] = None
+
+
+def _scan_dir(path: str, rel: str, skip: SkipFn, want_stat: bool) -> Tuple[List[ScanEntry], List[Tuple[str, str]]]:
+    entries: List[ScanEntry] = []
+    subdirs: List[Tuple[str, str]] = []
+    try:
+        iterator = os.scandir(path)
+    except OSError:
+        # Vanished or unreadable directories are skipped, as os.walk does.
+        return entries, subdirs
+    with iterator:
+        for entry in iterator:
+            child = os.path.join(rel, entry.name) if rel else entry.name
+            try:
+                # d_type answers both without a stat on Linux and macOS.
+                is_dir = entry.is_dir()
+                if is_dir and entry.is_symlink():
+                    # Not followed, like os.walk's default.
+                    continue
+                if not is_dir and not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if skip(child, is_dir):
+                continue
+            if is_dir:
+                entries.append(ScanEntry(child, entry.path, True))
+                subdirs.append((entry.path, child))
+                continue
+            stat = None
+            if want_stat:
+                try:
+                    # Cached on the DirEntry, and free on Windows where scandir returns it.
+                    stat = entry.stat()
+                except OSError:
+                    continue
+            entries.append(ScanEntry(child, entry.path, False, stat))
+    return entries, subdirs
+
+
+def scan(
+    root: Path,
+    skip: SkipFn,
+    start: Optional[Path] = None,
+    stat: bool = True,
+    workers: int = 1,
+) -> Iterator[ScanEntry]:
+    """
+    Yield every file and directory under ``start`` (default ``root``) that ``skip`` keeps.
+
+    Entries come from ``os.scandir``, so file types come from the directory
+    listing and each file is stat'ed at most once (only with ``stat``).
+    Skipped directories are never opened. With ``workers`` > 1, independent
+    subtrees are listed concurrently on a thread pool, which hides per-call
+    latency on network filesystems; entries then arrive in no particular
+    order. Only a bounded number of directories is in flight at a time, so a
+    slow consumer does not make the scan buffer the whole tree.
+    """
+    start = start or root
+    rel = os.path.relpath(start, root)
+    first = (str(start), "" if rel == os.curdir else rel)
+    if workers <= 1:
+        stack = [first]
+        while stack:
+            entries, subdirs = _scan_dir(*stack.pop(), skip, stat)
+            yield from entries
+            stack.extend(reversed(subdirs))
+        return
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="decodifier-scan")
+    try:
+        queue = deque([first])
+        pending = set()
+        while queue or pending:
+            while queue and len(pending) < workers * 2:
+                pending.add(pool.submit(_scan_dir, *queue.popleft(), skip, stat))
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                entries, subdirs = future.result()
+                queue.extend(subdirs)
+                yield from entries
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
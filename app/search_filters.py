@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_GLOB_CHARS = frozenset("*?[")
+# Directory prefixes stored on each chunk (dir_1 .. dir_N); deeper prefix filters list files instead.
+DIR_LEVELS = 8
+# Values per "$in" list: Chroma binds each one as an SQL variable and fails somewhere above 20k.
+MAX_IN_VALUES = 10_000
+
+
+def path_metadata(rel: str) -> Dict[str, str]:
+    """Chunk metadata derived from the file path, so extension and prefix filters need no file list."""
+    parts = rel.replace("\\", "/").split("/")
+    meta = {"ext": os.path.splitext(parts[-1])[1].lower()}
+    for depth in range(1, min(len(parts), DIR_LEVELS + 1)):
+        meta[f"dir_{depth}"] = "/".join(parts[:depth])
+    return meta
+
+
+def _any(clauses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+@dataclass(frozen=True)
+class SearchFilter:
+    """
+    Restrictions on which chunks a search may return.
+
+    ``paths`` are project-relative prefixes (``src/app``, ``README.md``) or
+    globs (``src/**/*.py``, ``*test*``; ``*`` also crosses ``/``), and
+    ``extensions`` are file suffixes with or without the dot. A chunk matches
+    when its file matches any path and any extension. ``modified_after`` is a
+    Unix timestamp compared with the file mtime recorded at indexing time.
+    """
+
+    paths: Tuple[str, ...] = ()
+    extensions: Tuple[str, ...] = ()
+    modified_after: Optional[float] = None
+
+    @classmethod
+    def from_request(cls, req: Dict[str, Any]) -> "SearchFilter":
+        paths = tuple(p.replace("\\", "/").strip("/") for p in req.get("paths") or () if p.strip("/"))
+        extensions = tuple(
+            ext.lower() if ext.startswith(".") else f".{ext.lower()}" for ext in req.get("extensions") or () if ext
+        )
+        return cls(paths=paths, extensions=extensions, modified_after=req.get("modified_after"))
+
+    @property
+    def restricts_paths(self) -> bool:
+        return bool(self.paths or self.extensions)
+
+    def matches_path(self, rel: str) -> bool:
+        rel = rel.replace("\\", "/")
+        if self.extensions and not rel.lower().endswith(self.extensions):
+            return False
+        if not self.paths:
+            return True
+        for pattern in self.paths:
+            if _GLOB_CHARS.intersection(pattern):
+                if fnmatchcase(rel, pattern):
+                    return True
+            elif rel == pattern or rel.startswith(pattern + "/"):
+                return True
+        return False
+
+    def select(self, rels: Iterable[str]) -> List[str]:
+        return sorted(rel for rel in rels if self.matches_path(rel))
+
+    @property
+    def by_fields(self) -> bool:
+        """Whether the filters can be expressed on ``path_metadata`` fields: no globs, deep prefixes or ``.tar.gz``."""
+        if any(ext.count(".") > 1 for ext in self.extensions):
+            return False
+        return all(not _GLOB_CHARS.intersection(p) and p.count("/") < DIR_LEVELS for p in self.paths)
+
+    def wheres(self, candidates: Optional[Sequence[str]], fields: bool = False) -> List[Optional[Dict[str, Any]]]:
+        """
+        Chroma ``where`` clauses that together select the filtered chunks; query each and merge.
+
+        With ``fields`` (every chunk carries ``path_metadata``) and filters that
+        ``by_fields`` allows, this is one clause on ``ext`` and ``dir_N``.
+        Otherwise, since Chroma has no prefix or glob operator, the matching
+        indexed files (``candidates``) are sent as ``$in`` lists of at most
+        ``MAX_IN_VALUES`` each.
+        """
+        if candidates is None or (fields and self.by_fields):
+            return [self.where(None, fields)]
+        batches = [candidates[i : i + MAX_IN_VALUES] for i in range(0, len(candidates), MAX_IN_VALUES)]
+        return [self.where(batch, fields) for batch in batches or [[]]]
+
+    def where(self, candidates: Optional[Sequence[str]], fields: bool = False) -> Optional[Dict[str, Any]]:
+        """One Chroma ``where`` clause; see ``wheres``."""
+        clauses: List[Dict[str, Any]] = []
+        if candidates is not None:
+            clauses.append({"file_path": {"$in": list(candidates)}})
+        elif fields and self.restricts_paths:
+            if self.extensions:
+                clauses.append({"ext": {"$in": list(self.extensions)}})
+            if self.paths:
+                matches = []
+                for pattern in self.paths:
+                    matches.append({"file_path": {"$eq": pattern.replace("/", os.sep)}})
+                    matches.append({f"dir_{pattern.count('/') + 1}": {"$eq": pattern}})
+                clauses.append(_any(matches))
+        if self.modified_after is not None:
+            clauses.append({"modified": {"$gt": float(self.modified_after)}})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
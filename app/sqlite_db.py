@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+# SQLite's default limit on bound parameters is 999 on older builds.
+BATCH_SIZE = 500
+
+
+def connect(path: Path, page_size: Optional[int] = None) -> sqlite3.Connection:
+    """
+    Open one of the SQLite files under the data root, creating its directory.
+
+    Every store shares one connection across threads behind its own lock, and
+    several worker processes open the same files: WAL mode lets them read
+    while one writes, and the timeout makes a writer wait for another's lock
+    instead of failing. ``page_size`` only takes effect when the file is
+    created.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+    if page_size:
+        conn.execute(f"PRAGMA page_size={int(page_size)}")
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def add_missing_columns(conn: sqlite3.Connection, table: str, columns: Dict[str, str]) -> None:
+    """Add ``columns`` (name -> declaration) that a table created by an older version lacks."""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, declaration in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+    conn.commit()
+
+
+def batched(items: Sequence[str], size: int = BATCH_SIZE) -> Iterator[List[str]]:
+    """``items`` in lists small enough to bind as the parameters of one ``IN (...)``."""
+    for start in range(0, len(items), size):
+        yield list(items[start : start + size])
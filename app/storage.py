@@ -76,6 +76,7 @@ def add_project(payload: ProjectCreate) -> Project:
         created_at=datetime.utcnow().isoformat(),
         notes=[],
         packs=[],
+        file_source=payload.file_source,
     )
     projects.append(project)
     save_projects(projects)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Protocol, Sequence
+
+from .paths import data_root
+from .quantized_store import QuantizedClient
+
+# "numpy" keeps float32 vectors in process and searches them exactly; "int8" and
+# "float16" keep compressed codes in memory and re-rank on float32 copies on disk.
+BACKENDS = ("chroma", "numpy", "int8", "float16")
+_PRECISIONS = {"numpy": "float32", "int8": "int8", "float16": "float16"}
+
+
+class VectorCollection(Protocol):
+    """The collection operations the indexer relies on; Chroma collections satisfy it as they are."""
+
+    name: str
+
+    def count(self) -> int: ...
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Any,
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> None: ...
+
+    def delete(self, ids: Sequence[str]) -> None: ...
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        include: Sequence[str] = ...,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> Dict[str, Any]: ...
+
+    def query(
+        self, query_embeddings: Any, n_results: int = 10, where: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[List[Any]]]: ...
+
+
+class VectorStore(Protocol):
+    """A named set of collections, shaped like Chroma's client."""
+
+    def get_collection(self, name: str) -> VectorCollection: ...
+
+    def create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> VectorCollection: ...
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> VectorCollection: ...
+
+    def delete_collection(self, name: str) -> None: ...
+
+    def list_collections(self) -> List[VectorCollection]: ...
+
+
+def open_store(backend: str, root: Optional[Path] = None, rerank_factor: int = 4) -> VectorStore:
+    """
+    Open the vector store for ``backend``.
+
+    Chroma persists under <root>/chroma and the in-process stores under
+    <root>/vectors/<precision>, so every backend keeps its own collections and
+    a project can move between them without name clashes.
+    """
+    root = root or data_root()
+    if backend == "chroma":
+        import chromadb
+        from chromadb.config import Settings
+
+        path = root / "chroma"
+        path.mkdir(parents=True, exist_ok=True)
+        return chromadb.PersistentClient(path=str(path), settings=Settings(allow_reset=False, anonymized_telemetry=False))
+    if backend in _PRECISIONS:
+        precision = _PRECISIONS[backend]
+        return QuantizedClient(precision, root=root / "vectors" / precision, rerank_factor=rerank_factor)
+    raise ValueError(f"Unknown vector backend {backend!r}; expected one of {BACKENDS}")
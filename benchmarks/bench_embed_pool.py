@@ -0,0 +1,79 @@
+"""
+Measure what the multi-process embedding pool costs per shard.
+
+Encodes the same chunk-sized texts in-process and through a pool of
+``--processes`` workers at several shard sizes. ``in-process ms/text`` is the
+encoding cost a shard has to amortise its hand-off against; ``overhead
+ms/shard`` is what the pool adds per shard (pickling texts and vectors,
+queue round trips) beyond the in-process time, spread over the workers.
+Sharding pays off once a shard's encoding time dwarfs that overhead; the
+suggested ``DECODIFIER_EMBED_POOL_MIN_SHARD`` is the smallest shard size
+whose overhead stays under 10% of its encoding time.
+
+    python benchmarks/bench_embed_pool.py [--model all-MiniLM-L6-v2] [--processes 4] [--texts 1024]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.config import get_settings  # noqa: E402
+
+_SHARDS = (8, 16, 32, 64, 128, 256)
+
+
+def _texts(count: int, chars: int) -> list:
+    line = "    result = compute_value(item, options, retries=3)  # keep going\n"
+    return [f"def handler_{i}(item):\n" + line * (chars // len(line)) for i in range(count)]
+
+
+def _seconds(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=get_settings().embedding_model)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--texts", type=int, default=1024)
+    parser.add_argument("--chars", type=int, default=1000)
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(args.model, device="cpu")
+    texts = _texts(args.texts, args.chars)
+    model.encode(texts[:32])
+    in_process = _seconds(lambda: model.encode(texts))
+    per_text = in_process / len(texts) * 1000
+    print(f"{args.texts} texts of ~{args.chars} chars, {args.processes} worker processes")
+    print(f"in-process: {in_process:.2f} s, {per_text:.2f} ms/text")
+
+    pool = model.start_multi_process_pool(target_devices=["cpu"] * args.processes)
+    try:
+        model.encode(texts[:64], pool=pool, chunk_size=16)
+        print(f"{'shard':>8}{'pool s':>10}{'overhead ms/shard':>20}{'overhead %':>12}")
+        suggested = None
+        for shard in _SHARDS:
+            pooled = _seconds(lambda: model.encode(texts, pool=pool, chunk_size=shard))
+            shards = -(-len(texts) // shard)
+            # Time beyond a perfect split of the in-process work, charged to each worker's shards.
+            overhead = max(pooled - in_process / args.processes, 0.0) * args.processes / shards * 1000
+            share = overhead / (per_text * shard) * 100
+            if suggested is None and share <= 10:
+                suggested = shard
+            print(f"{shard:>8}{pooled:>10.2f}{overhead:>20.2f}{share:>11.1f}%")
+    finally:
+        model.stop_multi_process_pool(pool)
+    print(f"suggested DECODIFIER_EMBED_POOL_MIN_SHARD: {suggested or f'> {_SHARDS[-1]}'}")
+
+
+if __name__ == "__main__":
+    main()
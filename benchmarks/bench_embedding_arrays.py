@@ -0,0 +1,80 @@
+"""
+Compare the old nested-list embedding path with the float32 ndarray path.
+
+Simulates 100k chunks flowing through the indexer in batches: encoder output,
+embedding-cache serialisation and hand-off to the vector store. The old path
+called ``.tolist()`` on every encoder result and the store converted the lists
+back into an array; the new path keeps the encoder's ndarray throughout.
+
+    python benchmarks/bench_embedding_arrays.py [--chunks 100000] [--dim 384] [--batch 256]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+import numpy as np
+
+
+def _list_path(batch: np.ndarray) -> int:
+    vectors = batch.tolist()
+    cache_rows = [np.asarray(vector, dtype=np.float32).tobytes() for vector in vectors]
+    stored = np.asarray(vectors, dtype=np.float32)
+    return len(cache_rows) + stored.shape[0]
+
+
+def _array_path(batch: np.ndarray) -> int:
+    vectors = np.ascontiguousarray(batch, dtype=np.float32)
+    cache_rows = [row.tobytes() for row in vectors]
+    stored = np.asarray(vectors, dtype=np.float32)
+    return len(cache_rows) + stored.shape[0]
+
+
+def _run(path: Callable[[np.ndarray], int], chunks: int, dim: int, batch: int) -> Dict[str, float]:
+    rng = np.random.default_rng(0)
+    template = rng.standard_normal((batch, dim), dtype=np.float32)
+    started = time.perf_counter()
+    for start in range(0, chunks, batch):
+        path(template[: min(batch, chunks - start)])
+    elapsed = time.perf_counter() - started
+    # Measure the per-batch peak separately: tracing allocations skews the timings.
+    tracemalloc.start()
+    path(template)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": elapsed, "peak_mb": peak / 1e6}
+
+
+def _resident_mb(chunks: int, dim: int, as_lists: bool) -> float:
+    """Memory needed to hold every embedding at once, as the pre-streaming indexer did."""
+    tracemalloc.start()
+    matrix = np.zeros((chunks, dim), dtype=np.float32)
+    held = matrix.tolist() if as_lists else matrix
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return peak / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--batch", type=int, default=256)
+    args = parser.parse_args()
+
+    lists = _run(_list_path, args.chunks, args.dim, args.batch)
+    arrays = _run(_array_path, args.chunks, args.dim, args.batch)
+    print(f"{args.chunks} chunks x {args.dim} dims, batches of {args.batch}")
+    print(f"{'path':<10}{'seconds':>10}{'batch peak MB':>16}{'resident MB':>14}")
+    for name, result, as_lists in (("lists", lists, True), ("ndarray", arrays, False)):
+        resident = _resident_mb(args.chunks, args.dim, as_lists)
+        print(f"{name:<10}{result['seconds']:>10.2f}{result['peak_mb']:>16.1f}{resident:>14.1f}")
+    print(f"speedup: {lists['seconds'] / arrays['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare whole-file reads with mmap-backed line-range reads.
+
+Writes a generated source file and reads a window of lines from it three
+ways: the old path (``read_text`` of the whole file, then slicing lines),
+``files.read_range`` with a cold line index, and again with the index cached.
+
+    python benchmarks/bench_file_ranges.py [--lines 50000] [--start 200] [--count 61] [--repeat 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app import files  # noqa: E402
+
+
+def _best_ms(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=50_000)
+    parser.add_argument("--start", type=int, default=200)
+    parser.add_argument("--count", type=int, default=61)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    end = args.start + args.count - 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "generated.py"
+        path.write_text("".join(f"VALUE_{i} = {{'id': {i}, 'name': 'generated value {i}'}}\n" for i in range(args.lines)))
+
+        def whole() -> str:
+            return "".join(path.read_text(encoding="utf-8").splitlines(keepends=True)[args.start - 1 : end])
+
+        def ranged() -> str:
+            return files.read_range(path, start_line=args.start, end_line=end)["content"]
+
+        def cold() -> str:
+            files._line_starts.clear()
+            return ranged()
+
+        assert whole() == ranged()
+        print(f"{args.lines} lines ({path.stat().st_size / 1e6:.1f} MB), reading lines {args.start}-{end}")
+        print(f"{'read':<22}{'best ms':>10}")
+        print(f"{'read_text + slice':<22}{_best_ms(whole, args.repeat):>10.3f}")
+        print(f"{'range, cold index':<22}{_best_ms(cold, args.repeat):>10.3f}")
+        print(f"{'range, cached index':<22}{_best_ms(ranged, args.repeat):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare project file enumeration by disk walk, .gitignore-aware walk and git index.
+
+Builds a synthetic git repository with tracked sources plus untracked build
+output (ignored by a .gitignore), then times ``file_source.iter_entries`` for
+each source with the indexer's skip rules, with and without stat'ing files.
+The git source is timed cold (index parsed) and warm (parsed list cached).
+
+    python benchmarks/bench_file_sources.py [--files 50000] [--build-files 50000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app import git_index, indexer  # noqa: E402
+from app.file_source import iter_entries  # noqa: E402
+from app.schemas import Project  # noqa: E402
+
+
+def _build(root: Path, files: int, build_files: int) -> None:
+    for prefix, count in (("src", files), ("out", build_files)):
+        for i in range(count):
+            path = root / prefix / f"pkg{i // 2000}" / f"mod{(i // 50) % 40}" / f"file{i}.py"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("x = 1\n")
+    (root / ".gitignore").write_text("out/\n")
+    subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+    subprocess.run(["git", "add", "-A"], cwd=root, check=True)
+
+
+def _time(label: str, project: Project, stat: bool) -> None:
+    ignore = indexer._ignore_matcher(project)
+    started = time.perf_counter()
+    count = sum(
+        1
+        for entry in iter_entries(project, lambda rel, is_dir: indexer._skip_rel(rel, is_dir, ignore), stat=stat, workers=8)
+        if not entry.is_dir
+    )
+    print(f"{label:<16}{'yes' if stat else 'no':>6}{(time.perf_counter() - started) * 1000:>10.1f}{count:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50_000)
+    parser.add_argument("--build-files", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _build(root, args.files, args.build_files)
+        print(f"{args.files} tracked files, {args.build_files} ignored build files")
+        print(f"{'source':<16}{'stat':>6}{'ms':>10}{'files':>10}")
+        for stat in (True, False):
+            for source in ("walk", "gitignore", "git"):
+                project = Project(id="bench", name="bench", path=str(root), file_source=source)
+                if source == "git":
+                    git_index._tracked.clear()
+                    _time("git (cold)", project, stat)
+                    _time("git (cached)", project, stat)
+                else:
+                    _time(source, project, stat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compare the old per-path fnmatch ignore check with the compiled matcher.
+
+Generates synthetic project-relative paths and filters them with the
+default ignore list plus typical project patterns. The old check re-normalised
+every pattern and ran fnmatch against the full path and every path component;
+the compiled matcher folds the patterns into one regex per run of same-sign
+rules. "walk" is the matcher as walkers use it (parents already pruned);
+"ancestors" also checks every parent directory, as the watcher and policy do.
+
+    python benchmarks/bench_ignore_matcher.py [--paths 100000] [--depth 6]
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import random
+import sys
+import time
+from pathlib import Path, PurePosixPath
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.config import DEFAULT_IGNORE  # noqa: E402
+from app.ignore import IgnoreMatcher  # noqa: E402
+
+PROJECT_PATTERNS = ["*.log", "*.min.js", "build/", "coverage", "*.pyc", "docs/_build", "tmp/**", "*.lock"]
+SEGMENTS = ["src", "app", "lib", "tests", "components", "utils", "api", "models", "core", "build", "node_modules", "docs"]
+NAMES = ["index.ts", "main.py", "util.js", "app.min.js", "README.md", "server.log", "mod.pyc", "view.tsx", "yarn.lock"]
+
+
+def _old_matches_ignore(rel: PurePosixPath, patterns: List[str]) -> bool:
+    rel_str = rel.as_posix()
+    parts = rel_str.split("/")
+    for pattern in patterns:
+        normalized = pattern.strip().lstrip("./")
+        if not normalized:
+            continue
+        if normalized.endswith("/"):
+            normalized = normalized[:-1]
+        if fnmatch.fnmatch(rel_str, normalized) or rel_str.startswith(f"{normalized}/"):
+            return True
+        if any(fnmatch.fnmatch(part, normalized) for part in parts):
+            return True
+    return False
+
+
+def _paths(count: int, depth: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        "/".join([rng.choice(SEGMENTS) for _ in range(rng.randint(0, depth))] + [rng.choice(NAMES)])
+        for _ in range(count)
+    ]
+
+
+def _time(label: str, check: Callable[[str], bool], paths: List[str]) -> None:
+    started = time.perf_counter()
+    ignored = sum(1 for rel in paths if check(rel))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12}{elapsed * 1000:>10.1f}{elapsed / len(paths) * 1e6:>10.2f}{ignored:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--depth", type=int, default=6)
+    args = parser.parse_args()
+
+    patterns = list(DEFAULT_IGNORE) + PROJECT_PATTERNS
+    paths = _paths(args.paths, args.depth)
+    started = time.perf_counter()
+    matcher = IgnoreMatcher(patterns)
+    print(f"{len(paths)} paths, {len(patterns)} patterns, compiled in {(time.perf_counter() - started) * 1000:.2f} ms")
+    print(f"{'matcher':<12}{'total ms':>10}{'us/path':>10}{'ignored':>10}")
+    _time("fnmatch", lambda rel: _old_matches_ignore(PurePosixPath(rel), patterns), paths)
+    _time("walk", matcher.match, paths)
+    _time("ancestors", matcher.ignored, paths)
+
+
+if __name__ == "__main__":
+    main()
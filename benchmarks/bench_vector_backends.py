@@ -0,0 +1,127 @@
+"""
+Compare the vector store backends on the same synthetic corpus.
+
+Builds clustered, unit-normalised vectors (how sentence-transformer
+embeddings behave) into each backend from ``app.vector_store`` and reports
+index build time, query latency p50/p99, memory growth, bytes on disk and
+recall@k against an exact float32 search. Each backend runs in its own
+process, so its memory figure is the resident memory it added on top of the
+corpus and includes native allocations such as Chroma's HNSW graph.
+
+    python benchmarks/bench_vector_backends.py [--chunks 50000] [--dim 384] [--queries 200] [--k 10]
+        [--backends chroma,numpy,int8,float16]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.vector_store import BACKENDS, open_store  # noqa: E402
+
+
+def _corpus(chunks: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(chunks // 200, 1), dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, len(centres), chunks)] + 0.6 * rng.standard_normal((chunks, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _dir_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def _rss_mb() -> float:
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+        return pages * resource.getpagesize() / 1e6
+    except OSError:
+        # No procfs (macOS): fall back to the peak, which overstates the baseline.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e6
+
+
+def _run_backend(backend: str, args: argparse.Namespace) -> Dict:
+    vectors = _corpus(args.chunks, args.dim)
+    queries = _corpus(args.queries, args.dim, seed=1)
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, : args.k]
+    ids = [f"c{i}" for i in range(len(vectors))]
+    metas = [{"file_path": f"f{i // 10}.py"} for i in range(len(vectors))]
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = _rss_mb()
+        collection = open_store(backend, root=Path(tmp), rerank_factor=args.rerank_factor).create_collection("bench")
+        started = time.perf_counter()
+        for start in range(0, len(vectors), args.batch):
+            end = start + args.batch
+            collection.upsert(
+                ids=ids[start:end], embeddings=vectors[start:end], documents=ids[start:end], metadatas=metas[start:end]
+            )
+        build = time.perf_counter() - started
+        latencies: List[float] = []
+        hits = 0
+        for query, truth in zip(queries, exact):
+            started = time.perf_counter()
+            res = collection.query(query_embeddings=query[None, :], n_results=args.k)
+            latencies.append(time.perf_counter() - started)
+            hits += len({int(i[1:]) for i in res["ids"][0]} & set(truth.tolist()))
+        memory = _rss_mb() - baseline
+        if hasattr(collection, "close"):
+            # Closing checkpoints the SQLite WAL so the size on disk is the steady-state one.
+            collection.close()
+        disk = _dir_bytes(Path(tmp)) / 1e6
+    return {
+        "backend": backend,
+        "build_s": build,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "memory_mb": memory,
+        "disk_mb": disk,
+        "recall": hits / (len(queries) * args.k),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--only", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.only:
+        print(json.dumps(_run_backend(args.only, args)))
+        return
+
+    rows = []
+    for backend in args.backends.split(","):
+        proc = subprocess.run([sys.executable, __file__, *sys.argv[1:], "--only", backend], capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{backend}: failed\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+            continue
+        rows.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(f"{args.chunks} chunks x {args.dim} dims, recall@{args.k} over {args.queries} queries")
+    print(f"{'backend':<10}{'build s':>9}{'p50 ms':>9}{'p99 ms':>9}{'memory MB':>11}{'disk MB':>9}{'recall':>8}")
+    for row in rows:
+        print(
+            f"{row['backend']:<10}{row['build_s']:>9.1f}{row['p50_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+            f"{row['memory_mb']:>11.1f}{row['disk_mb']:>9.1f}{row['recall']:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
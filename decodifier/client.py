@@ -1,6 +1,6 @@
 import requests
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from .errors import DeCodifierError
 
@@ -68,6 +68,7 @@ class DeCodifierClient:
         path: str,
         ignore: Optional[List[str]] = None,
         project_id: Optional[str] = None,
+        file_source: Optional[str] = None,
     ) -> Dict[str, Any]:
         """POST /api/projects"""
         payload: Dict[str, Any] = {
@@ -77,17 +78,66 @@ class DeCodifierClient:
         }
         if project_id is not None:
             payload["id"] = project_id
+        if file_source is not None:
+            payload["file_source"] = file_source
         return self._post("/api/projects", json=payload)
 
-    def get_project_tree(self, project_id: str, max_depth: int = 5) -> Dict[str, Any]:
-        """GET /api/projects/{project_id}/tree"""
-        return self._get(f"/api/projects/{project_id}/tree", max_depth=max_depth)
+    def get_project_tree(
+        self,
+        project_id: str,
+        max_depth: int = 5,
+        path: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        GET /api/projects/{project_id}/tree
+
+        Returns one page of entries under ``path``; pass the response's
+        ``next_cursor`` back as ``cursor`` to get the next one.
+        """
+        return self._get(
+            f"/api/projects/{project_id}/tree", max_depth=max_depth, path=path, cursor=cursor, limit=limit
+        )
 
     # Files
 
-    def read_file(self, project_id: str, path: str) -> Dict[str, Any]:
-        """GET /api/file?project_id=...&path=..."""
-        return self._get("/api/file", project_id=project_id, path=path)
+    def read_file(
+        self,
+        project_id: str,
+        path: str,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        offset: Optional[int] = None,
+        length: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        GET /api/file?project_id=...&path=...
+
+        Pass ``start_line``/``end_line`` (1-based, inclusive) or
+        ``offset``/``length`` (bytes) to read only part of the file.
+        """
+        return self._get(
+            "/api/file",
+            project_id=project_id,
+            path=path,
+            start_line=start_line,
+            end_line=end_line,
+            offset=offset,
+            length=length,
+        )
+
+    def read_files(self, project_id: str, files: List[Union[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        POST /api/files/read_many?project_id=...
+
+        Each item is a path or a dict with ``path`` and the optional range
+        fields of ``read_file``. Returns one result per item, in order; an
+        item that could not be read has ``status_code`` and ``error``.
+        """
+        items = [{"path": item} if isinstance(item, str) else item for item in files]
+        data = self._post("/api/files/read_many", json={"files": items}, project_id=project_id)
+        return data.get("files", [])
 
     def save_file(self, project_id: str, path: str, content: str) -> Dict[str, Any]:
         """
@@ -119,6 +169,18 @@ class DeCodifierClient:
         payload = {"path": path, "patch": patch}
         return self._post("/api/file/apply_patch", json=payload, project_id=project_id)
 
+    # Search
+
+    def search_many(self, queries: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        POST /api/search/batch
+
+        Each query is a dict with ``project_id`` and ``query`` plus optional
+        ``k`` and ``mode``. Returns one result list per query, in order.
+        """
+        data = self._post("/api/search/batch", json={"queries": queries})
+        return [item.get("results", []) for item in data.get("results", [])]
+
     # Packs
 
     def list_packs(self) -> Dict[str, Any]:
@@ -161,12 +223,15 @@ def handle_decodifier_tool_call(
             path=arguments["path"],
             ignore=arguments.get("ignore"),
             project_id=arguments.get("id"),
+            file_source=arguments.get("file_source"),
         )
 
     if tool_name == "decodifier_get_project_tree":
         return client.get_project_tree(
             project_id=arguments["project_id"],
             max_depth=arguments.get("max_depth", 5),
+            path=arguments.get("path"),
+            cursor=arguments.get("cursor"),
         )
 
     if tool_name == "decodifier_read_file":
@@ -181,8 +246,13 @@ def handle_decodifier_tool_call(
         return client.read_file(
             project_id=arguments["project_id"],
             path=arguments["path"],
+            start_line=arguments.get("start_line"),
+            end_line=arguments.get("end_line"),
         )
 
+    if tool_name == "decodifier_read_files":
+        return {"files": client.read_files(project_id=arguments["project_id"], files=arguments.get("files", []))}
+
     if tool_name == "decodifier_save_file":
         return client.save_file(
             project_id=arguments["project_id"],
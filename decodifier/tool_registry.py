@@ -23,6 +23,14 @@ DECODIFIER_TOOLS = [
                         "description": "Optional ignore patterns.",
                     },
                     "id": {"type": "string", "description": "Optional fixed project id."},
+                    "file_source": {
+                        "type": "string",
+                        "enum": ["walk", "gitignore", "git"],
+                        "description": (
+                            "How files are listed: walk the disk (default), walk honouring .gitignore files, "
+                            "or read the files tracked in the git index."
+                        ),
+                    },
                 },
                 "required": ["name", "path"],
             },
@@ -32,16 +40,27 @@ DECODIFIER_TOOLS = [
         "type": "function",
         "function": {
             "name": "decodifier_get_project_tree",
-            "description": "Get the file tree for a project.",
+            "description": (
+                "Get the file tree for a project, one page at a time. "
+                "If the result has a next_cursor, call again with it to continue."
+            ),
             "parameters": {
                 "type": "object",
                 "properties": {
                     "project_id": {"type": "string", "description": "Project id."},
                     "max_depth": {
                         "type": "integer",
-                        "description": "Maximum depth to return.",
+                        "description": "Maximum depth to return, counted from 'path'.",
                         "default": 5,
                     },
+                    "path": {
+                        "type": "string",
+                        "description": "Optional project-relative directory to list instead of the root.",
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "next_cursor from the previous page.",
+                    },
                 },
                 "required": ["project_id"],
             },
@@ -51,7 +70,10 @@ DECODIFIER_TOOLS = [
         "type": "function",
         "function": {
             "name": "decodifier_read_file",
-            "description": "Read a text file in a project.",
+            "description": (
+                "Read a text file in a project, or only some of its lines. "
+                "Line-range results include total_lines."
+            ),
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -60,11 +82,43 @@ DECODIFIER_TOOLS = [
                         "type": "string",
                         "description": "Project-relative path to the file (e.g. 'engine/app/main.py').",
                     },
+                    "start_line": {"type": "integer", "description": "Optional first line to return (1-based)."},
+                    "end_line": {"type": "integer", "description": "Optional last line to return (inclusive)."},
                 },
                 "required": ["project_id", "path"],
             },
         },
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "decodifier_read_files",
+            "description": (
+                "Read several files (or line ranges of them) in one call. "
+                "Prefer this over repeated decodifier_read_file calls when you need more than one file."
+            ),
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "project_id": {"type": "string", "description": "Project id."},
+                    "files": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "path": {"type": "string", "description": "Project-relative path to the file."},
+                                "start_line": {"type": "integer", "description": "Optional first line (1-based)."},
+                                "end_line": {"type": "integer", "description": "Optional last line (inclusive)."},
+                            },
+                            "required": ["path"],
+                        },
+                        "description": "Files to read, in the order results should come back.",
+                    },
+                },
+                "required": ["project_id", "files"],
+            },
+        },
+    },
     {
         "type": "function",
         "function": {
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .paths import data_root
+from .sqlite_db import add_missing_columns, connect
+
+_SLUG = re.compile(r"[^a-z0-9]+")
+
+
+def collection_name(project_id: str, model: str, dim: int) -> str:
+    """
+    Vector collection name for a project embedded with ``model`` at ``dim`` dimensions.
+
+    Chroma names allow ``[a-zA-Z0-9._-]`` and must start and end with an
+    alphanumeric character, so the model name is slugged.
+    """
+    slug = _SLUG.sub("-", model.lower()).strip("-") or "model"
+    return f"{project_id}--{slug}--{dim}"
+
+
+class CollectionRegistry:
+    """
+    Maps each project to the vector collection searches should use.
+
+    Rows live in <DATA_ROOT>/collections.sqlite3. ``active`` is the collection
+    serving queries; ``shadow`` is one being rebuilt for another embedding
+    model or vector backend. Each names the backend holding it.
+    ``promote`` swaps the shadow in with a single UPDATE, so every worker sees
+    either the old collection or the new one, never a mix.
+    """
+
+    def __init__(self, root: Optional[Path] = None) -> None:
+        self.path = (root or data_root()) / "collections.sqlite3"
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = connect(self.path)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS collections ("
+                " project_id TEXT PRIMARY KEY, name TEXT NOT NULL, model TEXT NOT NULL, dim INTEGER,"
+                " shadow_name TEXT, shadow_model TEXT, shadow_dim INTEGER,"
+                " backend TEXT NOT NULL DEFAULT 'chroma', shadow_backend TEXT)"
+            )
+            # Registries written before backends were recorded only ever held Chroma collections.
+            add_missing_columns(
+                conn, "collections", {"backend": "TEXT NOT NULL DEFAULT 'chroma'", "shadow_backend": "TEXT"}
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Return ``{"active": {...}, "shadow": {...} | None}`` for the project, or None if unregistered."""
+        if not self.path.exists():
+            return None
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT name, model, dim, backend, shadow_name, shadow_model, shadow_dim, shadow_backend"
+                " FROM collections WHERE project_id = ?",
+                (project_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        name, model, dim, backend, shadow_name, shadow_model, shadow_dim, shadow_backend = row
+        shadow = (
+            {"name": shadow_name, "model": shadow_model, "dim": shadow_dim, "backend": shadow_backend or backend}
+            if shadow_name
+            else None
+        )
+        return {"active": {"name": name, "model": model, "dim": dim, "backend": backend}, "shadow": shadow}
+
+    def set_active(self, project_id: str, name: str, model: str, dim: Optional[int], backend: str = "chroma") -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO collections (project_id, name, model, dim, backend) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(project_id) DO UPDATE SET name = excluded.name, model = excluded.model,"
+                " dim = excluded.dim, backend = excluded.backend",
+                (project_id, name, model, dim, backend),
+            )
+            conn.commit()
+
+    def set_shadow(
+        self,
+        project_id: str,
+        name: Optional[str],
+        model: Optional[str],
+        dim: Optional[int],
+        backend: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE collections SET shadow_name = ?, shadow_model = ?, shadow_dim = ?, shadow_backend = ?"
+                " WHERE project_id = ?",
+                (name, model, dim, backend, project_id),
+            )
+            conn.commit()
+
+    def promote(self, project_id: str) -> None:
+        """Make the shadow collection active and forget the old one."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE collections SET name = shadow_name, model = shadow_model, dim = shadow_dim,"
+                " backend = COALESCE(shadow_backend, backend), shadow_name = NULL, shadow_model = NULL, shadow_dim = NULL,"
+                " shadow_backend = NULL"
+                " WHERE project_id = ? AND shadow_name IS NOT NULL",
+                (project_id,),
+            )
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
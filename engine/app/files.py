@@ -1,7 +1,19 @@
+import hashlib
+import mmap
+import os
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
 from fastapi import HTTPException, UploadFile
 from unidiff import PatchSet
 
+from .search_cache import LRUCache
+
+# Line-start offsets of recently range-read files, keyed by path and stat.
+_line_starts: LRUCache[np.ndarray] = LRUCache(64)
+
 
 def resolve_path(root: str, relative_path: str) -> Path:
     candidate = Path(root).joinpath(relative_path).resolve()
@@ -13,7 +25,7 @@ def resolve_path(root: str, relative_path: str) -> Path:
     return candidate
 
 
-def read_file(root: str, relative_path: str) -> str:
+def existing_file(root: str, relative_path: str) -> Path:
     if not relative_path:
         raise HTTPException(status_code=400, detail="Missing path parameter.")
     path = resolve_path(root, relative_path)
@@ -21,11 +33,87 @@ def read_file(root: str, relative_path: str) -> str:
         raise HTTPException(status_code=400, detail="Path is a directory, not a file.")
     if not path.exists():
         raise HTTPException(status_code=404, detail="File not found.")
-    try:
-        return path.read_text(encoding="utf-8")
-    except UnicodeDecodeError:
-        # Fallback for binary/unknown encodings so the API does not 500
-        return path.read_text(encoding="utf-8", errors="ignore")
+    return path
+
+
+def _decode(data: bytes) -> str:
+    # Lenient so binary/unknown encodings (and ranges cutting a character) do not 500.
+    return data.decode("utf-8", errors="ignore")
+
+
+def read_file(root: str, relative_path: str) -> str:
+    return _decode(existing_file(root, relative_path).read_bytes())
+
+
+def file_etag(st: os.stat_result, **params: Any) -> str:
+    """ETag from the file's identity, size and mtime plus the parameters selecting the range; no read needed."""
+    digest = hashlib.sha1(f"{st.st_ino}:{st.st_size}:{st.st_mtime_ns}".encode())
+    digest.update(repr(sorted(params.items())).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def _starts(path: Path, st: os.stat_result, data: Union[mmap.mmap, bytes]) -> np.ndarray:
+    def build() -> np.ndarray:
+        view = np.frombuffer(data, dtype=np.uint8)
+        try:
+            newlines = np.flatnonzero(view == 10)
+        finally:
+            # The mmap cannot close while a buffer still points into it.
+            del view
+        return np.concatenate(([0], newlines + 1)).astype(np.int64)
+
+    return _line_starts.get_or_compute((str(path), st.st_ino, st.st_size, st.st_mtime_ns), build)
+
+
+def read_range(
+    path: Path,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Part of a file: lines ``start_line``..``end_line`` (1-based, inclusive) or
+    ``length`` bytes from ``offset``, each bound optional.
+
+    The file is memory-mapped and only the requested slice is copied out.
+    Line ranges use an index of line-start offsets, built once per file
+    version and cached, so later ranges of the same file cost two lookups.
+    The result carries the ETag of the version that was read. A line range
+    starting past the last line is answered with 416; ``end_line`` past it
+    is clamped to the file's line count.
+    """
+    with path.open("rb") as handle:
+        st = os.fstat(handle.fileno())
+        size = st.st_size
+        etag = file_etag(st, start_line=start_line, end_line=end_line, offset=offset, length=length)
+        # Empty files cannot be mapped; empty bytes behave the same.
+        mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) if size else nullcontext(b"")
+        with mapping as data:
+            if start_line is None and end_line is None:
+                lo = min(offset or 0, size)
+                hi = size if length is None else min(lo + length, size)
+                return {"content": _decode(data[lo:hi]), "etag": etag, "size": size, "offset": lo, "end": hi}
+            starts = _starts(path, st, data)
+            # A final newline starts no further line.
+            total = len(starts) - (1 if starts[-1] == size else 0)
+            first = start_line or 1
+            # Line 1 of an empty file is still the whole file.
+            if first > max(total, 1):
+                raise HTTPException(
+                    status_code=416, detail=f"start_line {first} is past the end of the file ({total} lines)."
+                )
+            last = total if end_line is None else min(end_line, total)
+            lo = int(starts[first - 1]) if total else 0
+            hi = int(starts[last]) if last < len(starts) else size
+            return {
+                "content": _decode(data[lo:hi]),
+                "etag": etag,
+                "size": size,
+                "start_line": first,
+                "end_line": last,
+                "total_lines": total,
+            }
 
 
 def write_file(root: str, relative_path: str, content: str) -> None:
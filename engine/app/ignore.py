@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import re
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+
+def _translate_glob(glob: str) -> str:
+    """Regex for one gitignore glob: ``*`` and ``?`` stay within a path segment, ``**`` spans segments."""
+    out: List[str] = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if c == "*":
+            if glob.startswith("**", i):
+                at_start = i == 0 or glob[i - 1] == "/"
+                if at_start and glob.startswith("**/", i):
+                    # Leading or middle "**/": zero or more directories.
+                    out.append("(?:.*/)?")
+                    i += 3
+                    continue
+                if at_start and i + 2 == n:
+                    # Trailing "/**": everything inside.
+                    out.append(".*")
+                    i += 2
+                    continue
+                out.append("[^/]*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            first = i + 2 if glob[i + 1 : i + 2] in ("!", "^") else i + 1
+            # A "]" right after the opening bracket is a literal member.
+            end = glob.find("]", first + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1 : end]
+                if body[:1] in ("!", "^"):
+                    body = "^" + body[1:]
+                out.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def _parse(line: str) -> Optional[Tuple[str, bool, bool]]:
+    """``(regex, negated, dir_only)`` for one pattern line, or None for blanks and comments."""
+    line = line.strip("\r\n").lstrip()
+    trimmed = line.rstrip()
+    if trimmed.endswith("\\") and len(trimmed) < len(line):
+        # "\ " keeps one escaped trailing space.
+        trimmed += " "
+    line = trimmed
+    if not line or line.startswith("#"):
+        return None
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    elif line.startswith(("\\!", "\\#")):
+        line = line[1:]
+    while line.startswith("./"):
+        line = line[2:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    if "/" in line:
+        # A slash anywhere but the end anchors the pattern to the project root.
+        regex = _translate_glob(line.lstrip("/"))
+    else:
+        regex = "(?:.*/)?" + _translate_glob(line)
+    return regex, negated, dir_only
+
+
+class IgnoreMatcher:
+    """
+    Gitignore-style matcher compiled once for a list of patterns.
+
+    Supports comments, ``!`` negation (the last matching pattern wins),
+    patterns anchored by a leading or inner ``/``, directory-only patterns with
+    a trailing ``/``, and ``*``/``?``/``[...]``/``**`` globs. Consecutive
+    patterns of the same sign are folded into one alternation, so a path costs
+    one regex match per run of patterns rather than one ``fnmatch`` per
+    pattern and path component. Paths are project-relative and may use either
+    separator.
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.patterns = tuple(patterns)
+        parsed = [rule for rule in map(_parse, self.patterns) if rule is not None]
+        # Runs of same-sign rules, each compiled twice: once for directories, once for files.
+        self._groups: List[Tuple[bool, Optional[Pattern[str]], Optional[Pattern[str]]]] = []
+        start = 0
+        while start < len(parsed):
+            end = start
+            while end < len(parsed) and parsed[end][1] == parsed[start][1]:
+                end += 1
+            run = parsed[start:end]
+            self._groups.append(
+                (
+                    parsed[start][1],
+                    self._compile(regex for regex, _, _ in run),
+                    self._compile(regex for regex, _, dir_only in run if not dir_only),
+                )
+            )
+            start = end
+
+    @staticmethod
+    def _compile(regexes: Iterable[str]) -> Optional[Pattern[str]]:
+        alternatives = list(regexes)
+        if not alternatives:
+            return None
+        return re.compile("(?:" + "|".join(alternatives) + ")", re.DOTALL)
+
+    def __bool__(self) -> bool:
+        return bool(self._groups)
+
+    def decide(self, rel: str, is_dir: bool = False) -> Optional[bool]:
+        """True if the last matching pattern ignores ``rel``, False if it re-includes it, None if none match."""
+        rel = rel.replace("\\", "/").strip("/")
+        for negated, dirs, files in reversed(self._groups):
+            pattern = dirs if is_dir else files
+            if pattern is not None and pattern.fullmatch(rel):
+                return not negated
+        return None
+
+    def match(self, rel: str, is_dir: bool = False) -> bool:
+        """
+        Whether ``rel`` itself is ignored, not counting its parent directories.
+
+        Enough for walkers, which never descend into an ignored directory.
+        """
+        return bool(self.decide(rel, is_dir))
+
+    def ignored(self, rel: str, is_dir: bool = False) -> bool:
+        """Whether ``rel`` or any directory above it is ignored."""
+        parts = rel.replace("\\", "/").strip("/").split("/")
+        for depth in range(1, len(parts)):
+            if self.match("/".join(parts[:depth]), is_dir=True):
+                return True
+        return self.match("/".join(parts), is_dir=is_dir)
+
+
+@lru_cache(maxsize=256)
+def _compiled(patterns: Tuple[str, ...]) -> IgnoreMatcher:
+    return IgnoreMatcher(patterns)
+
+
+def compile_ignore(patterns: Iterable[str]) -> IgnoreMatcher:
+    """The matcher for ``patterns``, compiled once per distinct pattern list and then shared."""
+    return _compiled(tuple(patterns))
+
+
+class GitignoreTree:
+    """
+    The ``.gitignore`` files of a working tree, read lazily, one per directory.
+
+    As in git, a pattern is relative to the directory of the file it comes
+    from, a deeper file overrides shallower ones, and ``.git/info/exclude``
+    ranks below the root ``.gitignore``.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._lock = threading.Lock()
+        self._matchers: Dict[str, Optional[IgnoreMatcher]] = {}
+
+    def _matcher(self, directory: str) -> Optional[IgnoreMatcher]:
+        if directory in self._matchers:
+            return self._matchers[directory]
+        lines: List[str] = []
+        sources = [self.root / directory / ".gitignore"]
+        if not directory:
+            sources.insert(0, self.root / ".git" / "info" / "exclude")
+        for source in sources:
+            try:
+                lines.extend(source.read_text(encoding="utf-8", errors="replace").splitlines())
+            except OSError:
+                continue
+        matcher = compile_ignore(lines) if lines else None
+        with self._lock:
+            self._matchers[directory] = matcher or None
+        return self._matchers[directory]
+
+    def match(self, rel: str, is_dir: bool = False) -> bool:
+        """Whether ``rel`` itself is ignored; like ``IgnoreMatcher.match``, parents are assumed checked."""
+        parts = rel.replace("\\", "/").strip("/").split("/")
+        for depth in range(len(parts) - 1, -1, -1):
+            matcher = self._matcher("/".join(parts[:depth]))
+            if matcher is None:
+                continue
+            decision = matcher.decide("/".join(parts[depth:]), is_dir)
+            if decision is not None:
+                return decision
+        return False
+
+    def ignored(self, rel: str, is_dir: bool = False) -> bool:
+        """Whether ``rel`` or any directory above it is ignored."""
+        parts = rel.replace("\\", "/").strip("/").split("/")
+        for depth in range(1, len(parts)):
+            if self.match("/".join(parts[:depth]), is_dir=True):
+                return True
+        return self.match("/".join(parts), is_dir=is_dir)
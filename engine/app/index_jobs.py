@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class IndexCancelled(Exception):
+    """Raised inside the indexer when its job has been cancelled."""
+
+
+@dataclass
+class IndexJob:
+    """
+    Progress record for one indexing run.
+
+    The indexer updates the counters in place as it goes; readers only ever
+    take a snapshot via ``as_dict``.
+    """
+
+    project_id: str
+    force: bool = False
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    state: str = "queued"
+    files_total: Optional[int] = None
+    files_scanned: int = 0
+    chunks_total: int = 0
+    chunks_embedded: int = 0
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    _started: Optional[float] = field(default=None, repr=False)
+    _finished: Optional[float] = field(default=None, repr=False)
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def active(self) -> bool:
+        return self.state in ACTIVE_STATES
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise IndexCancelled(f"Index job {self.id} was cancelled")
+
+    def _elapsed(self) -> float:
+        if self._started is None:
+            return 0.0
+        return (self._finished or time.monotonic()) - self._started
+
+    def _eta_seconds(self, elapsed: float) -> Optional[float]:
+        if self.state != "running" or elapsed <= 0:
+            return None
+        scanning = self.files_total is None or self.files_scanned < self.files_total
+        if not scanning and self.chunks_embedded and self.chunks_total:
+            rate = self.chunks_embedded / elapsed
+            return max(self.chunks_total - self.chunks_embedded, 0) / rate
+        if self.files_total and self.files_scanned:
+            rate = self.files_scanned / elapsed
+            return max(self.files_total - self.files_scanned, 0) / rate
+        return None
+
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = self._elapsed()
+        eta = self._eta_seconds(elapsed)
+        return {
+            "job_id": self.id,
+            "project_id": self.project_id,
+            "state": self.state,
+            "force": self.force,
+            "files_total": self.files_total,
+            "files_scanned": self.files_scanned,
+            "chunks_total": self.chunks_total,
+            "chunks_embedded": self.chunks_embedded,
+            "elapsed_seconds": round(elapsed, 3),
+            "chunks_per_second": round(self.chunks_embedded / elapsed, 2) if elapsed > 0 else 0.0,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class IndexJobManager:
+    """
+    Runs indexing jobs on a bounded thread pool.
+
+    At most one job per project runs at a time; submitting while one is
+    active returns the existing job instead of starting a second walk. A
+    ``force`` submit is never dropped: it upgrades a job that has not started
+    yet, or queues one forced follow-up to run when a non-forced job finishes.
+    """
+
+    def __init__(self, runner: Callable[..., Dict[str, Any]], max_workers: int = 2, history: int = 20) -> None:
+        self._runner = runner
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="decodifier-index")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, List[IndexJob]] = {}
+        # Forced runs waiting for the project's running job to finish.
+        self._followups: Dict[str, Tuple[Any, IndexJob]] = {}
+        self._history = history
+
+    def submit(self, project: Any, force: bool = False) -> IndexJob:
+        with self._lock:
+            jobs = self._jobs.setdefault(project.id, [])
+            current = next((job for job in jobs if job.active), None)
+            if current is not None:
+                if not force or current.force:
+                    return current
+                if current.state == "queued":
+                    current.force = True
+                    return current
+                followup = self._followups.get(project.id)
+                if followup is not None and followup[1].active:
+                    return followup[1]
+                job = IndexJob(project_id=project.id, force=True)
+                jobs.append(job)
+                del jobs[: -self._history]
+                self._followups[project.id] = (project, job)
+                return job
+            job = IndexJob(project_id=project.id, force=force)
+            jobs.append(job)
+            del jobs[: -self._history]
+        self._executor.submit(self._run, project, job)
+        return job
+
+    def _run(self, project: Any, job: IndexJob) -> None:
+        try:
+            self._execute(project, job)
+        finally:
+            with self._lock:
+                followup = self._followups.pop(project.id, None)
+            if followup is not None:
+                self._executor.submit(self._run, *followup)
+
+    def _execute(self, project: Any, job: IndexJob) -> None:
+        with self._lock:
+            if job._cancel.is_set():
+                self._finish(job, "cancelled")
+                return
+            # Under the lock, so a force submit either upgrades this job before it starts or queues a follow-up.
+            job.state = "running"
+        job.started_at = datetime.utcnow().isoformat()
+        job._started = time.monotonic()
+        try:
+            job.result = self._runner(project, force=job.force, job=job)
+        except IndexCancelled:
+            self._finish(job, "cancelled")
+        except Exception as exc:
+            job.error = str(exc)
+            self._finish(job, "error")
+        else:
+            self._finish(job, "completed")
+
+    @staticmethod
+    def _finish(job: IndexJob, state: str) -> None:
+        job._finished = time.monotonic()
+        job.finished_at = datetime.utcnow().isoformat()
+        job.state = state
+
+    def get(self, project_id: str, job_id: str) -> Optional[IndexJob]:
+        with self._lock:
+            for job in self._jobs.get(project_id, []):
+                if job.id == job_id:
+                    return job
+        return None
+
+    def list(self, project_id: str) -> List[IndexJob]:
+        with self._lock:
+            return list(self._jobs.get(project_id, []))
+
+    def active(self, project_id: str) -> Optional[IndexJob]:
+        with self._lock:
+            for job in self._jobs.get(project_id, []):
+                if job.active:
+                    return job
+        return None
+
+    def cancel(self, project_id: str, job_id: str) -> Optional[IndexJob]:
+        job = self.get(project_id, job_id)
+        if job is not None and job.active:
+            job.cancel()
+            if job.state == "queued":
+                self._finish(job, "cancelled")
+        return job
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .paths import data_root
+
+
+@dataclass
+class FileRecord:
+    size: int
+    mtime_ns: int
+    sha256: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+    def matches_stat(self, size: int, mtime_ns: int) -> bool:
+        return self.size == size and self.mtime_ns == mtime_ns
+
+
+class IndexManifest:
+    """
+    Per-project record of what the indexer last embedded for each file.
+
+    Manifests live in:
+      <DATA_ROOT>/manifests/<project_id>.json
+
+    Each entry maps a project-relative path to its size, mtime, content hash and
+    the chunk ids written to the vector store, so reindexing only touches files
+    that actually changed.
+    """
+
+    def __init__(self, project_id: str, root: Optional[Path] = None) -> None:
+        self.project_id = project_id
+        self.path = (root or data_root()) / "manifests" / f"{project_id}.json"
+        self.files: Dict[str, FileRecord] = {}
+        # Chunking configuration the records were produced with; a mismatch forces a rebuild.
+        self.chunker: Optional[str] = None
+
+    @classmethod
+    def load(cls, project_id: str, root: Optional[Path] = None) -> "IndexManifest":
+        manifest = cls(project_id, root=root)
+        if not manifest.path.exists():
+            return manifest
+        try:
+            data = json.loads(manifest.path.read_text(encoding="utf-8"))
+            files = data.get("files", {})
+            manifest.files = {rel: FileRecord(**record) for rel, record in files.items()}
+            manifest.chunker = data.get("chunker")
+        except (json.JSONDecodeError, TypeError, AttributeError):
+            # A corrupt manifest only costs a full reindex.
+            manifest.files = {}
+        return manifest
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "chunker": self.chunker,
+            "files": {rel: asdict(record) for rel, record in sorted(self.files.items())},
+        }
+        tmp = self.path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(payload), encoding="utf-8")
+        tmp.replace(self.path)
+
+    def get(self, rel: str) -> Optional[FileRecord]:
+        return self.files.get(rel)
+
+    def set(self, rel: str, record: FileRecord) -> None:
+        self.files[rel] = record
+
+    def pop(self, rel: str) -> Optional[FileRecord]:
+        return self.files.pop(rel, None)
+
+    def paths(self) -> Iterator[str]:
+        return iter(list(self.files))
+
+    def clear(self) -> None:
+        self.files = {}
+        self.chunker = None
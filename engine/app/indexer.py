@@ -1,50 +1,78 @@
-import fnmatch
+import atexit
+import hashlib
 import os
+import threading
+import time
 from pathlib import Path
-from typing import List, Dict, Any, Iterable
+from typing import TYPE_CHECKING, List, Dict, Any, Iterable, Optional, Sequence, Set, Tuple
 from datetime import datetime
 
-import chromadb
-from chromadb.config import Settings
+import numpy as np
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from sentence_transformers import SentenceTransformer
 
 from .schemas import Project
 from .config import get_settings
+from .index_manifest import FileRecord, IndexManifest
+from .index_jobs import IndexCancelled, IndexJob, IndexJobManager
+from .embedding_cache import EmbeddingCache
+from .chunking import chunk_text, chunker_id
+from .lexical_index import LexicalIndex
+from .search_cache import LRUCache
+from .search_filters import SearchFilter, path_metadata
+from .index_status import IndexStatusStore, estimate_staleness, pid_alive
+from .collection_registry import CollectionRegistry, collection_name
+from .vector_store import VectorCollection, VectorStore, open_store
+from .scanner import ScanEntry
+from . import file_source
+from .ignore import GitignoreTree, IgnoreMatcher, compile_ignore
 from .paths import data_root
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# chromadb and sentence_transformers take seconds to import, so both are only
+# loaded on first use; see _get_client, _get_embedder and warm_up.
 _settings = get_settings()
-VECTOR_ROOT = data_root() / "chroma"
-VECTOR_ROOT.mkdir(parents=True, exist_ok=True)
-
-_client = chromadb.PersistentClient(
-    path=str(VECTOR_ROOT),
-    settings=Settings(allow_reset=False, anonymized_telemetry=False),
-)
-_observers: Dict[str, Observer] = {}
+
+# One open store per vector backend in use; projects can be on different backends.
+_clients: Dict[str, VectorStore] = {}
+_client_lock = threading.Lock()
+# One observer thread serves every project; each handler owns its own scheduled watches.
+_observer: Observer | None = None
+_handlers: Dict[str, "_ChangeHandler"] = {}
+_watch_lock = threading.RLock()
+# Watchers stopped for idleness restart on the next search or index request.
+_evicted: Dict[str, float] = {}
+_refused: Dict[str, str] = {}
+_reaper: threading.Thread | None = None
 _embedder_model_name = _settings.embedding_model
 _embedder = None
-_index_status: Dict[str, Dict[str, str]] = {}
-
-
-def _token_chunks(text: str, max_chars: int = 1200, overlap: int = 120) -> Iterable[Dict[str, Any]]:
-    lines = text.splitlines()
-    buffer: List[str] = []
-    char_count = 0
-    start_line = 1
-    for idx, line in enumerate(lines, start=1):
-        if char_count + len(line) > max_chars and buffer:
-            yield {"text": "\n".join(buffer), "start": start_line, "end": idx - 1}
-            # keep small overlap
-            keep = max(0, int(overlap / max(len(line), 1)))
-            buffer = buffer[-keep:]
-            char_count = sum(len(l) for l in buffer)
-            start_line = max(1, idx - keep)
-        buffer.append(line)
-        char_count += len(line)
-    if buffer:
-        yield {"text": "\n".join(buffer), "start": start_line, "end": len(lines)}
+_embedder_lock = threading.Lock()
+# Models other than the configured one, loaded to serve collections that have not been migrated yet.
+_other_embedders: Dict[str, "SentenceTransformer"] = {}
+_embedding_dims: Dict[str, int] = {}
+_embed_pool: Dict[str, Any] | None = None
+_embed_pool_lock = threading.Lock()
+_embedding_cache = EmbeddingCache(max_entries=_settings.embedding_cache_max_entries)
+_status_store = IndexStatusStore()
+_collections = CollectionRegistry()
+# Projects known to have no pre-registry Chroma collection to adopt.
+_no_legacy: Set[str] = set()
+# Staleness estimates per project: (computed at, last_indexed_at it was computed for, estimate).
+_staleness: Dict[str, Tuple[float, Optional[float], Dict[str, Any]]] = {}
+_STALENESS_TTL = 15.0
+# Serialise writes to one project's manifest and index; different projects index in parallel.
+_manifest_locks: Dict[str, threading.Lock] = {}
+_manifest_locks_guard = threading.Lock()
+_lexical_indexes: Dict[str, LexicalIndex] = {}
+_lexical_lock = threading.Lock()
+_generation_lock = threading.Lock()
+# Bumped whenever a watcher sees an entry appear, disappear or move; lets tree listings stay cached.
+_tree_generations: Dict[str, int] = {}
+_query_embeddings: LRUCache[np.ndarray] = LRUCache(_settings.query_embedding_cache_size)
+_search_results: LRUCache[List[Dict[str, Any]]] = LRUCache(_settings.search_result_cache_size)
+_manifest_paths: LRUCache[Tuple[List[str], Optional[str]]] = LRUCache(32)
 
 
 def _combined_ignore(project: Project) -> List[str]:
@@ -55,176 +83,1435 @@ def _combined_ignore(project: Project) -> List[str]:
     return combined
 
 
-def _matches_ignore(rel: Path, patterns: List[str]) -> bool:
-    rel_str = rel.as_posix()
-    parts = rel_str.split("/")
-    for pattern in patterns:
-        normalized = pattern.strip().lstrip("./")
-        if not normalized:
-            continue
-        if normalized.endswith("/"):
-            normalized = normalized[:-1]
-        if fnmatch.fnmatch(rel_str, normalized) or rel_str.startswith(f"{normalized}/"):
-            return True
-        if any(fnmatch.fnmatch(part, normalized) for part in parts):
-            return True
-    return False
-
-
-def _should_skip(path: Path, project: Project, patterns: List[str] | None = None) -> bool:
-    rel = path.relative_to(Path(project.path))
-    ignore_patterns = patterns or _combined_ignore(project)
-    if _matches_ignore(rel, ignore_patterns):
+def _ignore_matcher(project: Project) -> IgnoreMatcher:
+    """The project's compiled ignore rules; compiled once per distinct pattern list."""
+    return compile_ignore(_combined_ignore(project))
+
+
+_INDEXED_SUFFIXES = frozenset({".py", ".ts", ".tsx", ".js", ".jsx", ".go", ".cpp", ".md", ".rs", ".java"})
+
+
+def _skip_rel(rel: str, is_dir: bool, ignore: IgnoreMatcher) -> bool:
+    """Skip test for walkers, which have already pruned ignored parent directories."""
+    if ignore.match(rel, is_dir):
         return True
-    if path.is_dir():
-        return False
-    allowed_suffixes = {".py", ".ts", ".tsx", ".js", ".jsx", ".go", ".cpp", ".md", ".rs", ".java"}
-    return path.suffix not in allowed_suffixes
+    return not is_dir and os.path.splitext(rel)[1] not in _INDEXED_SUFFIXES
+
+
+def _should_skip(
+    path: Path, project: Project, ignore: IgnoreMatcher | None = None, gitignore: GitignoreTree | None = None
+) -> bool:
+    rel = str(path.relative_to(Path(project.path)))
+    is_dir = path.is_dir()
+    ignore = ignore or _ignore_matcher(project)
+    if ignore.ignored(rel, is_dir):
+        return True
+    if not is_dir and os.path.splitext(rel)[1] not in _INDEXED_SUFFIXES:
+        return True
+    return file_source.excluded(project, rel, is_dir, rules=gitignore)
+
+
+def _get_client(backend: str | None = None) -> VectorStore:
+    backend = backend or _settings.vector_storage
+    client = _clients.get(backend)
+    if client is None:
+        with _client_lock:
+            client = _clients.get(backend)
+            if client is None:
+                client = _clients[backend] = open_store(backend, rerank_factor=_settings.vector_rerank_factor)
+    return client
+
 
+def _backend_for(project_id: str) -> str:
+    """The vector backend configured for the project."""
+    return _settings.vector_storage_projects.get(project_id, _settings.vector_storage)
 
-def _get_embedder() -> SentenceTransformer:
+
+def _get_embedder(model: str | None = None) -> "SentenceTransformer":
     global _embedder
+    if model is not None and model != _embedder_model_name:
+        with _embedder_lock:
+            if model not in _other_embedders:
+                from sentence_transformers import SentenceTransformer
+
+                _other_embedders[model] = SentenceTransformer(model)
+            return _other_embedders[model]
     if _embedder is None:
-        _embedder = SentenceTransformer(_embedder_model_name)
+        with _embedder_lock:
+            if _embedder is None:
+                from sentence_transformers import SentenceTransformer
+
+                _embedder = SentenceTransformer(_embedder_model_name)
     return _embedder
 
 
-def _embed(texts: List[str]) -> List[List[float]]:
-    return _get_embedder().encode(texts, normalize_embeddings=True).tolist()
+def _embedding_dim(model: str) -> int:
+    if model not in _embedding_dims:
+        _embedding_dims[model] = int(_get_embedder(model).get_sentence_embedding_dimension())
+    return _embedding_dims[model]
 
 
-def index_project(project: Project) -> Dict[str, Any]:
-    _index_status[project.id] = {
-        "state": "indexing",
-        "note": "Indexing...",
-        "updated_at": datetime.utcnow().isoformat(),
-    }
-    root = Path(project.path)
-    collection = _client.get_or_create_collection(name=project.id, metadata={"project": project.name})
+def warm_up() -> Dict[str, Any]:
+    """Load the vector store client and embedding model now instead of on the first request."""
+    started = time.perf_counter()
+    _get_client()
+    _embed(["warm up"])
+    return {"model": _embedder_model_name, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def _get_embed_pool() -> Dict[str, Any] | None:
+    """
+    Lazily start the multi-process encoding pool, one model copy per process.
+
+    Returns None when ``embed_processes`` is 0 or 1, in which case everything is
+    encoded in-process.
+    """
+    global _embed_pool
+    if _settings.embed_processes <= 1:
+        return None
+    with _embed_pool_lock:
+        if _embed_pool is None:
+            _embed_pool = _get_embedder().start_multi_process_pool(
+                target_devices=["cpu"] * _settings.embed_processes
+            )
+            atexit.register(stop_embed_pool)
+    return _embed_pool
+
+
+def stop_embed_pool() -> None:
+    global _embed_pool
+    with _embed_pool_lock:
+        if _embed_pool is not None:
+            type(_get_embedder()).stop_multi_process_pool(_embed_pool)
+            _embed_pool = None
+
+
+def _embed(texts: List[str], model: str | None = None) -> np.ndarray:
+    """Encode ``texts`` with ``model`` (default: the configured one) into a contiguous float32 matrix."""
+    default = model is None or model == _embedder_model_name
+    encoder = _get_embedder(None if default else model)
+    # Each worker gets at least embed_pool_min_shard texts, so a batch uses fewer workers rather than
+    # shards too small to repay the hand-off; the pool runs the configured model.
+    shards = min(_settings.embed_processes, len(texts) // max(_settings.embed_pool_min_shard, 1)) if default else 0
+    pool = _get_embed_pool() if shards > 1 else None
+    if pool is not None:
+        chunk_size = -(-len(texts) // shards)
+        vectors = encoder.encode(texts, pool=pool, chunk_size=chunk_size, normalize_embeddings=True)
+    else:
+        vectors = encoder.encode(texts, normalize_embeddings=True)
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def _embed_documents(texts: List[str], model: str | None = None) -> np.ndarray:
+    """Embed chunk texts, encoding only those the embedding cache has not seen for this model."""
+    model = model or _embedder_model_name
+    keys = [EmbeddingCache.key(text) for text in texts]
+    vectors = _embedding_cache.get_many(model, keys)
+    missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+    fresh = None
+    if missing:
+        fresh = np.ascontiguousarray(_embed(list(missing.values()), model), dtype=np.float32)
+        _embedding_cache.put_many(model, dict(zip(missing, fresh)))
+        if not vectors and len(missing) == len(keys):
+            # Nothing cached and no duplicates: the encoder output is already in order.
+            return fresh
+        vectors.update(zip(missing, fresh))
+    dim = fresh.shape[1] if fresh is not None else len(next(iter(vectors.values())))
+    out = np.empty((len(keys), dim), dtype=np.float32)
+    for row, key in enumerate(keys):
+        out[row] = vectors[key]
+    return out
+
+
+def _iter_project_files(project: Project, ignore: IgnoreMatcher, start: Path | None = None) -> Iterable[ScanEntry]:
+    """Indexable files under ``start`` (default the project root), each stat'ed once."""
+    entries = file_source.iter_entries(
+        project,
+        lambda rel, is_dir: _skip_rel(rel, is_dir, ignore),
+        start=start,
+        workers=_settings.scan_workers,
+    )
+    return (entry for entry in entries if not entry.is_dir)
+
+
+# Bumped when chunk metadata gains fields; a manifest built before that is rebuilt on the next index.
+_CHUNK_META_VERSION = 2
+
+
+def _chunker_id() -> str:
+    base = chunker_id(_settings.chunk_strategy, _settings.chunk_max_chars, _settings.chunk_overlap)
+    return f"{base}-m{_CHUNK_META_VERSION}"
+
+
+def _build_chunks(rel: str, text: str, mtime: float) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+    ids: List[str] = []
     docs: List[str] = []
     metas: List[Dict[str, Any]] = []
-    ids: List[str] = []
-    ignore_patterns = _combined_ignore(project)
+    chunks = chunk_text(
+        text,
+        Path(rel).suffix,
+        strategy=_settings.chunk_strategy,
+        max_chars=_settings.chunk_max_chars,
+        overlap=_settings.chunk_overlap,
+    )
+    for chunk_idx, chunk in enumerate(chunks):
+        ids.append(f"{rel}:{chunk_idx}")
+        docs.append(chunk["text"])
+        metas.append(
+            {
+                "file_path": rel,
+                "start": chunk["start"],
+                "end": chunk["end"],
+                "modified": mtime,
+                # Chroma metadata values must be scalars.
+                "symbols": ",".join(chunk["symbols"]),
+                **path_metadata(rel),
+            }
+        )
+    return ids, docs, metas
+
+
+def _chunk_path(chunk_id: str) -> str:
+    return chunk_id.rsplit(":", 1)[0]
+
+
+def _iter_collection_ids(collection, page_size: int = 5000) -> Iterable[str]:
+    offset = 0
+    while True:
+        page = collection.get(include=[], limit=page_size, offset=offset)["ids"]
+        if not page:
+            return
+        yield from page
+        offset += len(page)
+
+
+def _get_lexical(project_id: str) -> LexicalIndex:
+    with _lexical_lock:
+        index = _lexical_indexes.get(project_id)
+        if index is None:
+            index = _lexical_indexes[project_id] = LexicalIndex(project_id)
+        return index
+
+
+def _manifest_lock(project_id: str) -> threading.Lock:
+    """The lock held while a project's manifest and index are read and rewritten."""
+    with _manifest_locks_guard:
+        lock = _manifest_locks.get(project_id)
+        if lock is None:
+            lock = _manifest_locks[project_id] = threading.Lock()
+        return lock
+
+
+def _bump_generation(project_id: str) -> None:
+    """Record that a project's index changed, so cached search results for it stop matching in every worker."""
+    _status_store.bump_generation(project_id)
+
+
+def _bump_tree_generation(project_id: str) -> None:
+    with _generation_lock:
+        _tree_generations[project_id] = _tree_generations.get(project_id, 0) + 1
+
+
+def tree_generation(project_id: str) -> int | None:
+    """
+    Counter that changes whenever the project's file tree may have changed.
+
+    None when no running watcher covers the whole project, in which case the
+    tree has to be listed again to know.
+    """
+    handler = _handlers.get(project_id)
+    if handler is None or handler.missed_dirs or _observer is None or not _observer.is_alive():
+        return None
+    return _tree_generations.get(project_id, 0)
+
+
+def _collection_entry(project_id: str, create: bool = False) -> Dict[str, Any] | None:
+    """
+    Registry entry naming the project's active (and any shadow) collection.
+
+    Collections are named by project, model and dimension. A collection from
+    before that scheme (named after the project alone) is adopted as active
+    with the model last recorded for it. With ``create``, a project without
+    any collection gets one for the configured model in the project's
+    configured backend.
+    """
+    entry = _collections.get(project_id)
+    if entry is None:
+        entry = _adopt_legacy_collection(project_id)
+    if entry is None and create:
+        model = _embedder_model_name
+        backend = _backend_for(project_id)
+        dim = _embedding_dim(model)
+        name = collection_name(project_id, model, dim)
+        _get_client(backend).get_or_create_collection(
+            name=name, metadata={"project": project_id, "model": model, "dim": dim}
+        )
+        _collections.set_active(project_id, name, model, dim, backend)
+        entry = _collections.get(project_id)
+    return entry
+
+
+def _adopt_legacy_collection(project_id: str) -> Dict[str, Any] | None:
+    # Legacy collections only ever lived in Chroma. A project now configured for another
+    # backend is adopted there and then copied across by the backend migration.
+    if project_id in _no_legacy:
+        return None
+    if "chroma" not in _clients and not (data_root() / "chroma").is_dir():
+        # Never used Chroma: nothing to adopt, and no reason to import it or create its directory.
+        _no_legacy.add(project_id)
+        return None
     try:
-        for dirpath, dirnames, filenames in os.walk(root):
-            current_dir = Path(dirpath)
-            pruned = []
-            for dirname in dirnames:
-                rel_dir = (current_dir / dirname).relative_to(root)
-                if _matches_ignore(rel_dir, ignore_patterns):
-                    continue
-                pruned.append(dirname)
-            dirnames[:] = pruned
+        legacy = _get_client("chroma").get_collection(name=project_id)
+    except Exception:
+        _no_legacy.add(project_id)
+        return None
+    stored = _status_store.get(project_id) or {}
+    peek = legacy.get(limit=1, include=["embeddings"])
+    dim = len(peek["embeddings"][0]) if len(peek["ids"]) else None
+    _collections.set_active(project_id, project_id, stored.get("model") or _embedder_model_name, dim, "chroma")
+    return _collections.get(project_id)
 
-            for filename in filenames:
-                path = current_dir / filename
-                if _should_skip(path, project, ignore_patterns):
-                    continue
-                rel = str(path.relative_to(root))
-                text = path.read_text(encoding="utf-8", errors="ignore")
-                for chunk_idx, chunk in enumerate(_token_chunks(text)):
-                    chunk_id = f"{rel}:{chunk_idx}"
-                    ids.append(chunk_id)
-                    docs.append(chunk["text"])
-                    metas.append(
-                        {
-                            "file_path": rel,
-                            "start": chunk["start"],
-                            "end": chunk["end"],
-                            "modified": path.stat().st_mtime,
-                        }
+
+def _open_collection(info: Dict[str, Any]) -> VectorCollection:
+    return _get_client(info["backend"]).get_or_create_collection(name=info["name"])
+
+
+def _active_collection(project_id: str, create: bool = False) -> VectorCollection | None:
+    """The collection serving searches for the project, or None if it has never been indexed."""
+    entry = _collection_entry(project_id, create=create)
+    if entry is None:
+        return None
+    return _open_collection(entry["active"])
+
+
+def _vector_targets(project_id: str) -> List[Tuple[VectorCollection, str]]:
+    """``(collection, model)`` pairs every write must reach: the active one plus a shadow under migration."""
+    entry = _collection_entry(project_id)
+    if entry is None:
+        return []
+    return [(_open_collection(info), info["model"]) for info in (entry["active"], entry["shadow"]) if info]
+
+
+def _delete_ids(project_id: str, ids: List[str], batch_size: int = 5000) -> None:
+    """Delete chunk ids from the project's vector collections and its lexical index."""
+    if not ids:
+        return
+    for collection, _ in _vector_targets(project_id):
+        for start in range(0, len(ids), batch_size):
+            collection.delete(ids=ids[start : start + batch_size])
+    _get_lexical(project_id).delete(ids)
+    _bump_generation(project_id)
+
+
+def _backfill_lexical(collection, lexical: LexicalIndex, page_size: int = 1000) -> int:
+    """Copy an existing collection's documents into a missing lexical index without re-embedding."""
+    offset = 0
+    while True:
+        page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            return offset
+        lexical.upsert(page["ids"], page["documents"], page["metadatas"])
+        offset += len(page["ids"])
+
+
+class _ChunkBatch:
+    """
+    Buffers chunks on their way into a project's indexes and writes them in bounded batches.
+
+    A batch is flushed once it holds ``batch_size`` chunks or ``max_bytes`` of
+    chunk text. Each flush writes to every current vector target (the active
+    collection, plus the shadow while a migration runs) and the lexical
+    index. Manifest records are only committed after their file's chunks have
+    been upserted, so an interrupted run never marks unwritten files as indexed.
+    """
+
+    def __init__(
+        self, project_id: str, lexical: LexicalIndex, manifest: IndexManifest, batch_size: int, max_bytes: int
+    ) -> None:
+        self.project_id = project_id
+        self.lexical = lexical
+        self.manifest = manifest
+        self.batch_size = max(batch_size, 1)
+        self.max_bytes = max_bytes
+        self.ids: List[str] = []
+        self.docs: List[str] = []
+        self.metas: List[Dict[str, Any]] = []
+        self.stale_ids: List[str] = []
+        self.records: List[Tuple[str, FileRecord]] = []
+        self.buffered_bytes = 0
+        self.written = 0
+
+    def add_file(
+        self,
+        rel: str,
+        record: FileRecord,
+        ids: List[str],
+        docs: List[str],
+        metas: List[Dict[str, Any]],
+        previous: FileRecord | None = None,
+    ) -> None:
+        self.ids.extend(ids)
+        self.docs.extend(docs)
+        self.metas.extend(metas)
+        self.buffered_bytes += sum(len(doc) for doc in docs)
+        if previous:
+            current = set(ids)
+            self.stale_ids.extend(cid for cid in previous.chunk_ids if cid not in current)
+        self.records.append((rel, record))
+
+    @property
+    def full(self) -> bool:
+        return len(self.docs) >= self.batch_size or self.buffered_bytes >= self.max_bytes
+
+    def flush(self) -> int:
+        """Embed and upsert everything buffered; returns the number of chunks written."""
+        count = len(self.docs)
+        targets = _vector_targets(self.project_id) if count else []
+        for start in range(0, count, self.batch_size):
+            end = start + self.batch_size
+            docs = self.docs[start:end]
+            for collection, model in targets:
+                collection.upsert(
+                    documents=docs,
+                    ids=self.ids[start:end],
+                    metadatas=self.metas[start:end],
+                    embeddings=_embed_documents(docs, model),
+                )
+            self.lexical.upsert(self.ids[start:end], docs, self.metas[start:end])
+            _bump_generation(self.project_id)
+        _delete_ids(self.project_id, self.stale_ids)
+        for rel, record in self.records:
+            self.manifest.set(rel, record)
+        self.ids, self.docs, self.metas, self.stale_ids, self.records = [], [], [], [], []
+        self.buffered_bytes = 0
+        self.written += count
+        return count
+
+
+def _new_batch(project_id: str, manifest: IndexManifest) -> _ChunkBatch:
+    return _ChunkBatch(
+        project_id,
+        _get_lexical(project_id),
+        manifest,
+        _settings.index_batch_size,
+        _settings.index_batch_max_bytes,
+    )
+
+
+def _set_status(project_id: str, state: str, note: str, **fields: Any) -> None:
+    _status_store.update(project_id, state=state, note=note, updated_at=time.time(), pid=os.getpid(), **fields)
+
+
+def _manifest_counts(manifest: IndexManifest) -> Dict[str, int]:
+    return {
+        "file_count": len(manifest.files),
+        "chunk_count": sum(len(record.chunk_ids) for record in manifest.files.values()),
+    }
+
+
+def index_project(project: Project, force: bool = False, job: IndexJob | None = None) -> Dict[str, Any]:
+    """
+    Bring the project's collection in line with the files on disk.
+
+    Files whose size and mtime (or, failing that, content hash) match the
+    manifest are skipped; only new or changed files are re-chunked and
+    re-embedded, and chunks belonging to deleted files are removed. Files are
+    streamed through fixed-size embedding batches, so memory stays bounded by
+    the batch settings rather than the size of the project.
+    ``force`` ignores the manifest and re-embeds everything. Progress is
+    reported on ``job``, which is also checked for cancellation between files.
+    """
+    job = job or IndexJob(project_id=project.id, force=force)
+    started = time.time()
+    _set_status(project.id, "indexing", "Indexing...")
+    collection = _active_collection(project.id, create=True)
+    counts = {"added": 0, "updated": 0, "removed": 0, "skipped": 0}
+    ignore = _ignore_matcher(project)
+
+    def flush(batch: _ChunkBatch) -> None:
+        job.chunks_embedded += batch.flush()
+        _set_status(
+            project.id,
+            "indexing",
+            f"Indexing... {job.files_scanned} files scanned, {job.chunks_embedded} chunks embedded",
+        )
+
+    try:
+        with _manifest_lock(project.id):
+            manifest = IndexManifest.load(project.id)
+            # Re-embed everything, but keep the old records so their leftover chunk ids get deleted.
+            rebuild = force or manifest.chunker != _chunker_id() or collection.count() == 0
+            if not manifest.files:
+                # Nothing recorded yet, so every record this run writes matches the current chunker.
+                manifest.chunker = _chunker_id()
+            job.files_total = len(manifest.files) or None
+            lexical = _get_lexical(project.id)
+            if not rebuild and lexical.count() == 0:
+                _backfill_lexical(collection, lexical)
+            batch = _new_batch(project.id, manifest)
+            seen = set()
+            try:
+                for entry in _iter_project_files(project, ignore):
+                    job.check_cancelled()
+                    job.files_scanned += 1
+                    rel, stat = entry.rel, entry.stat
+                    seen.add(rel)
+                    record = manifest.get(rel)
+                    if not rebuild and record and record.matches_stat(stat.st_size, stat.st_mtime_ns):
+                        counts["skipped"] += 1
+                        continue
+                    try:
+                        with open(entry.path, "rb") as handle:
+                            data = handle.read()
+                    except FileNotFoundError:
+                        # Deleted since the scan listed it; dropped from the manifest below like any missing file.
+                        seen.discard(rel)
+                        continue
+                    digest = hashlib.sha256(data).hexdigest()
+                    if not rebuild and record and record.sha256 == digest:
+                        # Touched but unchanged: refresh the stat so the next run skips without reading.
+                        record.size, record.mtime_ns = stat.st_size, stat.st_mtime_ns
+                        counts["skipped"] += 1
+                        continue
+                    file_ids, file_docs, file_metas = _build_chunks(
+                        rel, data.decode("utf-8", errors="ignore"), stat.st_mtime
                     )
-        if docs:
-            embeddings = _embed(docs)
-            collection.upsert(documents=docs, ids=ids, metadatas=metas, embeddings=embeddings)
-        _index_status[project.id] = {
-            "state": "indexed",
-            "note": f"Indexed {len(docs)} chunks",
-            "updated_at": datetime.utcnow().isoformat(),
-        }
+                    del data
+                    job.chunks_total += len(file_docs)
+                    counts["updated" if record else "added"] += 1
+                    batch.add_file(
+                        rel,
+                        FileRecord(stat.st_size, stat.st_mtime_ns, digest, file_ids),
+                        file_ids,
+                        file_docs,
+                        file_metas,
+                        previous=record,
+                    )
+                    if batch.full:
+                        flush(batch)
+                job.files_total = job.files_scanned
+                job.check_cancelled()
+                flush(batch)
+                manifest.chunker = _chunker_id()
+            finally:
+                # Whatever made it into the collection stays recorded, even if the run was cancelled.
+                manifest.save()
+
+            stale_ids: List[str] = []
+            for rel in manifest.paths():
+                if rel not in seen:
+                    stale_ids.extend(manifest.pop(rel).chunk_ids)
+                    counts["removed"] += 1
+            _delete_ids(project.id, stale_ids)
+            manifest.save()
+            entry = _collection_entry(project.id)
+            _set_status(
+                project.id,
+                "indexed",
+                (
+                    f"Indexed {batch.written} chunks ({counts['added']} added, {counts['updated']} updated, "
+                    f"{counts['removed']} removed, {counts['skipped']} unchanged)"
+                ),
+                # The scan start, so files touched while indexing still count as stale.
+                last_indexed_at=started,
+                model=entry["active"]["model"],
+                chunker=manifest.chunker,
+                **_manifest_counts(manifest),
+            )
+    except IndexCancelled:
+        _set_status(project.id, "cancelled", "Indexing cancelled")
+        raise
     except Exception as exc:
-        _index_status[project.id] = {
-            "state": "error",
-            "note": str(exc),
-            "updated_at": datetime.utcnow().isoformat(),
-        }
+        _set_status(project.id, "error", str(exc))
         raise
     _start_watcher(project)
-    return {"project_id": project.id, "chunks_indexed": len(docs)}
+    if _needs_migration(project.id, entry):
+        # The configured model or backend changed: rebuild in the background while the old collection keeps serving.
+        migration_jobs.submit(project)
+    return {
+        "project_id": project.id,
+        "chunks_indexed": batch.written,
+        "files_added": counts["added"],
+        "files_updated": counts["updated"],
+        "files_removed": counts["removed"],
+        "files_skipped": counts["skipped"],
+    }
+
+
+def _vector_search_many(
+    project_id: str,
+    embeddings: np.ndarray,
+    ks: Sequence[int],
+    wheres: Sequence[Optional[Dict[str, Any]]] = (None,),
+) -> List[List[Dict[str, Any]]]:
+    """
+    Run one ``collection.query`` per ``where`` clause for several query vectors, truncating each ranking to its own k.
 
+    Several clauses partition the filtered chunks (large file lists are split
+    to stay under Chroma's SQL variable limit), so their rankings are merged
+    by distance.
+    """
+    collection = _active_collection(project_id)
+    if collection is None:
+        return [[] for _ in ks]
+    rankings: List[List[Dict[str, Any]]] = [[] for _ in ks]
+    for where in wheres:
+        res = collection.query(query_embeddings=embeddings, n_results=max(ks), where=where)
+        for row in range(len(ks)):
+            for chunk_id, doc, meta, distance in zip(
+                res.get("ids", [[]])[row],
+                res.get("documents", [[]])[row],
+                res.get("metadatas", [[]])[row],
+                res.get("distances", [[]])[row],
+            ):
+                rankings[row].append({"id": chunk_id, "text": doc, "meta": meta, "score": -distance})
+    if len(wheres) > 1:
+        for hits in rankings:
+            hits.sort(key=lambda hit: hit["score"], reverse=True)
+    return [hits[:k] for hits, k in zip(rankings, ks)]
 
-def search_chunks(project_id: str, query: str, k: int = 12) -> List[Dict[str, Any]]:
+
+def _fuse(rankings: List[List[Dict[str, Any]]], k: int, rrf_k: int = 60) -> List[Dict[str, Any]]:
+    """Reciprocal rank fusion: score each chunk by the sum of 1 / (rrf_k + rank) over the rankings."""
+    fused: Dict[str, Dict[str, Any]] = {}
+    for hits in rankings:
+        for rank, hit in enumerate(hits):
+            entry = fused.setdefault(hit["id"], {**hit, "score": 0.0})
+            entry["score"] += 1.0 / (rrf_k + rank + 1)
+    return sorted(fused.values(), key=lambda hit: hit["score"], reverse=True)[:k]
+
+
+def _embed_queries(queries: Sequence[str], model: str | None = None) -> np.ndarray:
+    """Embed queries as one matrix, encoding only those missing from the query cache in a single call."""
+    model = model or _embedder_model_name
+    rows: Dict[str, np.ndarray] = {}
+    for query in dict.fromkeys(queries):
+        cached = _query_embeddings.get((model, query))
+        if cached is not None:
+            rows[query] = cached
+    missing = [query for query in dict.fromkeys(queries) if query not in rows]
+    if missing:
+        fresh = _embed(missing, model)
+        for query, vector in zip(missing, fresh):
+            vector = vector.reshape(1, -1).copy()
+            vector.setflags(write=False)
+            _query_embeddings.put((model, query), vector)
+            rows[query] = vector
+    return np.vstack([rows[query] for query in queries])
+
+
+def _manifest_summary(project_id: str) -> Tuple[List[str], Optional[str]]:
+    """Files and chunker id recorded in the project's manifest, re-read only when the manifest file changes."""
+    path = IndexManifest(project_id).path
     try:
-        collection = _client.get_collection(name=project_id)
+        stat = path.stat()
+    except FileNotFoundError:
+        return [], None
+
+    def load() -> Tuple[List[str], Optional[str]]:
+        manifest = IndexManifest.load(project_id)
+        return list(manifest.paths()), manifest.chunker
+
+    return _manifest_paths.get_or_compute((project_id, stat.st_mtime_ns, stat.st_size), load)
+
+
+def _indexed_paths(project_id: str) -> List[str]:
+    return _manifest_summary(project_id)[0]
+
+
+def _has_path_metadata(project_id: str) -> bool:
+    """Whether every chunk of the project carries ``path_metadata``, i.e. it was built by the current chunker."""
+    return _manifest_summary(project_id)[1] == _chunker_id()
+
+
+def search_chunks(
+    project_id: str,
+    query: str,
+    k: int = 12,
+    mode: str = "vector",
+    paths: Optional[List[str]] = None,
+    extensions: Optional[List[str]] = None,
+    modified_after: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Search a project's chunks.
+
+    ``vector`` ranks by embedding similarity, ``lexical`` by BM25 over the
+    local inverted index (no model call), and ``hybrid`` fuses both rankings.
+    ``paths``, ``extensions`` and ``modified_after`` narrow the candidates
+    inside both indexes (see ``SearchFilter``). Results are cached per index
+    generation, so any write to the project's index invalidates them.
+    """
+    request = {
+        "project_id": project_id,
+        "query": query,
+        "k": k,
+        "mode": mode,
+        "paths": paths,
+        "extensions": extensions,
+        "modified_after": modified_after,
+    }
+    return search_many([request])[0]
+
+
+def search_many(requests: Sequence[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Answer several searches at once, possibly across projects.
+
+    Each request is a dict with ``project_id``, ``query``, ``k`` and ``mode``,
+    plus optional ``paths``, ``extensions`` and ``modified_after`` filters.
+    Cached results are reused; the remaining vector queries are encoded in one
+    model call and sent as one multi-vector query per project and filter.
+    Results come back in request order.
+    """
+    filters = [SearchFilter.from_request(req) for req in requests]
+    # Keyed on the index generation seen before any index is read, so results that race
+    # a write are cached under the old generation, where no later search looks them up.
+    # Generations live in the shared status store, so writes by other workers count too.
+    generations = _status_store.generations({req["project_id"] for req in requests})
+    keys = [_result_key(req, flt, generations.get(req["project_id"], 0)) for req, flt in zip(requests, filters)]
+    results: List[Optional[List[Dict[str, Any]]]] = [None] * len(requests)
+    candidates: Dict[int, Optional[List[str]]] = {}
+    pending: List[int] = []
+    for pos, req in enumerate(requests):
+        cached = _search_results.get(keys[pos])
+        if cached is not None:
+            results[pos] = cached
+            continue
+        flt = filters[pos]
+        candidates[pos] = flt.select(_indexed_paths(req["project_id"])) if flt.restricts_paths else None
+        if candidates[pos] == []:
+            # Nothing indexed matches the path filter; skip both indexes.
+            results[pos] = []
+            _search_results.put(keys[pos], [])
+        else:
+            pending.append(pos)
+
+    vector_pos = [pos for pos in pending if requests[pos]["mode"] != "lexical"]
+    rankings: Dict[int, List[Dict[str, Any]]] = {pos: [] for pos in vector_pos}
+    # Queries must be embedded with whichever model built each project's active collection.
+    by_model: Dict[str, List[int]] = {}
+    for pos in vector_pos:
+        entry = _collection_entry(requests[pos]["project_id"])
+        if entry is not None:
+            by_model.setdefault(entry["active"]["model"], []).append(pos)
+    for model, positions in by_model.items():
+        matrix = _embed_queries([requests[pos]["query"] for pos in positions], model)
+        groups: Dict[Tuple[str, SearchFilter], List[int]] = {}
+        for row, pos in enumerate(positions):
+            groups.setdefault((requests[pos]["project_id"], filters[pos]), []).append(row)
+        for (project_id, flt), rows in groups.items():
+            group = [positions[row] for row in rows]
+            ks = [_vector_k(requests[pos]) for pos in group]
+            wheres = flt.wheres(candidates[group[0]], fields=_has_path_metadata(project_id))
+            for pos, hits in zip(group, _vector_search_many(project_id, matrix[rows], ks, wheres)):
+                rankings[pos] = hits
+
+    for pos in pending:
+        req = requests[pos]
+        project_id, query, k, mode = req["project_id"], req["query"], req["k"], req["mode"]
+        lexical_k = k * 2 if mode == "hybrid" else k
+        lexical = []
+        if mode != "vector":
+            lexical = _get_lexical(project_id).search(
+                query, lexical_k, paths=candidates[pos], modified_after=filters[pos].modified_after
+            )
+        if mode == "lexical":
+            hits = lexical
+        elif mode == "hybrid":
+            hits = _fuse([rankings[pos], lexical], k)
+        else:
+            hits = rankings[pos]
+        _search_results.put(keys[pos], hits)
+        results[pos] = hits
+    return [[dict(hit) for hit in hits] for hits in results]
+
+
+def _result_key(req: Dict[str, Any], flt: SearchFilter, generation: int) -> tuple:
+    return (req["project_id"], req["query"], req["k"], req["mode"], flt, generation)
+
+
+def _vector_k(req: Dict[str, Any]) -> int:
+    # Hybrid over-fetches so chunks ranked moderately by both lists can still make the cut.
+    return req["k"] * 2 if req["mode"] == "hybrid" else req["k"]
+
+
+def _needs_migration(project_id: str, entry: Dict[str, Any] | None) -> bool:
+    if entry is None:
+        return False
+    active = entry["active"]
+    return active["model"] != _embedder_model_name or active["backend"] != _backend_for(project_id)
+
+
+def migrate_project(project: Project, force: bool = False, job: IndexJob | None = None) -> Dict[str, Any]:
+    """
+    Move a project's vectors to the configured embedding model and vector backend without downtime.
+
+    Every chunk in the active collection is copied into a shadow collection
+    named for the new model and dimension in the configured backend; chunks
+    are re-embedded only when the model changed, otherwise their vectors are
+    copied as they are. Searches keep using the active collection throughout,
+    and writes from indexing and the watcher go to both, so the shadow never
+    falls behind. Once the copy completes the registry swaps the shadow in and
+    the old collection is dropped. Chunk ids, the manifest and the lexical
+    index do not depend on either and are reused as they are. ``force`` is
+    accepted for the job runner and ignored.
+    """
+    job = job or IndexJob(project_id=project.id, force=force)
+    model = _embedder_model_name
+    backend = _backend_for(project.id)
+    with _manifest_lock(project.id):
+        entry = _collection_entry(project.id)
+        if not _needs_migration(project.id, entry):
+            return {
+                "project_id": project.id,
+                "migrated": False,
+                "model": entry and entry["active"]["model"],
+                "backend": entry and entry["active"]["backend"],
+            }
+        active = entry["active"]
+        reembed = active["model"] != model
+        dim = (not reembed and active["dim"]) or _embedding_dim(model)
+        name = collection_name(project.id, model, dim)
+        client = _get_client(backend)
+        # A shadow left behind by an interrupted migration is rebuilt from scratch.
+        try:
+            client.delete_collection(name=name)
+        except Exception:
+            pass
+        shadow = client.create_collection(name=name, metadata={"project": project.id, "model": model, "dim": dim})
+        _collections.set_shadow(project.id, name, model, dim, backend)
+        source = _get_client(active["backend"]).get_collection(name=active["name"])
+        ids = list(_iter_collection_ids(source))
+    job.chunks_total = len(ids)
+    batch_size = max(_settings.index_batch_size, 1)
+    include = ["documents", "metadatas"] if reembed else ["documents", "metadatas", "embeddings"]
+    try:
+        for start in range(0, len(ids), batch_size):
+            job.check_cancelled()
+            # Holding the manifest lock keeps concurrent writers from interleaving with this page.
+            with _manifest_lock(project.id):
+                page = source.get(ids=ids[start : start + batch_size], include=include)
+                if page["ids"]:
+                    shadow.upsert(
+                        ids=page["ids"],
+                        documents=page["documents"],
+                        metadatas=page["metadatas"],
+                        embeddings=(
+                            _embed_documents(page["documents"], model)
+                            if reembed
+                            else np.asarray(page["embeddings"], dtype=np.float32)
+                        ),
+                    )
+            job.chunks_embedded += len(page["ids"])
+        with _manifest_lock(project.id):
+            _collections.promote(project.id)
+            _bump_generation(project.id)
+    except BaseException:
+        with _manifest_lock(project.id):
+            _collections.set_shadow(project.id, None, None, None)
+        try:
+            client.delete_collection(name=name)
+        except Exception:
+            pass
+        raise
+    try:
+        _get_client(active["backend"]).delete_collection(name=active["name"])
     except Exception:
-        return []
-    embedding = _embed([query])[0]
-    res = collection.query(query_embeddings=[embedding], n_results=k)
-    hits = []
-    for doc, meta in zip(res.get("documents", [[]])[0], res.get("metadatas", [[]])[0]):
-        hits.append({"text": doc, "meta": meta})
-    return hits
+        pass
+    _status_store.update(project.id, model=model)
+    return {
+        "project_id": project.id,
+        "migrated": True,
+        "from": active,
+        "to": {"name": name, "model": model, "dim": dim, "backend": backend},
+        "chunks": job.chunks_embedded,
+    }
+
+
+def compact_project(project: Project) -> Dict[str, Any]:
+    """
+    Sweep chunks that no longer belong to any file.
+
+    Manifest entries for files missing on disk are dropped, then every id in the
+    collection that the manifest does not account for is deleted. Collections
+    indexed before manifests existed only lose chunks whose file is gone.
+    """
+    collection = _active_collection(project.id)
+    if collection is None:
+        return {"project_id": project.id, "chunks_removed": 0, "files_removed": 0}
+    root = Path(project.path)
+    with _manifest_lock(project.id):
+        manifest = IndexManifest.load(project.id)
+        missing = [rel for rel in manifest.paths() if not (root / rel).is_file()]
+        for rel in missing:
+            manifest.pop(rel)
+        live = {cid for rel in manifest.paths() for cid in manifest.get(rel).chunk_ids}
+        orphans: List[str] = []
+        lexical = _get_lexical(project.id)
+        for chunk_id in _iter_collection_ids(collection):
+            if manifest.files:
+                if chunk_id not in live:
+                    orphans.append(chunk_id)
+            elif not (root / _chunk_path(chunk_id)).is_file():
+                orphans.append(chunk_id)
+        _delete_ids(project.id, orphans)
+        if manifest.files:
+            lexical.delete([chunk_id for chunk_id in lexical.ids() if chunk_id not in live])
+        manifest.save()
+    return {"project_id": project.id, "chunks_removed": len(orphans), "files_removed": len(missing)}
 
 
 class _ChangeHandler(FileSystemEventHandler):
-    def __init__(self, project: Project):
+    """
+    Coalesces watchdog events per path and reindexes them in batches.
+
+    Events only record the path and when it was last touched; a background
+    worker waits until a path has been quiet for the debounce window (or has
+    been pending for ``max_delay``), then decides from the filesystem whether
+    it was created, changed or removed. All files that come due together share
+    one ``_embed`` call and one ``upsert``.
+    """
+
+    def __init__(self, project: Project, debounce: float | None = None):
         super().__init__()
         self.project = project
-        self.ignore_patterns = _combined_ignore(project)
+        self.root = Path(project.path)
+        self.ignore = _ignore_matcher(project)
+        # The working tree's .gitignore rules, read on first use and dropped whenever a .gitignore changes.
+        self._gitignore: GitignoreTree | None = None
+        self.debounce = _settings.watch_debounce_ms / 1000 if debounce is None else debounce
+        self.max_delay = max(self.debounce * 10, 1.0)
+        self._pending: Dict[Path, Tuple[float, float]] = {}
+        self._cond = threading.Condition()
+        self._worker: threading.Thread | None = None
+        self._batches = 0
+        self._last_batch_files = 0
+        self._last_error: str | None = None
+        self._last_batch_at: float | None = None
+        self._closed = False
+        self.started_at = time.time()
+        self.last_used = time.monotonic()
+        self.watches: List[Any] = []
+        self.watched_dirs = 0
+        # Directories watched without recursion: new subdirectories in them need their own watch.
+        self.flat_dirs: set = set()
+        # New directories left unwatched because of the watch limit.
+        self.missed_dirs = 0
 
     def on_modified(self, event):
         if event.is_directory:
             return
-        self._reindex_file(Path(event.src_path))
+        if self.project.file_source != "walk" and os.path.basename(event.src_path) == ".gitignore":
+            self._gitignore = None
+            self._tree_changed(Path(event.src_path))
+        self._enqueue(Path(event.src_path))
 
     def on_created(self, event):
         if event.is_directory:
+            self._watch_new_dir(Path(event.src_path))
+        # A directory moved in from outside brings its .gitignore files without events for them.
+        self._gitignore_changed(event.src_path, event.is_directory)
+        self._tree_changed(Path(event.src_path))
+        self._enqueue(Path(event.src_path))
+
+    def on_deleted(self, event):
+        self._gitignore_changed(event.src_path, event.is_directory)
+        self._tree_changed(Path(event.src_path))
+        self._enqueue(Path(event.src_path))
+
+    def on_moved(self, event):
+        if event.is_directory:
+            self._watch_new_dir(Path(event.dest_path))
+        self._gitignore_changed(event.src_path, event.is_directory)
+        self._gitignore_changed(event.dest_path, event.is_directory)
+        self._tree_changed(Path(event.src_path))
+        self._tree_changed(Path(event.dest_path))
+        self._enqueue(Path(event.src_path))
+        self._enqueue(Path(event.dest_path))
+
+    def _gitignore_changed(self, path: str, is_dir: bool = False):
+        if is_dir or os.path.basename(path) == ".gitignore":
+            self._gitignore = None
+
+    @property
+    def gitignore(self) -> GitignoreTree:
+        rules = self._gitignore
+        if rules is None:
+            rules = self._gitignore = GitignoreTree(self.root)
+        return rules
+
+    def _tree_changed(self, path: Path):
+        try:
+            rel = path.relative_to(self.root)
+        except ValueError:
+            return
+        if not self.ignore.ignored(str(rel)):
+            _bump_tree_generation(self.project.id)
+
+    def _watch_new_dir(self, path: Path):
+        if path.parent not in self.flat_dirs:
+            return
+        try:
+            rel = path.relative_to(self.root)
+        except ValueError:
+            return
+        if self.ignore.ignored(str(rel), is_dir=True):
+            return
+        plan, dirs = _plan_watches(path, self.root, self.ignore)
+        with _watch_lock:
+            if _watched_dir_total() + dirs > _settings.watch_max_dirs:
+                self._last_error = f"Not watching new directory {rel}: watch limit reached"
+                self.missed_dirs += 1
+                return
+            self._schedule(plan, dirs)
+
+    def _schedule(self, plan: List[Tuple[Path, bool]], dirs: int):
+        for path, recursive in plan:
+            self.watches.append(_get_observer().schedule(self, path=str(path), recursive=recursive))
+            if not recursive:
+                self.flat_dirs.add(path)
+        self.watched_dirs += dirs
+
+    def close(self):
+        """Unschedule every watch, process what is still pending and stop the worker thread."""
+        observer = _observer
+        for watch in self.watches:
+            try:
+                if observer is not None:
+                    observer.unschedule(watch)
+            except KeyError:
+                pass
+        self.watches = []
+        self.flat_dirs = set()
+        self.watched_dirs = 0
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _enqueue(self, path: Path):
+        try:
+            rel = path.relative_to(self.root)
+        except ValueError:
+            return
+        if self.ignore.ignored(str(rel)):
+            return
+        now = time.monotonic()
+        with self._cond:
+            first, _ = self._pending.get(path, (now, now))
+            self._pending[path] = (first, now)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._drain_loop, daemon=True)
+                self._worker.start()
+            self._cond.notify()
+
+    def _drain_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                now = time.monotonic()
+                due = [
+                    path
+                    for path, (first, last) in self._pending.items()
+                    if now - last >= self.debounce or now - first >= self.max_delay
+                ]
+                if not due:
+                    next_due = min(
+                        min(last + self.debounce, first + self.max_delay) for first, last in self._pending.values()
+                    )
+                    self._cond.wait(timeout=max(next_due - now, 0.01))
+                    continue
+                for path in due:
+                    del self._pending[path]
+            self._process(due)
+
+    def flush(self):
+        """Process everything pending right now, ignoring the debounce window."""
+        with self._cond:
+            due = list(self._pending)
+            self._pending.clear()
+        if due:
+            self._process(due)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            depth = len(self._pending)
+            oldest = min((first for first, _ in self._pending.values()), default=None)
+        return {
+            "queue_depth": depth,
+            "lag_seconds": round(time.monotonic() - oldest, 3) if oldest is not None else 0.0,
+            "batches": self._batches,
+            "last_batch_files": self._last_batch_files,
+            "last_error": self._last_error,
+        }
+
+    def _process(self, paths: List[Path]):
+        started = time.time()
+        removed: List[Path] = []
+        changed: List[Path] = []
+        for path in paths:
+            if path.is_dir():
+                entries = _iter_project_files(self.project, self.ignore, start=path)
+                changed.extend(Path(entry.path) for entry in entries)
+            elif path.exists():
+                changed.append(path)
+            else:
+                removed.append(path)
+        try:
+            self._remove_paths(removed)
+            self._reindex_files(changed)
+            self._last_error = None
+        except Exception as exc:
+            self._last_error = str(exc)
+        self._batches += 1
+        self._last_batch_files = len(paths)
+        self._last_batch_at = time.time()
+        with self._cond:
+            caught_up = self._last_error is None and not self._pending
+        # Every change seen before this batch started is now in the index; staleness estimates start from here.
+        self.report(last_incremental_at=started if caught_up else None)
+
+    def report(self, last_incremental_at: Optional[float] = None) -> None:
+        """Publish this watcher's health to the shared status store for other workers to read."""
+        stats = self.stats()
+        stats.update(
+            state="stopped" if self._closed else "running",
+            pid=os.getpid(),
+            started_at=self.started_at,
+            last_batch_at=self._last_batch_at,
+            watched_dirs=self.watched_dirs,
+            watches=len(self.watches),
+        )
+        covered = {} if last_incremental_at is None else {"last_incremental_at": last_incremental_at}
+        try:
+            _status_store.update(self.project.id, watcher=stats, **covered)
+        except Exception:
+            # Status reporting must never take the watcher down.
+            pass
+
+    def _remove_path(self, path: Path):
+        self._remove_paths([path])
+
+    def _remove_paths(self, paths: List[Path]):
+        """Drop the chunks of deleted files, or of every file under a deleted directory."""
+        rels = []
+        for path in paths:
+            try:
+                rels.append(str(path.relative_to(self.root)))
+            except ValueError:
+                continue
+        if not rels:
             return
-        self._reindex_file(Path(event.src_path))
+        prefixes = tuple(f"{rel}{os.sep}" for rel in rels)
+        exact = set(rels)
+        with _manifest_lock(self.project.id):
+            manifest = IndexManifest.load(self.project.id)
+            removed = [r for r in manifest.paths() if r in exact or r.startswith(prefixes)]
+            if not removed:
+                return
+            stale_ids = [cid for r in removed for cid in manifest.pop(r).chunk_ids]
+            _delete_ids(self.project.id, stale_ids)
+            manifest.save()
+            _status_store.update(self.project.id, **_manifest_counts(manifest))
 
     def _reindex_file(self, path: Path):
-        if _should_skip(path, self.project, self.ignore_patterns):
+        self._reindex_files([path])
+
+    def _reindex_files(self, paths: List[Path]):
+        snapshots = []
+        vanished = []
+        for path in dict.fromkeys(paths):
+            if _should_skip(path, self.project, self.ignore, self.gitignore):
+                continue
+            try:
+                stat = path.stat()
+                data = path.read_bytes()
+            except FileNotFoundError:
+                # Editors often write-then-rename; the path may be gone by the time we get here.
+                vanished.append(path)
+                continue
+            snapshots.append((str(path.relative_to(self.root)), stat, data))
+        self._remove_paths(vanished)
+        if not snapshots:
             return
-        root = Path(self.project.path)
-        rel = str(path.relative_to(root))
-        collection = _client.get_or_create_collection(name=self.project.id)
-        text = path.read_text(encoding="utf-8", errors="ignore")
-        docs: List[str] = []
-        ids: List[str] = []
-        metas: List[Dict[str, Any]] = []
-        for chunk_idx, chunk in enumerate(_token_chunks(text)):
-            chunk_id = f"{rel}:{chunk_idx}"
-            ids.append(chunk_id)
-            docs.append(chunk["text"])
-            metas.append(
-                {
-                    "file_path": rel,
-                    "start": chunk["start"],
-                    "end": chunk["end"],
-                    "modified": path.stat().st_mtime,
-                }
+        with _manifest_lock(self.project.id):
+            _collection_entry(self.project.id, create=True)
+            manifest = IndexManifest.load(self.project.id)
+            batch = _new_batch(self.project.id, manifest)
+            for rel, stat, data in snapshots:
+                digest = hashlib.sha256(data).hexdigest()
+                record = manifest.get(rel)
+                if record and record.sha256 == digest:
+                    # Touched but unchanged: refresh the stat so it no longer counts as changed.
+                    record.size, record.mtime_ns = stat.st_size, stat.st_mtime_ns
+                    continue
+                file_ids, file_docs, file_metas = _build_chunks(
+                    rel, data.decode("utf-8", errors="ignore"), stat.st_mtime
+                )
+                batch.add_file(
+                    rel,
+                    FileRecord(stat.st_size, stat.st_mtime_ns, digest, file_ids),
+                    file_ids,
+                    file_docs,
+                    file_metas,
+                    previous=record,
+                )
+            batch.flush()
+            manifest.save()
+            _status_store.update(self.project.id, **_manifest_counts(manifest))
+
+
+class WatchLimitExceeded(Exception):
+    """Starting a watcher would exceed ``watch_max_dirs``."""
+
+
+def _plan_watches(start: Path, root: Path, ignore: IgnoreMatcher) -> Tuple[List[Tuple[Path, bool]], int]:
+    """
+    Decide which directories to schedule so ignored subtrees are never watched.
+
+    A subtree without ignored directories gets one recursive watch; a
+    directory that contains an ignored subtree is watched on its own and its
+    remaining children are planned separately. Returns the ``(path, recursive)``
+    watches and the number of directories they cover.
+    """
+    children: Dict[Path, List[Path]] = {}
+    tainted: set = set()
+    for dirpath, dirnames, _ in os.walk(start):
+        current = Path(dirpath)
+        kept = []
+        for dirname in dirnames:
+            if ignore.match(str((current / dirname).relative_to(root)), is_dir=True):
+                tainted.add(current)
+            else:
+                kept.append(dirname)
+        dirnames[:] = kept
+        children[current] = [current / name for name in kept]
+    # os.walk is top-down, so walking the directories in reverse marks every ancestor of an ignored one.
+    for directory in reversed(list(children)):
+        if any(child in tainted for child in children[directory]):
+            tainted.add(directory)
+
+    plan: List[Tuple[Path, bool]] = []
+    stack = [start]
+    while stack:
+        directory = stack.pop()
+        if directory in tainted:
+            plan.append((directory, False))
+            stack.extend(children.get(directory, []))
+        else:
+            plan.append((directory, True))
+    return plan, len(children)
+
+
+def _get_observer() -> Observer:
+    global _observer
+    if _observer is None:
+        _observer = Observer()
+        _observer.daemon = True
+        _observer.start()
+    return _observer
+
+
+def _watched_dir_total() -> int:
+    return sum(handler.watched_dirs for handler in _handlers.values())
+
+
+def start_watcher(project: Project) -> Dict[str, Any]:
+    """
+    Watch a project for changes, skipping ignored subtrees.
+
+    Raises ``WatchLimitExceeded`` when the project's directories would push the
+    total past ``watch_max_dirs``.
+    """
+    with _watch_lock:
+        handler = _handlers.get(project.id)
+        if handler is not None:
+            handler.last_used = time.monotonic()
+            return watcher_info(project.id)
+        handler = _ChangeHandler(project)
+        plan, dirs = _plan_watches(handler.root, handler.root, handler.ignore)
+        total = _watched_dir_total()
+        if total + dirs > _settings.watch_max_dirs:
+            reason = (
+                f"Watching {project.id} needs {dirs} directories but {total} of "
+                f"{_settings.watch_max_dirs} are already in use (DECODIFIER_WATCH_MAX_DIRS)"
             )
-        if docs:
-            embeddings = _embed(docs)
-            collection.upsert(documents=docs, ids=ids, metadatas=metas, embeddings=embeddings)
+            _refused[project.id] = reason
+            _status_store.update(project.id, watcher={"state": "refused", "reason": reason, "pid": os.getpid()})
+            raise WatchLimitExceeded(reason)
+        handler._schedule(plan, dirs)
+        # Anything cached from before this watcher existed may have missed changes.
+        _bump_tree_generation(project.id)
+        _handlers[project.id] = handler
+        _refused.pop(project.id, None)
+        _evicted.pop(project.id, None)
+        _ensure_reaper()
+    handler.report()
+    return watcher_info(project.id)
 
 
 def _start_watcher(project: Project) -> None:
-    if project.id in _observers:
+    try:
+        start_watcher(project)
+    except WatchLimitExceeded:
+        # Recorded in _refused and the status store; the index itself is still usable.
+        pass
+
+
+def stop_watcher(project_id: str, evicted: bool = False) -> bool:
+    with _watch_lock:
+        handler = _handlers.pop(project_id, None)
+        if handler is None:
+            return False
+        if evicted:
+            _evicted[project_id] = time.time()
+    handler.close()
+    report = handler.stats()
+    report.update(state="evicted" if evicted else "stopped", pid=os.getpid(), stopped_at=time.time())
+    _status_store.update(project_id, watcher=report)
+    return True
+
+
+def stop_all_watchers() -> None:
+    for project_id in list(_handlers):
+        stop_watcher(project_id)
+
+
+def touch_project(project: Project) -> None:
+    """
+    Mark a project as in use, keeping its watcher from being evicted.
+
+    A watcher evicted for idleness is restarted, and an incremental index job
+    catches up on whatever changed while nobody was watching.
+    """
+    handler = _handlers.get(project.id)
+    if handler is not None:
+        handler.last_used = time.monotonic()
+        return
+    if project.id in _evicted:
+        _start_watcher(project)
+        index_jobs.submit(project)
+
+
+def _ensure_reaper() -> None:
+    global _reaper
+    idle = _settings.watch_idle_seconds
+    if idle <= 0 or (_reaper is not None and _reaper.is_alive()):
         return
-    handler = _ChangeHandler(project)
-    observer = Observer()
-    observer.schedule(handler, path=str(project.path), recursive=True)
-    observer.daemon = True
-    observer.start()
-    _observers[project.id] = observer
+    _reaper = threading.Thread(target=_reap_idle_watchers, args=(idle,), daemon=True)
+    _reaper.start()
+
+
+def _reap_idle_watchers(idle: float) -> None:
+    while True:
+        time.sleep(min(idle / 4, 60.0))
+        evict_idle_watchers(idle)
+
+
+def evict_idle_watchers(idle: float | None = None) -> List[str]:
+    idle = _settings.watch_idle_seconds if idle is None else idle
+    now = time.monotonic()
+    stale = [project_id for project_id, handler in list(_handlers.items()) if now - handler.last_used >= idle]
+    for project_id in stale:
+        stop_watcher(project_id, evicted=True)
+    return stale
+
+
+def watcher_info(project_id: str) -> Dict[str, Any]:
+    handler = _handlers.get(project_id)
+    if handler is None:
+        if project_id in _refused:
+            return {"project_id": project_id, "state": "refused", "reason": _refused[project_id]}
+        state = "evicted" if project_id in _evicted else "stopped"
+        return {"project_id": project_id, "state": state}
+    return {
+        "project_id": project_id,
+        "state": "running",
+        "watched_dirs": handler.watched_dirs,
+        "watches": len(handler.watches),
+        "idle_seconds": round(time.monotonic() - handler.last_used, 1),
+        **handler.stats(),
+    }
+
+
+def list_watchers() -> Dict[str, Any]:
+    project_ids = list(_handlers) + [pid for pid in list(_evicted) + list(_refused) if pid not in _handlers]
+    return {
+        "watchers": [watcher_info(project_id) for project_id in dict.fromkeys(project_ids)],
+        "watched_dirs": _watched_dir_total(),
+        "max_watched_dirs": _settings.watch_max_dirs,
+        "idle_seconds": _settings.watch_idle_seconds,
+    }
 
 
-def get_status_map(projects: List[Project]) -> Dict[str, Dict[str, str]]:
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp else None
+
+
+def _staleness_for(project: Project, indexed_at: Optional[float]) -> Dict[str, Any]:
+    cached = _staleness.get(project.id)
+    now = time.monotonic()
+    if cached and cached[1] == indexed_at and now - cached[0] < _STALENESS_TTL:
+        return cached[2]
+    estimate = estimate_staleness(IndexManifest.load(project.id), Path(project.path), indexed_at)
+    _staleness[project.id] = (now, indexed_at, estimate)
+    return estimate
+
+
+def get_status_map(projects: List[Project]) -> Dict[str, Dict[str, Any]]:
+    """
+    Index state per project, read from the shared status store.
+
+    Projects never indexed report ``not_indexed``; an ``indexing`` row whose
+    writer process is gone reports ``interrupted``. Indexed projects include a
+    staleness estimate, and ``watcher`` comes from this process's live handler
+    or, failing that, the last report another worker stored.
+    """
+    rows = _status_store.get_many(project.id for project in projects)
     status = {}
     for project in projects:
-        status[project.id] = _index_status.get(
-            project.id,
-            {"state": "indexed", "note": "Indexed", "updated_at": None},
-        )
+        row = rows.get(project.id)
+        if row is None or row["state"] is None:
+            entry: Dict[str, Any] = {"state": "not_indexed", "note": "Not indexed yet", "updated_at": None}
+            row = row or {}
+        else:
+            entry = {"state": row["state"], "note": row["note"], "updated_at": _isoformat(row["updated_at"])}
+            if row["state"] == "indexing" and not pid_alive(row["pid"]):
+                entry.update(state="interrupted", note="Indexing stopped before finishing; reindex to resume")
+        if row.get("last_indexed_at"):
+            entry.update(
+                last_indexed_at=_isoformat(row["last_indexed_at"]),
+                file_count=row["file_count"],
+                chunk_count=row["chunk_count"],
+                model=row["model"],
+                chunker=row["chunker"],
+                staleness=_staleness_for(project, max(row["last_indexed_at"], row["last_incremental_at"] or 0)),
+                collection=_collections.get(project.id),
+            )
+        handler = _handlers.get(project.id)
+        if handler is not None:
+            alive = _observer is not None and _observer.is_alive()
+            entry["watcher"] = {**watcher_info(project.id), "pid": os.getpid(), "alive": alive}
+        elif row.get("watcher"):
+            watcher = dict(row["watcher"])
+            watcher["alive"] = pid_alive(watcher.get("pid"))
+            entry["watcher"] = watcher
+        status[project.id] = entry
     return status
+
+
+def embedding_cache_stats() -> Dict[str, Any]:
+    return {"model": _embedder_model_name, **_embedding_cache.stats()}
+
+
+def search_cache_stats() -> Dict[str, Any]:
+    return {"query_embeddings": _query_embeddings.stats(), "results": _search_results.stats()}
+
+
+index_jobs = IndexJobManager(index_project, max_workers=_settings.index_workers)
+# One migration at a time: each copies, and possibly re-embeds, a whole project.
+migration_jobs = IndexJobManager(migrate_project, max_workers=1)
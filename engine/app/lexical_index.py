@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from .paths import data_root
+from .sqlite_db import batched, connect
+
+_WORD = re.compile(r"[^\s\"']+")
+_TOKEN = re.compile(r"[A-Za-z0-9]+")
+# bm25() column weights: text, symbols, file_path. A hit on a defined symbol
+# name is a much stronger signal than the same word inside a body.
+_BM25_WEIGHTS = (1.0, 5.0, 2.0)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    rowid INTEGER PRIMARY KEY,
+    chunk_id TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    symbols TEXT NOT NULL DEFAULT '',
+    file_path TEXT NOT NULL DEFAULT '',
+    start INTEGER,
+    end INTEGER,
+    modified REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+    text, symbols, file_path, content='chunks', content_rowid='rowid', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+    INSERT INTO chunks_fts(rowid, text, symbols, file_path)
+    VALUES (new.rowid, new.text, new.symbols, new.file_path);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+    INSERT INTO chunks_fts(chunks_fts, rowid, text, symbols, file_path)
+    VALUES ('delete', old.rowid, old.text, old.symbols, old.file_path);
+END;
+"""
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 expression.
+
+    Each whitespace-separated word becomes a phrase of its alphanumeric parts,
+    so ``_apply_patch_for_project`` matches exactly that identifier while
+    ``apply patch`` still finds it; words are OR-ed and ranked by BM25.
+    """
+    phrases = []
+    for word in _WORD.findall(query):
+        tokens = _TOKEN.findall(word)
+        if tokens:
+            phrases.append('"' + " ".join(tokens) + '"')
+    return " OR ".join(dict.fromkeys(phrases))
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over a project's chunks, kept next to its vector collection.
+
+    Lives in <DATA_ROOT>/lexical/<project_id>.sqlite3 (SQLite FTS5). It is
+    updated in the same batches as the vector store and answers keyword and
+    exact-identifier queries without running the embedding model.
+    """
+
+    def __init__(self, project_id: str, root: Optional[Path] = None) -> None:
+        self.project_id = project_id
+        self.path = (root or data_root()) / "lexical" / f"{project_id}.sqlite3"
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = connect(self.path)
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def upsert(self, ids: Sequence[str], documents: Sequence[str], metadatas: Sequence[Dict[str, Any]]) -> None:
+        if not ids:
+            return
+        rows = [
+            (
+                chunk_id,
+                doc,
+                str(meta.get("symbols", "")).replace(",", " "),
+                str(meta.get("file_path", "")),
+                meta.get("start"),
+                meta.get("end"),
+                meta.get("modified"),
+            )
+            for chunk_id, doc, meta in zip(ids, documents, metadatas)
+        ]
+        with self._lock:
+            conn = self._connect()
+            self._delete(conn, ids)
+            conn.executemany(
+                "INSERT INTO chunks (chunk_id, text, symbols, file_path, start, end, modified)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+
+    def delete(self, ids: Sequence[str]) -> None:
+        if not ids or not self.exists:
+            return
+        with self._lock:
+            conn = self._connect()
+            self._delete(conn, ids)
+            conn.commit()
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, ids: Sequence[str]) -> None:
+        for batch in batched(ids):
+            placeholders = ",".join("?" * len(batch))
+            conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", batch)
+
+    def ids(self) -> List[str]:
+        if not self.exists:
+            return []
+        with self._lock:
+            return [row[0] for row in self._connect().execute("SELECT chunk_id FROM chunks")]
+
+    def count(self) -> int:
+        if not self.exists:
+            return 0
+        with self._lock:
+            (count,) = self._connect().execute("SELECT COUNT(*) FROM chunks").fetchone()
+        return count
+
+    def search(
+        self,
+        query: str,
+        k: int = 12,
+        paths: Optional[Sequence[str]] = None,
+        modified_after: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """BM25 search, optionally limited to chunks of ``paths`` and files modified after a timestamp."""
+        match = build_match_query(query)
+        if not match or not self.exists:
+            return []
+        weights = ", ".join(str(w) for w in _BM25_WEIGHTS)
+        where = "chunks_fts MATCH ?"
+        params: List[Any] = [match]
+        if paths is not None:
+            # One JSON parameter instead of a placeholder per path keeps clear of SQLite's variable limit.
+            where += " AND c.file_path IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(list(paths)))
+        if modified_after is not None:
+            where += " AND c.modified > ?"
+            params.append(modified_after)
+        params.append(k)
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT c.chunk_id, c.text, c.symbols, c.file_path, c.start, c.end, c.modified,"
+                f" bm25(chunks_fts, {weights}) AS rank"
+                " FROM chunks_fts JOIN chunks c ON c.rowid = chunks_fts.rowid"
+                f" WHERE {where} ORDER BY rank LIMIT ?",
+                params,
+            ).fetchall()
+        hits = []
+        for chunk_id, text, symbols, file_path, start, end, modified, rank in rows:
+            meta = {
+                "file_path": file_path,
+                "start": start,
+                "end": end,
+                "modified": modified,
+                "symbols": ",".join(symbols.split()),
+            }
+            # bm25() is lower-is-better; flip it so every search mode reports higher-is-better.
+            hits.append({"id": chunk_id, "text": text, "meta": meta, "score": -rank})
+        return hits
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
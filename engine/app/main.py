@@ -1,18 +1,23 @@
-import fnmatch
 import json
-import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Header, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 
 from .schemas import (
+    Project,
     ProjectCreate,
     SearchRequest,
     SearchResponse,
+    BatchSearchRequest,
+    BatchSearchResponse,
     FilePayload,
+    FileRead,
+    ReadManyRequest,
     PatchPayload,
     NotesPayload,
     PackInstallPayload,
@@ -23,12 +28,22 @@ from .schemas import (
     ActiveConversationPayload,
 )
 from . import storage, indexer, files, conversation_store
-from .config import DEFAULT_IGNORE
+from .config import get_settings
 from .events import event_log
 from .packs import pack_registry
+from . import project_tree
 from .policy import policy_engine, PolicyViolation
 
-app = FastAPI(title="DeCodifier Engine", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    if get_settings().preload_models:
+        indexer.warm_up()
+    yield
+    indexer.stop_all_watchers()
+
+
+app = FastAPI(title="DeCodifier Engine", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -38,6 +53,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+_read_pool = ThreadPoolExecutor(max_workers=get_settings().read_workers, thread_name_prefix="decodifier-read")
+
 
 @app.get("/health")
 def health() -> Dict[str, str]:
@@ -67,12 +84,12 @@ def _log_policy_denied(project_id: str, *, code: str, path: str, op: str) -> Non
     event_log.append(project_id, "policy_denied", {"code": code, "path": path, "op": op})
 
 
-def _ensure_policy_path(project_id: str, project_path: str, relpath: str, *, op: str) -> None:
+def _ensure_policy_path(project: Project, relpath: str, *, op: str) -> None:
     try:
-        policy_engine.ensure_allowed_path(project_path, relpath, op=op)
+        policy_engine.ensure_allowed_path(project.path, relpath, op=op)
     except PolicyViolation as exc:
         if op == "write":
-            _log_policy_denied(project_id, code=exc.code, path=relpath, op=op)
+            _log_policy_denied(project.id, code=exc.code, path=relpath, op=op)
         _handle_policy_error(exc)
 
 
@@ -85,26 +102,25 @@ def _ensure_write_size(project_id: str, relpath: str, content: str, *, op: str =
         _handle_policy_error(exc)
 
 
-def _matches_ignore(rel: Path, patterns: List[str]) -> bool:
-    rel_str = rel.as_posix()
-    parts = rel_str.split("/")
-    for pattern in patterns:
-        normalized = pattern.strip().lstrip("./")
-        if not normalized:
-            continue
-        if normalized.endswith("/"):
-            normalized = normalized[:-1]
-        if fnmatch.fnmatch(rel_str, normalized) or rel_str.startswith(f"{normalized}/"):
-            return True
-        if any(fnmatch.fnmatch(part, normalized) for part in parts):
-            return True
-    return False
+def _range_params(
+    start_line: Optional[int], end_line: Optional[int], offset: Optional[int], length: Optional[int]
+) -> Dict[str, Optional[int]]:
+    if (start_line is not None or end_line is not None) and (offset is not None or length is not None):
+        raise HTTPException(status_code=400, detail="Use either a line range or a byte range, not both.")
+    if end_line is not None and end_line < (start_line or 1):
+        raise HTTPException(status_code=400, detail="end_line is before start_line.")
+    return {"start_line": start_line, "end_line": end_line, "offset": offset, "length": length}
 
 
-def _should_skip(rel: Path, patterns: List[str]) -> bool:
-    if any(part.startswith(".") for part in rel.parts):
-        return True
-    return _matches_ignore(rel, patterns)
+def _not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches ``etag``: ``*`` matches whatever
+    currently exists, and weak tags compare equal to strong ones.
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
 
 
 def _load_events(project_id: str) -> List[Dict[str, object]]:
@@ -155,55 +171,177 @@ def update_notes(project_id: str, payload: NotesPayload):
     return {"notes": project.notes}
 
 
-@app.post("/api/projects/{project_id}/index")
-def index_project(project_id: str):
+@app.post("/api/projects/{project_id}/index", status_code=202)
+def index_project(project_id: str, full: bool = False):
     project = storage.get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return indexer.index_project(project)
+    return indexer.index_jobs.submit(project, force=full).as_dict()
 
 
-@app.get("/api/projects/{project_id}/tree")
-def get_tree(project_id: str):
+@app.get("/api/watchers")
+def list_watchers():
+    return indexer.list_watchers()
+
+
+@app.post("/api/projects/{project_id}/watcher/start")
+def start_watcher(project_id: str):
     project = storage.get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    root = Path(project.path)
-    tree = []
-    ignore_patterns = list(DEFAULT_IGNORE) + list(project.ignore or [])
-    for dirpath, dirnames, filenames in os.walk(root):
-        current_dir = Path(dirpath)
-        rel_dir = current_dir.relative_to(root)
-        if rel_dir != Path(".") and _should_skip(rel_dir, ignore_patterns):
-            dirnames[:] = []
-            continue
-        if rel_dir != Path("."):
-            tree.append({"path": str(rel_dir), "is_dir": True})
+    try:
+        return indexer.start_watcher(project)
+    except indexer.WatchLimitExceeded as exc:
+        raise HTTPException(status_code=409, detail={"code": "WATCH_LIMIT", "message": str(exc)})
+
+
+@app.post("/api/projects/{project_id}/watcher/stop")
+def stop_watcher(project_id: str):
+    if not storage.get_project(project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    indexer.stop_watcher(project_id)
+    return indexer.watcher_info(project_id)
+
+
+@app.post("/api/projects/{project_id}/index/migrate", status_code=202)
+def migrate_index(project_id: str):
+    project = storage.get_project(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return indexer.migration_jobs.submit(project).as_dict()
+
+
+@app.get("/api/projects/{project_id}/index/migrate")
+def list_migration_jobs(project_id: str):
+    if not storage.get_project(project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    return {"jobs": [job.as_dict() for job in indexer.migration_jobs.list(project_id)]}
+
+
+@app.get("/api/projects/{project_id}/index/jobs")
+def list_index_jobs(project_id: str):
+    if not storage.get_project(project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    return {"jobs": [job.as_dict() for job in indexer.index_jobs.list(project_id)]}
+
+
+@app.get("/api/projects/{project_id}/index/jobs/{job_id}")
+def get_index_job(project_id: str, job_id: str):
+    job = indexer.index_jobs.get(project_id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Index job not found")
+    return job.as_dict()
+
+
+@app.post("/api/projects/{project_id}/index/jobs/{job_id}/cancel")
+def cancel_index_job(project_id: str, job_id: str):
+    job = indexer.index_jobs.cancel(project_id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Index job not found")
+    return job.as_dict()
+
+
+@app.post("/api/index/warmup")
+def warmup_index():
+    return indexer.warm_up()
 
-        pruned = []
-        for dirname in dirnames:
-            rel = (current_dir / dirname).relative_to(root)
-            if _should_skip(rel, ignore_patterns):
-                continue
-            pruned.append(dirname)
-        dirnames[:] = pruned
 
-        for filename in filenames:
-            rel = (current_dir / filename).relative_to(root)
-            if _should_skip(rel, ignore_patterns):
-                continue
-            tree.append({"path": str(rel), "is_dir": False})
-    return {"tree": tree}
+@app.get("/api/index/embedding_cache")
+def embedding_cache_stats():
+    return indexer.embedding_cache_stats()
+
+
+@app.post("/api/projects/{project_id}/index/compact")
+def compact_index(project_id: str):
+    project = storage.get_project(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return indexer.compact_project(project)
+
+
+@app.get("/api/projects/{project_id}/tree")
+def get_tree(
+    project_id: str,
+    response: Response,
+    path: str = "",
+    max_depth: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    limit: int = Query(2000, ge=1, le=10000),
+    if_none_match: Optional[str] = Header(None),
+):
+    project = storage.get_project(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    indexer.touch_project(project)
+    subpath = ""
+    if path.strip("/\\"):
+        try:
+            subpath = policy_engine.normalize_relpath(path)
+        except PolicyViolation as exc:
+            _handle_policy_error(exc)
+    tree = project_tree.snapshot(project)
+    if subpath and not project_tree.is_directory(tree, subpath):
+        raise HTTPException(status_code=404, detail="Directory not found")
+    etag = project_tree.etag(tree, path=subpath, max_depth=max_depth, cursor=cursor, limit=limit)
+    if _not_modified(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return project_tree.list_page(tree, subpath, max_depth=max_depth, cursor=cursor, limit=limit)
 
 
 @app.get("/api/file")
-def get_file(path: str, project_id: str):
+def get_file(
+    path: str,
+    project_id: str,
+    response: Response,
+    start_line: Optional[int] = Query(None, ge=1),
+    end_line: Optional[int] = Query(None, ge=1),
+    offset: Optional[int] = Query(None, ge=0),
+    length: Optional[int] = Query(None, ge=0),
+    if_none_match: Optional[str] = Header(None),
+):
     project = storage.get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    _ensure_policy_path(project.id, project.path, path, op="read")
-    content = files.read_file(project.path, path)
-    return {"path": path, "content": content}
+    _ensure_policy_path(project, path, op="read")
+    params = _range_params(start_line, end_line, offset, length)
+    target = files.existing_file(project.path, path)
+    if if_none_match:
+        tag = files.file_etag(target.stat(), **params)
+        if _not_modified(if_none_match, tag):
+            return Response(status_code=304, headers={"ETag": tag})
+    result = files.read_range(target, **params)
+    response.headers["ETag"] = result.pop("etag")
+    return {"path": path, **result}
+
+
+def _read_one(project: Project, item: FileRead) -> Dict[str, object]:
+    try:
+        _ensure_policy_path(project, item.path, op="read")
+        params = _range_params(item.start_line, item.end_line, item.offset, item.length)
+        result = files.read_range(files.existing_file(project.path, item.path), **params)
+    except HTTPException as exc:
+        # One unreadable path should not sink the rest of the batch.
+        return {"path": item.path, "status_code": exc.status_code, "error": exc.detail}
+    except FileNotFoundError:
+        # Deleted between the existence check and the read.
+        return {"path": item.path, "status_code": 404, "error": "File not found."}
+    except OSError as exc:
+        status = 403 if isinstance(exc, PermissionError) else 500
+        return {"path": item.path, "status_code": status, "error": exc.strerror or str(exc)}
+    return {"path": item.path, **result}
+
+
+@app.post("/api/files/read_many")
+def read_many(payload: ReadManyRequest, project_id: str = Query(...)):
+    # One project lookup, then the files read concurrently; results keep request order.
+    limit = get_settings().read_many_max_files
+    if len(payload.files) > limit:
+        raise HTTPException(status_code=400, detail=f"At most {limit} files per request.")
+    project = storage.get_project(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return {"files": list(_read_pool.map(lambda item: _read_one(project, item), payload.files))}
 
 
 @app.post("/api/file/save")
@@ -211,7 +349,7 @@ def save_file(payload: FilePayload, project_id: str):
     project = storage.get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    _ensure_policy_path(project.id, project.path, payload.path, op="write")
+    _ensure_policy_path(project, payload.path, op="write")
     _ensure_write_size(project.id, payload.path, payload.content)
     files.write_file(project.path, payload.path, payload.content)
     byte_len = len(payload.content.encode("utf-8", errors="ignore"))
@@ -224,7 +362,7 @@ async def upload_file(project_id: str, path: str = Form(...), file: UploadFile =
     project = storage.get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    _ensure_policy_path(project.id, project.path, path, op="write")
+    _ensure_policy_path(project, path, op="write")
     await files.write_upload(project.path, path, file)
     event_log.append(project.id, "file_uploaded", {"path": path, "filename": file.filename})
     return {"status": "saved"}
@@ -234,7 +372,7 @@ def _apply_patch_for_project(project_id: str, payload: PatchPayload) -> Dict[str
     project = storage.get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    _ensure_policy_path(project.id, project.path, payload.path, op="write")
+    _ensure_policy_path(project, payload.path, op="write")
     _ensure_write_size(project.id, payload.path, payload.patch)
     files.apply_patch(project.path, payload.path, payload.patch)
     event_log.append(project.id, "patch_applied", {"path": payload.path})
@@ -256,10 +394,35 @@ def search(req: SearchRequest):
     project = storage.get_project(req.project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    results = indexer.search_chunks(project.id, req.query, k=req.k)
+    indexer.touch_project(project)
+    results = indexer.search_chunks(
+        project.id,
+        req.query,
+        k=req.k,
+        mode=req.mode,
+        paths=req.paths,
+        extensions=req.extensions,
+        modified_after=req.modified_after,
+    )
     return SearchResponse(results=results)
 
 
+@app.post("/api/search/batch", response_model=BatchSearchResponse)
+def search_batch(req: BatchSearchRequest):
+    for project_id in {item.project_id for item in req.queries}:
+        project = storage.get_project(project_id)
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        indexer.touch_project(project)
+    results = indexer.search_many([item.model_dump() for item in req.queries])
+    return BatchSearchResponse(results=[SearchResponse(results=hits) for hits in results])
+
+
+@app.get("/api/search/cache")
+def search_cache_stats():
+    return indexer.search_cache_stats()
+
+
 @app.get("/api/packs")
 def list_packs():
     return {"packs": [pack.__dict__ for pack in pack_registry.list()]}
@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import Optional
 
 from .config import get_settings, DEFAULT_IGNORE
+from .ignore import compile_ignore
 
 
 @dataclass(frozen=True)
@@ -56,14 +57,14 @@ class PolicyEngine:
                 hint="Only files under the selected project root are allowed.",
             )
 
-        ignore = set(DEFAULT_IGNORE) | set(self.settings.default_ignore)
+        hard = sorted(set(DEFAULT_IGNORE) | set(self.settings.default_ignore))
         parts = Path(rel).parts
 
-        if any(part in ignore for part in parts):
+        if compile_ignore(hard).ignored(rel):
             raise PolicyViolation(
                 code="IGNORED_PATH",
                 message=f"Path is ignored by policy: {rel!r}",
-                hint=f"Move the file outside ignored directories: {sorted(ignore)}",
+                hint=f"Move the file outside ignored directories: {hard}",
             )
 
         if any(part.startswith(".") and part not in (".",) for part in parts):
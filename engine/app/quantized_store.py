@@ -0,0 +1,418 @@
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .paths import data_root
+from .sqlite_db import batched, connect
+
+PRECISIONS = ("int8", "float16", "float32")
+_CODE_DTYPES = {"int8": np.int8, "float16": np.float16, "float32": np.float32}
+# Dtype of the on-disk copy candidates are re-ranked on; float16 codes are re-ranked on themselves.
+_COPY_DTYPES = {"int8": np.float16, "float16": None, "float32": np.float32}
+# Rows scored per step of the quantized scan; bounds the float32 scratch space a query needs.
+_SCAN_BLOCK = 16_384
+# Metadata fields that are the same for every chunk of a file; ``dir_<n>`` fields are too.
+_PATH_FIELDS = frozenset({"file_path", "ext"})
+_VALID_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{1,510}[A-Za-z0-9]$")
+
+
+def quantize(vectors: np.ndarray, precision: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Compress float32 rows to ``precision``.
+
+    int8 uses symmetric per-row scaling (``row ~= codes * scale``); float16 and
+    float32 are plain casts with a scale of 1.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if precision in ("float16", "float32"):
+        return vectors.astype(_CODE_DTYPES[precision]), np.ones(len(vectors), dtype=np.float32)
+    if precision != "int8":
+        raise ValueError(f"Unsupported precision {precision!r}; expected one of {PRECISIONS}")
+    peak = np.abs(vectors).max(axis=1)
+    scales = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+class QuantizedCollection:
+    """
+    Vector collection that keeps only compressed embeddings in memory.
+
+    Rows persist in one SQLite file per collection, holding the quantized
+    code, a copy to re-rank on, the document and its metadata. With int8,
+    queries scan the in-memory codes for ``rerank_factor * n_results``
+    candidates, then re-rank those on float16 copies read back from disk, so
+    resident memory is 1/4 of a float32 index and disk use 3/4. float16 codes
+    are close enough to rank on directly, so no copy is stored and nothing is
+    re-ranked; with float32 the scan is exact, the copy is the vector and the
+    code column is left empty. Distances are squared L2, matching Chroma's
+    default space. Mirrors the subset of the Chroma collection API the
+    indexer uses.
+    """
+
+    def __init__(self, path: Path, name: str, precision: str, rerank_factor: int = 4) -> None:
+        self.path = path
+        self.name = name
+        self.precision = precision
+        self.rerank_factor = max(rerank_factor, 1) if precision == "int8" else 1
+        self._lock = threading.RLock()
+        self._conn: sqlite3.Connection | None = None
+        self._loaded = False
+        self._size = 0
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        # Rows refer to distinct files by code; filters on file-level fields are evaluated once per file.
+        self._path_codes = np.zeros(0, dtype=np.int32)
+        self._path_index: Dict[str, int] = {}
+        self._path_fields: List[Dict[str, Any]] = []
+        self._codes = np.zeros((0, 0), dtype=self._code_dtype)
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._modified = np.zeros(0, dtype=np.float64)
+
+    @property
+    def _code_dtype(self):
+        return _CODE_DTYPES[self.precision]
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        row = self._connect().execute("SELECT value FROM settings WHERE key = 'metadata'").fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # Rows are 0.8-1.5 KB at typical dimensions; 4 KB pages would fit only a few each.
+            conn = connect(self.path, page_size=16384)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors ("
+                " id TEXT PRIMARY KEY, code BLOB NOT NULL, scale REAL NOT NULL, full BLOB NOT NULL,"
+                " document TEXT, metadata TEXT)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn = conn
+        return self._conn
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        conn = self._connect()
+        (total,) = conn.execute("SELECT COUNT(*) FROM vectors").fetchone()
+        for chunk_id, code, scale, full, metadata in conn.execute(
+            "SELECT id, code, scale, full, metadata FROM vectors"
+        ):
+            vector = self._vector(code, scale, full)
+            self._reserve(total, len(vector))
+            codes = np.frombuffer(code, dtype=self._code_dtype) if code else vector
+            self._append(chunk_id, codes, scale, vector, json.loads(metadata or "{}"))
+        self._loaded = True
+
+    def _vector(self, code: bytes, scale: float, full: bytes) -> np.ndarray:
+        """A row as float32: its stored copy if it has one, else its decoded code."""
+        if not full:
+            return np.frombuffer(code, dtype=self._code_dtype).astype(np.float32) * np.float32(scale)
+        if not code:
+            return np.frombuffer(full, dtype=np.float32)
+        # Files written before copies were float16 hold float32 ones; the copy has as many values as the code.
+        dim = len(code) // np.dtype(self._code_dtype).itemsize
+        return np.frombuffer(full, dtype=np.float32 if len(full) == 4 * dim else np.float16).astype(np.float32)
+
+    def _reserve(self, needed: int, dim: int) -> None:
+        """Grow the in-memory arrays geometrically so appends stay amortised O(1)."""
+        capacity = len(self._scales)
+        if self._size and self._codes.shape[1] != dim:
+            raise ValueError(f"Embedding dimension {dim} does not match collection dimensionality {self._codes.shape[1]}")
+        if needed <= capacity and self._codes.shape[1] == dim:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+        codes = np.zeros((capacity, dim), dtype=self._code_dtype)
+        if self._size:
+            codes[: self._size] = self._codes[: self._size]
+        self._codes = codes
+        for attr in ("_scales", "_norms", "_modified", "_path_codes"):
+            old = getattr(self, attr)
+            grown = np.zeros(capacity, dtype=old.dtype)
+            grown[: self._size] = old[: self._size]
+            setattr(self, attr, grown)
+
+    def _append(self, chunk_id: str, code: np.ndarray, scale: float, full: np.ndarray, meta: Dict[str, Any]) -> None:
+        row = self._rows.get(chunk_id)
+        if row is None:
+            row = self._size
+            self._size += 1
+            self._rows[chunk_id] = row
+            self._ids.append(chunk_id)
+        self._codes[row] = code
+        self._scales[row] = scale
+        self._norms[row] = float(np.dot(full, full))
+        self._path_codes[row] = self._path_code(meta)
+        self._modified[row] = meta.get("modified") or 0.0
+
+    def _path_code(self, meta: Dict[str, Any]) -> int:
+        path = meta.get("file_path", "")
+        code = self._path_index.get(path)
+        if code is None:
+            code = self._path_index[path] = len(self._path_fields)
+            self._path_fields.append(
+                {key: value for key, value in meta.items() if key in _PATH_FIELDS or key.startswith("dir_")}
+            )
+        return code
+
+    def count(self) -> int:
+        with self._lock:
+            self._load()
+            return self._size
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Any,
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> None:
+        if not len(ids):
+            return
+        full = np.ascontiguousarray(embeddings, dtype=np.float32)
+        codes, scales = quantize(full, self.precision)
+        blobs = [b""] * len(ids) if self.precision == "float32" else [code.tobytes() for code in codes]
+        copy_dtype = _COPY_DTYPES[self.precision]
+        copies = [b""] * len(ids) if copy_dtype is None else [row.tobytes() for row in full.astype(copy_dtype)]
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [{}] * len(ids)
+        with self._lock:
+            self._load()
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO vectors (id, code, scale, full, document, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (cid, blobs[i], float(scales[i]), copies[i], documents[i], json.dumps(metadatas[i]))
+                    for i, cid in enumerate(ids)
+                ],
+            )
+            conn.commit()
+            self._reserve(self._size + len(ids), full.shape[1])
+            for i, chunk_id in enumerate(ids):
+                self._append(chunk_id, codes[i], float(scales[i]), full[i], metadatas[i])
+
+    def delete(self, ids: Sequence[str]) -> None:
+        if not len(ids):
+            return
+        with self._lock:
+            self._load()
+            conn = self._connect()
+            for batch in batched(ids):
+                conn.execute(f"DELETE FROM vectors WHERE id IN ({','.join('?' * len(batch))})", batch)
+            conn.commit()
+            for chunk_id in dict.fromkeys(ids):
+                row = self._rows.pop(chunk_id, None)
+                if row is None:
+                    continue
+                # Move the last row into the hole instead of shifting everything after it.
+                last = self._size - 1
+                if row != last:
+                    moved = self._ids[last]
+                    self._ids[row] = moved
+                    self._rows[moved] = row
+                    for attr in ("_codes", "_scales", "_norms", "_modified", "_path_codes"):
+                        array = getattr(self, attr)
+                        array[row] = array[last]
+                self._ids.pop()
+                self._size -= 1
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        include: Sequence[str] = ("documents", "metadatas"),
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        with self._lock:
+            self._load()
+            if ids is None:
+                start = offset or 0
+                selected = self._ids[start : None if limit is None else start + limit]
+            else:
+                selected = [chunk_id for chunk_id in ids if chunk_id in self._rows]
+            rows = self._fetch(selected)
+        result: Dict[str, Any] = {"ids": [row[0] for row in rows]}
+        if "documents" in include:
+            result["documents"] = [row[1] for row in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [json.loads(row[2]) if row[2] else {} for row in rows]
+        if "embeddings" in include:
+            result["embeddings"] = [self._vector(*row[3:]) for row in rows]
+        return result
+
+    def _fetch(self, ids: Sequence[str]) -> List[tuple]:
+        found: Dict[str, tuple] = {}
+        conn = self._connect()
+        for batch in batched(ids):
+            placeholders = ",".join("?" * len(batch))
+            for row in conn.execute(
+                f"SELECT id, document, metadata, code, scale, full FROM vectors WHERE id IN ({placeholders})", batch
+            ):
+                found[row[0]] = row
+        return [found[chunk_id] for chunk_id in ids if chunk_id in found]
+
+    def query(
+        self, query_embeddings: Any, n_results: int = 10, where: Optional[Dict[str, Any]] = None, **_: Any
+    ) -> Dict[str, List[List[Any]]]:
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        out: Dict[str, List[List[Any]]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            self._load()
+            mask = self._mask(where) if where else None
+            candidates = [self._scan(q, n_results * self.rerank_factor, mask) for q in queries]
+            rows = {row[0]: row for row in self._fetch(list({c for rows in candidates for c in rows}))}
+        vectors = {chunk_id: self._vector(*row[3:]) for chunk_id, row in rows.items()}
+        for q, ids in zip(queries, candidates):
+            # Re-rank the shortlist on the stored copies (exact distances when there is no shortlist).
+            scored = []
+            for chunk_id in ids:
+                if chunk_id in vectors:
+                    scored.append((float(np.sum((vectors[chunk_id] - q) ** 2)), chunk_id))
+            scored.sort()
+            top = scored[:n_results]
+            out["ids"].append([chunk_id for _, chunk_id in top])
+            out["documents"].append([rows[chunk_id][1] for _, chunk_id in top])
+            out["metadatas"].append([json.loads(rows[chunk_id][2] or "{}") for _, chunk_id in top])
+            out["distances"].append([distance for distance, _ in top])
+        return out
+
+    def _scan(self, query: np.ndarray, n: int, mask: Optional[np.ndarray]) -> List[str]:
+        total = self._size
+        if total == 0 or n <= 0:
+            return []
+        best_rows = np.empty(0, dtype=np.int64)
+        best_dist = np.empty(0, dtype=np.float32)
+        q_norm = float(np.dot(query, query))
+        for start in range(0, total, _SCAN_BLOCK):
+            end = min(start + _SCAN_BLOCK, total)
+            dots = (self._codes[start:end].astype(np.float32) @ query) * self._scales[start:end]
+            dist = self._norms[start:end] - 2.0 * dots + q_norm
+            if mask is not None:
+                dist = np.where(mask[start:end], dist, np.inf)
+            rows = np.arange(start, end)
+            best_rows = np.concatenate([best_rows, rows])
+            best_dist = np.concatenate([best_dist, dist])
+            if len(best_dist) > n:
+                keep = np.argpartition(best_dist, n - 1)[:n]
+                best_rows, best_dist = best_rows[keep], best_dist[keep]
+        order = np.argsort(best_dist)
+        return [self._ids[best_rows[i]] for i in order if np.isfinite(best_dist[i])]
+
+    def _mask(self, where: Dict[str, Any]) -> np.ndarray:
+        """Evaluate the ``where`` subset the indexer produces: $and, $or, $in, $eq and numeric $gt/$gte/$lt/$lte."""
+        if "$and" in where:
+            mask = np.ones(self._size, dtype=bool)
+            for clause in where["$and"]:
+                mask &= self._mask(clause)
+            return mask
+        if "$or" in where:
+            mask = np.zeros(self._size, dtype=bool)
+            for clause in where["$or"]:
+                mask |= self._mask(clause)
+            return mask
+        ((field, condition),) = where.items()
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        ((op, value),) = condition.items()
+        if (field in _PATH_FIELDS or field.startswith("dir_")) and op in ("$in", "$eq"):
+            wanted = set(value) if op == "$in" else {value}
+            matches = np.fromiter(
+                (fields.get(field) in wanted for fields in self._path_fields), dtype=bool, count=len(self._path_fields)
+            )
+            return matches[self._path_codes[: self._size]]
+        if field == "modified":
+            compare = {"$gt": np.greater, "$gte": np.greater_equal, "$lt": np.less, "$lte": np.less_equal}
+            if op in compare:
+                return compare[op](self._modified[: self._size], value)
+        raise ValueError(f"Unsupported filter for quantized storage: {where!r}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class QuantizedClient:
+    """
+    Drop-in for the Chroma client backing the "numpy" (float32), "int8" and
+    "float16" vector stores.
+
+    Each collection is <DATA_ROOT>/vectors/<precision>/<name>.sqlite3.
+    """
+
+    def __init__(self, precision: str, root: Optional[Path] = None, rerank_factor: int = 4) -> None:
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision {precision!r}; expected one of {PRECISIONS}")
+        self.precision = precision
+        self.rerank_factor = rerank_factor
+        self.root = root or data_root() / "vectors" / precision
+        self._collections: Dict[str, QuantizedCollection] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> Path:
+        if not _VALID_NAME.match(name):
+            raise ValueError(f"Invalid collection name {name!r}")
+        return self.root / f"{name}.sqlite3"
+
+    def _open(self, name: str) -> QuantizedCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = QuantizedCollection(self._path(name), name, self.precision, self.rerank_factor)
+            self._collections[name] = collection
+        return collection
+
+    def get_collection(self, name: str) -> QuantizedCollection:
+        with self._lock:
+            if name not in self._collections and not self._path(name).exists():
+                raise ValueError(f"Collection {name} does not exist")
+            return self._open(name)
+
+    def create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> QuantizedCollection:
+        with self._lock:
+            if name in self._collections or self._path(name).exists():
+                raise ValueError(f"Collection {name} already exists")
+            collection = self._open(name)
+        self._write_metadata(collection, metadata)
+        return collection
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> QuantizedCollection:
+        with self._lock:
+            existed = name in self._collections or self._path(name).exists()
+            collection = self._open(name)
+        if not existed:
+            self._write_metadata(collection, metadata)
+        return collection
+
+    @staticmethod
+    def _write_metadata(collection: QuantizedCollection, metadata: Optional[Dict[str, Any]]) -> None:
+        conn = collection._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES ('metadata', ?)", (json.dumps(metadata or {}),)
+        )
+        conn.commit()
+
+    def delete_collection(self, name: str) -> None:
+        with self._lock:
+            collection = self._collections.pop(name, None)
+            path = self._path(name)
+            if collection is None and not path.exists():
+                raise ValueError(f"Collection {name} does not exist")
+            if collection is not None:
+                collection.close()
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+    def list_collections(self) -> List[QuantizedCollection]:
+        names = {path.name[: -len(".sqlite3")] for path in self.root.glob("*.sqlite3")} if self.root.exists() else set()
+        with self._lock:
+            return [self._open(name) for name in sorted(names | set(self._collections))]
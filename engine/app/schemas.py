@@ -1,4 +1,4 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
 from pydantic import BaseModel, Field
 
 from .config import DEFAULT_IGNORE
@@ -12,12 +12,16 @@ class Project(BaseModel):
     created_at: Optional[str] = None
     notes: List[str] = Field(default_factory=list)
     packs: List[str] = Field(default_factory=list)
+    # How files are enumerated: walk the disk; walk honouring .gitignore files;
+    # or list the files tracked in .git/index (falling back to "gitignore").
+    file_source: Literal["walk", "gitignore", "git"] = "walk"
 
 
 class ProjectCreate(BaseModel):
     name: str
     path: str
     ignore: List[str] = Field(default_factory=list)
+    file_source: Literal["walk", "gitignore", "git"] = "walk"
 
 
 class PackInstallPayload(BaseModel):
@@ -33,22 +37,52 @@ class SearchRequest(BaseModel):
     project_id: str
     query: str
     k: int = 12
+    # vector: embedding similarity; lexical: BM25 keyword/identifier match; hybrid: both, rank-fused.
+    mode: Literal["vector", "lexical", "hybrid"] = "vector"
+    # Optional narrowing, applied inside the indexes: project-relative path prefixes or globs,
+    # file extensions, and a Unix timestamp the file must have been modified after.
+    paths: List[str] = Field(default_factory=list)
+    extensions: List[str] = Field(default_factory=list)
+    modified_after: Optional[float] = None
 
 
 class SearchResult(BaseModel):
     text: str
     meta: Dict[str, Any] = Field(default_factory=dict)
+    score: Optional[float] = None
 
 
 class SearchResponse(BaseModel):
     results: List[SearchResult] = Field(default_factory=list)
 
 
+class BatchSearchRequest(BaseModel):
+    queries: List[SearchRequest] = Field(default_factory=list)
+
+
+class BatchSearchResponse(BaseModel):
+    # One entry per query, in request order.
+    results: List[SearchResponse] = Field(default_factory=list)
+
+
 class FilePayload(BaseModel):
     path: str
     content: str
 
 
+class FileRead(BaseModel):
+    path: str
+    # Optional range, as for GET /api/file: 1-based inclusive lines, or a byte window.
+    start_line: Optional[int] = Field(None, ge=1)
+    end_line: Optional[int] = Field(None, ge=1)
+    offset: Optional[int] = Field(None, ge=0)
+    length: Optional[int] = Field(None, ge=0)
+
+
+class ReadManyRequest(BaseModel):
+    files: List[FileRead] = Field(default_factory=list)
+
+
 class PatchPayload(BaseModel):
     path: str
     patch: str
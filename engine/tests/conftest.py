@@ -3,6 +3,53 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
+import numpy as np
+import pytest
+
 REPO_ROOT = Path(__file__).resolve().parents[2]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
+
+
+def _fake_embed(texts, model=None):
+    return np.asarray([[float(len(text)), 1.0, 0.0] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def isolated_indexer(tmp_path: Path, monkeypatch):
+    """
+    The indexer with every store under ``tmp_path``, an in-memory Chroma client and a fake 3-d embedder.
+
+    Returns the list of texts the fake embedder has been asked to encode.
+    """
+    import chromadb
+
+    from engine.app import index_manifest, indexer, lexical_index
+    from engine.app.collection_registry import CollectionRegistry
+    from engine.app.embedding_cache import EmbeddingCache
+    from engine.app.index_status import IndexStatusStore
+    from engine.app.search_cache import LRUCache
+
+    embedded = []
+
+    def recording_embed(texts, model=None):
+        embedded.extend(texts)
+        return _fake_embed(texts)
+
+    monkeypatch.setattr(index_manifest, "data_root", lambda: tmp_path / "data")
+    monkeypatch.setattr(lexical_index, "data_root", lambda: tmp_path / "data")
+    monkeypatch.setattr(indexer, "_lexical_indexes", {})
+    monkeypatch.setattr(indexer, "data_root", lambda: tmp_path / "data")
+    monkeypatch.setattr(indexer, "_clients", {"chroma": chromadb.EphemeralClient()})
+    monkeypatch.setattr(indexer, "_no_legacy", set())
+    monkeypatch.setattr(indexer._settings, "vector_storage", "chroma")
+    monkeypatch.setattr(indexer._settings, "vector_storage_projects", {})
+    monkeypatch.setattr(indexer, "_embedding_cache", EmbeddingCache(root=tmp_path / "cache"))
+    monkeypatch.setattr(indexer, "_embed", recording_embed)
+    monkeypatch.setattr(indexer, "_start_watcher", lambda project: None)
+    monkeypatch.setattr(indexer, "_query_embeddings", LRUCache(64))
+    monkeypatch.setattr(indexer, "_search_results", LRUCache(64))
+    monkeypatch.setattr(indexer, "_status_store", IndexStatusStore(root=tmp_path / "data"))
+    monkeypatch.setattr(indexer, "_collections", CollectionRegistry(root=tmp_path / "data"))
+    monkeypatch.setattr(indexer, "_embedding_dims", {indexer._embedder_model_name: 3})
+    return embedded
@@ -0,0 +1,101 @@
+from engine.app.chunking import brace_chunks, chunk_text, line_chunks, markdown_chunks, python_chunks
+
+
+def _function(name: str, body_lines: int) -> str:
+    body = "\n".join(f"    value_{i} = {i}  # {'pad' * 5}" for i in range(body_lines))
+    return f"def {name}():\n{body}\n    return value_0\n"
+
+
+def test_python_chunks_follow_definitions() -> None:
+    source = "import os\n\n\n" + "\n\n".join(_function(f"fn_{i}", 12) for i in range(6))
+
+    chunks = list(python_chunks(source, max_chars=1200))
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk["text"]) <= 1200
+        # Every chunk starts at a definition boundary (or the module header), never mid-body.
+        first = chunk["text"].lstrip("\n").splitlines()[0]
+        assert first.startswith(("def ", "import "))
+    symbols = [name for chunk in chunks for name in chunk["symbols"]]
+    assert symbols == [f"fn_{i}" for i in range(6)]
+
+
+def test_chunks_fill_the_budget_and_cover_every_line() -> None:
+    # Functions of ~0.6 budget each: closing a chunk whenever the next unit does not fit leaves them ~60% full.
+    source = "\n\n".join(_function(f"fn_{i}", 16) for i in range(20))
+    lines = source.splitlines()
+
+    chunks = list(python_chunks(source, max_chars=1200))
+
+    assert all(len(chunk["text"]) <= 1200 for chunk in chunks)
+    assert sum(len(chunk["text"]) for chunk in chunks) / len(chunks) > 0.8 * 1200
+    covered = {line for chunk in chunks for line in range(chunk["start"], chunk["end"] + 1)}
+    assert covered == set(range(1, len(lines) + 1))
+    for chunk in chunks:
+        assert chunk["text"] == "\n".join(lines[chunk["start"] - 1 : chunk["end"]])
+
+
+def test_python_large_class_is_split_per_method() -> None:
+    methods = "\n".join("    " + line for line in "".join(_function(f"m{i}", 15) for i in range(4)).splitlines())
+    source = f"class Service:\n    '''Doc.'''\n\n{methods}\n"
+
+    chunks = list(python_chunks(source, max_chars=800))
+
+    symbols = {name for chunk in chunks for name in chunk["symbols"]}
+    assert {"Service", "Service.m0", "Service.m3"} <= symbols
+    assert all(len(chunk["text"]) <= 800 for chunk in chunks)
+
+
+def test_python_syntax_error_falls_back_to_lines() -> None:
+    chunks = list(python_chunks("def broken(:\n    pass\n", max_chars=100))
+    assert chunks[0]["start"] == 1
+
+
+def test_line_chunks_overlap_is_bounded_and_covers_every_line() -> None:
+    text = "\n".join(f"{i:04d} " + "y" * (i % 50) for i in range(300))
+
+    chunks = list(line_chunks(text, max_chars=500, overlap=120))
+
+    assert chunks[0]["start"] == 1
+    assert chunks[-1]["end"] == 300
+    for previous, current in zip(chunks, chunks[1:]):
+        assert len(current["text"]) <= 500
+        assert current["start"] <= previous["end"] + 1
+        repeated = "\n".join(text.splitlines()[current["start"] - 1 : previous["end"]])
+        assert len(repeated) <= 120
+
+
+def test_line_chunks_split_huge_lines() -> None:
+    chunks = list(line_chunks("short\n" + "z" * 2500 + "\nafter", max_chars=1000))
+    assert max(len(chunk["text"]) for chunk in chunks) <= 1000
+    assert chunks[-1]["text"] == "after"
+
+
+def test_brace_chunks_record_top_level_symbols() -> None:
+    source = (
+        "import { x } from './x';\n\n"
+        "export function handler(req) {\n  if (req) {\n    return x;\n  }\n}\n\n"
+        "export class Store {\n  get() { return 1; }\n}\n\n"
+        "func (s *Server) Serve() {\n}\n"
+    )
+
+    chunks = list(brace_chunks(source, max_chars=70))
+
+    # A unit split to fill a chunk names its symbols in both halves.
+    symbols = [name for chunk in chunks for name in chunk["symbols"]]
+    assert list(dict.fromkeys(symbols)) == ["handler", "Store", "Serve"]
+    handler = [chunk for chunk in chunks if "handler" in chunk["symbols"]][-1]
+    assert handler["text"].rstrip().endswith("}")
+
+
+def test_markdown_chunks_by_heading() -> None:
+    source = "# Intro\n" + "text\n" * 5 + "```\n# not a heading\n```\n## Usage\n" + "more\n" * 5
+    chunks = list(markdown_chunks(source, max_chars=60))
+    assert [chunk["symbols"] for chunk in chunks] == [["Intro"], ["Usage"]]
+
+
+def test_lines_strategy_ignores_syntax() -> None:
+    source = _function("fn", 3)
+    chunks = list(chunk_text(source, ".py", strategy="lines"))
+    assert chunks[0]["symbols"] == []
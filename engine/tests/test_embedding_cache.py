@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import numpy as np
+
+from engine.app.embedding_cache import EmbeddingCache
+
+
+def test_cache_round_trips_vectors_per_model(tmp_path: Path) -> None:
+    cache = EmbeddingCache(root=tmp_path)
+    key = EmbeddingCache.key("def main(): pass")
+    cache.put_many("model-a", {key: [0.5, -0.25, 1.0]})
+
+    cached = cache.get_many("model-a", [key])
+    assert cached[key].dtype == np.float32
+    assert cached[key].tolist() == [0.5, -0.25, 1.0]
+    assert cache.get_many("model-b", [key]) == {}
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = EmbeddingCache(root=tmp_path, max_entries=3)
+    keys = [EmbeddingCache.key(str(i)) for i in range(3)]
+    cache.put_many("m", {key: [float(i)] for i, key in enumerate(keys)})
+    cache.get_many("m", [keys[0]])
+
+    cache.put_many("m", {EmbeddingCache.key("new"): [9.0]})
+
+    assert keys[0] in cache.get_many("m", [keys[0]])
+    assert cache.stats()["entries"] <= 3
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_disabled_cache_never_stores(tmp_path: Path) -> None:
+    cache = EmbeddingCache(root=tmp_path, max_entries=0)
+    key = EmbeddingCache.key("x")
+    cache.put_many("m", {key: [1.0]})
+    assert cache.get_many("m", [key]) == {}
+    assert not (tmp_path / "embedding_cache.sqlite3").exists()
+
+
+def test_lookups_larger_than_one_sql_batch(tmp_path: Path) -> None:
+    cache = EmbeddingCache(root=tmp_path)
+    keys = [EmbeddingCache.key(str(i)) for i in range(1200)]
+    cache.put_many("m", {key: [float(i)] for i, key in enumerate(keys)})
+
+    cached = cache.get_many("m", keys + [EmbeddingCache.key("missing")])
+
+    assert len(cached) == 1200
+    assert cached[keys[1100]].tolist() == [1100.0]
@@ -1,9 +1,12 @@
+import os
 from pathlib import Path
 
 import pytest
 from fastapi import HTTPException
+from fastapi.testclient import TestClient
 
-from engine.app import files
+from engine.app import files, main, storage
+from engine.app.schemas import Project
 
 
 def test_resolve_path_blocks_traversal(tmp_path: Path) -> None:
@@ -66,3 +69,123 @@ def test_apply_patch_rejects_context_mismatch(tmp_path: Path) -> None:
         files.apply_patch(str(project_root), "hello.txt", bad_patch)
 
     assert excinfo.value.status_code == 409
+
+
+def test_read_range_by_lines_and_bytes(tmp_path: Path) -> None:
+    target = tmp_path / "gen.py"
+    target.write_text("".join(f"line {i}\n" for i in range(1, 101)))
+
+    part = files.read_range(target, start_line=20, end_line=22)
+    assert part["content"] == "line 20\nline 21\nline 22\n"
+    assert (part["start_line"], part["end_line"], part["total_lines"]) == (20, 22, 100)
+    assert files.read_range(target, start_line=99)["content"] == "line 99\nline 100\n"
+    clamped = files.read_range(target, start_line=100, end_line=160)
+    assert (clamped["content"], clamped["end_line"]) == ("line 100\n", 100)
+    with pytest.raises(HTTPException) as excinfo:
+        files.read_range(target, start_line=101, end_line=160)
+    assert excinfo.value.status_code == 416
+    assert files.read_range(target, offset=7, length=7)["content"] == "line 2\n"
+    assert files.read_range(target)["content"] == target.read_text()
+
+
+def test_read_range_handles_empty_unterminated_and_binary_files(tmp_path: Path) -> None:
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    tail = tmp_path / "tail.txt"
+    tail.write_bytes(b"a\nb")
+    binary = tmp_path / "blob.bin"
+    binary.write_bytes(b"ok\xff\xfe\n")
+
+    assert files.read_range(empty, start_line=1)["total_lines"] == 0
+    with pytest.raises(HTTPException):
+        files.read_range(empty, start_line=2)
+    assert files.read_range(empty)["content"] == ""
+    assert files.read_range(tail, start_line=2)["content"] == "b"
+    assert files.read_range(tail, start_line=1)["total_lines"] == 2
+    assert files.read_file(str(tmp_path), "blob.bin") == "ok\n"
+
+
+def test_read_range_reindexes_a_changed_file(tmp_path: Path) -> None:
+    target = tmp_path / "a.txt"
+    target.write_text("one\ntwo\n")
+    before = files.read_range(target, start_line=2)
+
+    target.write_text("one\nthree\nfour\n")
+    os.utime(target, ns=(1, 1))
+    after = files.read_range(target, start_line=2)
+
+    assert before["content"] == "two\n"
+    assert after["content"] == "three\nfour\n"
+    assert after["etag"] != before["etag"]
+
+
+def test_file_route_serves_ranges_and_304s(tmp_path: Path, monkeypatch) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "big.py").write_text("".join(f"x{i}\n" for i in range(1, 1001)))
+    project = Project(id="files", name="Files", path=str(root))
+    monkeypatch.setattr(storage, "get_project", lambda project_id: project if project_id == project.id else None)
+    client = TestClient(main.app)
+    params = {"project_id": project.id, "path": "big.py", "start_line": 200, "end_line": 201}
+
+    res = client.get("/api/file", params=params)
+    assert res.status_code == 200
+    assert res.json()["content"] == "x200\nx201\n"
+    assert res.json()["total_lines"] == 1000
+
+    again = client.get("/api/file", params=params, headers={"If-None-Match": res.headers["etag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+    other = client.get("/api/file", params={**params, "end_line": 202}, headers={"If-None-Match": res.headers["etag"]})
+    assert other.status_code == 200
+    assert client.get("/api/file", params=params, headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get("/api/file", params=params, headers={"If-None-Match": '"other", *'}).status_code == 304
+    assert client.get("/api/file", params={**params, "offset": 0}).status_code == 400
+    assert client.get("/api/file", params={**params, "end_line": 199}).status_code == 400
+    assert client.get("/api/file", params={**params, "start_line": 1001, "end_line": 1002}).status_code == 416
+    assert client.get("/api/file", params={"project_id": project.id, "path": "big.py"}).json()["content"].count("\n") == 1000
+
+
+def test_read_many_resolves_the_project_once_and_keeps_order(tmp_path: Path, monkeypatch) -> None:
+    root = tmp_path / "project"
+    (root / "src").mkdir(parents=True)
+    for i in range(5):
+        (root / "src" / f"m{i}.py").write_text(f"first {i}\nsecond {i}\n")
+    project = Project(id="many", name="Many", path=str(root))
+    lookups = []
+    monkeypatch.setattr(storage, "get_project", lambda project_id: lookups.append(project_id) or project)
+    (root / "src" / "locked.py").write_text("secret\n")
+    real_read_range = files.read_range
+
+    def read_range(path, **params):
+        # Stands in for a file whose permissions deny reading (root would read it anyway).
+        if path.name == "locked.py":
+            raise PermissionError(13, "Permission denied", str(path))
+        return real_read_range(path, **params)
+
+    monkeypatch.setattr(files, "read_range", read_range)
+    client = TestClient(main.app)
+    items = [{"path": f"src/m{i}.py"} for i in range(5)]
+    items += [{"path": "src/m3.py", "start_line": 2}, {"path": "missing.py"}, {"path": "../escape.py"}]
+    items += [{"path": "src/locked.py"}]
+
+    res = client.post("/api/files/read_many", params={"project_id": project.id}, json={"files": items})
+
+    assert res.status_code == 200
+    results = res.json()["files"]
+    assert [r["path"] for r in results] == [item["path"] for item in items]
+    assert [r["content"] for r in results[:5]] == [f"first {i}\nsecond {i}\n" for i in range(5)]
+    assert results[5]["content"] == "second 3\n"
+    assert results[6]["status_code"] == 404
+    assert results[7]["status_code"] == 400
+    assert results[8]["status_code"] == 403
+    assert lookups == [project.id]
+
+
+def test_read_many_rejects_oversized_batches(monkeypatch) -> None:
+    monkeypatch.setattr(main.get_settings(), "read_many_max_files", 2)
+    client = TestClient(main.app)
+
+    res = client.post("/api/files/read_many", params={"project_id": "any"}, json={"files": [{"path": "a"}] * 3})
+
+    assert res.status_code == 400
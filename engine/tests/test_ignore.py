@@ -0,0 +1,65 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from engine.app import main, storage
+from engine.app.ignore import IgnoreMatcher, compile_ignore
+from engine.app.policy import PolicyEngine, PolicyViolation
+from engine.app.schemas import Project
+
+
+@pytest.mark.parametrize(
+    "rel, is_dir, expected",
+    [
+        ("node_modules", True, True),
+        ("web/node_modules", True, True),
+        ("app.log", False, True),
+        ("logs/keep.log", False, False),
+        ("build", True, True),
+        ("src/build", True, False),
+        ("dist", True, True),
+        ("dist", False, False),
+        ("docs/img/a/b.png", False, True),
+        ("docs/b.png", False, True),
+        ("src/gen/x.py", False, True),
+        ("src/generated.py", False, False),
+        ("lib/a.py", False, False),
+    ],
+)
+def test_gitignore_semantics(rel: str, is_dir: bool, expected: bool) -> None:
+    matcher = IgnoreMatcher(
+        ["# comment", "", "node_modules", "*.log", "!keep.log", "/build", "dist/", "docs/**/*.png", "src/gen/**"]
+    )
+
+    assert matcher.match(rel, is_dir) is expected
+
+
+def test_ignored_checks_parent_directories_and_compiles_once() -> None:
+    matcher = compile_ignore(["./dist/", ".git"])
+
+    assert matcher.ignored("dist/app/index.js")
+    assert matcher.ignored(".git/config")
+    assert not matcher.match("dist/app/index.js")
+    assert compile_ignore([".git", "./dist/"]) is not matcher
+    assert compile_ignore(["./dist/", ".git"]) is matcher
+
+
+def test_policy_refuses_hard_ignored_paths_but_not_project_patterns(tmp_path, monkeypatch) -> None:
+    engine = PolicyEngine()
+
+    for op in ("read", "write"):
+        with pytest.raises(PolicyViolation) as exc:
+            engine.ensure_allowed_path(tmp_path, "web/node_modules/x.js", op=op)
+        assert exc.value.code == "IGNORED_PATH"
+
+    # Project ignore patterns only shape indexing and the tree; saving into them still works.
+    root = tmp_path / "project"
+    root.mkdir()
+    project = Project(id="writes", name="Writes", path=str(root), ignore=["out/", "*.md"])
+    monkeypatch.setattr(storage, "get_project", lambda project_id: project)
+    (tmp_path / "events").mkdir()
+    monkeypatch.setattr(main.event_log, "root", tmp_path / "events")
+    client = TestClient(main.app)
+    for path in ("out/report.csv", "docs/notes.md"):
+        res = client.post("/api/file/save", params={"project_id": project.id}, json={"path": path, "content": "x"})
+        assert res.status_code == 200
+        assert (root / path).read_text() == "x"
@@ -0,0 +1,480 @@
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pytest
+from watchdog.events import FileModifiedEvent
+
+from engine.app import indexer, search_filters
+from engine.app.index_status import IndexStatusStore
+from engine.app.quantized_store import QuantizedClient
+from engine.app.schemas import Project
+
+
+def _fake_embed(texts, model=None):
+    return np.asarray([[float(len(text)), 1.0, 0.0] for text in texts], dtype=np.float32)
+
+
+def build_project(root: Path) -> Project:
+    return Project(id=f"p-{uuid.uuid4().hex[:8]}", name="Project", path=str(root))
+
+
+def test_reindex_skips_unchanged_files(tmp_path: Path, isolated_indexer) -> None:
+    root = tmp_path / "project"
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "a.py").write_text("print('a')\n")
+    (root / "src" / "b.py").write_text("print('b')\n")
+    project = build_project(root)
+
+    first = indexer.index_project(project)
+    assert first["files_added"] == 2
+    assert first["chunks_indexed"] == 2
+
+    isolated_indexer.clear()
+    second = indexer.index_project(project)
+    assert second["files_skipped"] == 2
+    assert second["chunks_indexed"] == 0
+    assert isolated_indexer == []
+
+
+def test_reindex_updates_changed_and_removes_deleted(tmp_path: Path, isolated_indexer) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "keep.py").write_text("x = 1\n")
+    (root / "edit.py").write_text("y = 1\n")
+    (root / "gone.py").write_text("z = 1\n")
+    project = build_project(root)
+    indexer.index_project(project)
+
+    (root / "edit.py").write_text("y = 2\n")
+    (root / "gone.py").unlink()
+    (root / "new.py").write_text("w = 1\n")
+    result = indexer.index_project(project)
+
+    assert result["files_added"] == 1
+    assert result["files_updated"] == 1
+    assert result["files_removed"] == 1
+    assert result["files_skipped"] == 1
+
+    collection = indexer._active_collection(project.id)
+    assert sorted(collection.get()["ids"]) == ["edit.py:0", "keep.py:0", "new.py:0"]
+
+
+def test_force_reembeds_everything(tmp_path: Path, isolated_indexer) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "a.py").write_text("a = 1\n")
+    project = build_project(root)
+    indexer.index_project(project)
+
+    result = indexer.index_project(project, force=True)
+    assert result["files_updated"] == 1
+    assert result["chunks_indexed"] == 1
+
+
+def test_watcher_purges_trailing_chunks_and_deleted_files(tmp_path: Path, isolated_indexer) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    long_file = root / "long.py"
+    long_file.write_text("\n".join(f"value_{i} = {'x' * 80}" for i in range(60)))
+    project = build_project(root)
+    indexer.index_project(project)
+    collection = indexer._active_collection(project.id)
+    assert len(collection.get()["ids"]) > 1
+
+    handler = indexer._ChangeHandler(project)
+    long_file.write_text("short = 1\n")
+    handler._reindex_file(long_file)
+    assert collection.get()["ids"] == ["long.py:0"]
+
+    long_file.unlink()
+    handler._remove_path(long_file)
+    assert collection.get()["ids"] == []
+
+
+def test_watcher_reads_gitignore_files_once_until_one_changes(tmp_path: Path, isolated_indexer, monkeypatch) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / ".gitignore").write_text("gen.py\n")
+    for name in ("a.py", "b.py", "gen.py"):
+        (root / name).write_text(f"{name[0]} = 1\n")
+    project = Project(id="p-gitignore", name="Project", path=str(root), file_source="gitignore")
+    built = []
+    real_tree = indexer.GitignoreTree
+    monkeypatch.setattr(indexer, "GitignoreTree", lambda path: built.append(path) or real_tree(path))
+    handler = indexer._ChangeHandler(project)
+
+    handler._reindex_files([root / "a.py", root / "b.py", root / "gen.py"])
+    handler._reindex_files([root / "a.py"])
+    assert len(built) == 1
+    assert indexer._indexed_paths(project.id) == ["a.py", "b.py"]
+
+    (root / ".gitignore").write_text("")
+    handler.on_modified(FileModifiedEvent(str(root / ".gitignore")))
+    handler._reindex_files([root / "gen.py"])
+    assert len(built) == 2
+    assert indexer._indexed_paths(project.id) == ["a.py", "b.py", "gen.py"]
+
+
+def test_compact_removes_orphaned_chunks(tmp_path: Path, isolated_indexer) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "a.py").write_text("a = 1\n")
+    project = build_project(root)
+    indexer.index_project(project)
+
+    collection = indexer._active_collection(project.id)
+    collection.upsert(ids=["a.py:7", "old.py:0"], documents=["x", "y"], embeddings=_fake_embed(["x", "y"]))
+
+    result = indexer.compact_project(project)
+    assert result["chunks_removed"] == 2
+    assert collection.get()["ids"] == ["a.py:0"]
+
+
+def test_watcher_coalesces_bursts_into_one_batch(tmp_path: Path, isolated_indexer, monkeypatch) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    project = build_project(root)
+    calls = []
+    monkeypatch.setattr(indexer, "_embed", lambda texts, model=None: calls.append(list(texts)) or _fake_embed(texts))
+
+    handler = indexer._ChangeHandler(project, debounce=60)
+    for name in ("a.py", "b.py", "c.py"):
+        path = root / name
+        path.write_text(f"{name[0]} = 1\n")
+        for _ in range(5):
+            handler.on_modified(FileModifiedEvent(str(path)))
+
+    stats = handler.stats()
+    assert stats["queue_depth"] == 3
+    assert calls == []
+
+    handler.flush()
+    assert len(calls) == 1
+    assert len(calls[0]) == 3
+    assert handler.stats()["queue_depth"] == 0
+    collection = indexer._active_collection(project.id)
+    assert sorted(collection.get()["ids"]) == ["a.py:0", "b.py:0", "c.py:0"]
+
+
+def test_index_streams_in_bounded_batches(tmp_path: Path, isolated_indexer, monkeypatch) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    for idx in range(7):
+        (root / f"m{idx}.py").write_text(f"value = {idx}\n")
+    project = build_project(root)
+    calls = []
+    monkeypatch.setattr(indexer, "_embed", lambda texts, model=None: calls.append(len(texts)) or _fake_embed(texts))
+    monkeypatch.setattr(indexer._settings, "index_batch_size", 3)
+
+    result = indexer.index_project(project)
+
+    assert result["chunks_indexed"] == 7
+    assert max(calls) <= 3
+    assert sum(calls) == 7
+
+
+def test_cancelled_index_keeps_flushed_progress(tmp_path: Path, isolated_indexer, monkeypatch) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    for idx in range(4):
+        (root / f"m{idx}.py").write_text(f"value = {idx}\n")
+    project = build_project(root)
+    monkeypatch.setattr(indexer._settings, "index_batch_size", 1)
+    job = indexer.IndexJob(project_id=project.id)
+    original_flush = indexer._ChunkBatch.flush
+
+    def flush_then_cancel(self):
+        written = original_flush(self)
+        job.cancel()
+        return written
+
+    monkeypatch.setattr(indexer._ChunkBatch, "flush", flush_then_cancel)
+    with pytest.raises(indexer.IndexCancelled):
+        indexer.index_project(project, job=job)
+    monkeypatch.setattr(indexer._ChunkBatch, "flush", original_flush)
+
+    result = indexer.index_project(project)
+    assert result["files_skipped"] == 1
+    assert result["files_added"] == 3
+
+
+def test_identical_chunks_are_embedded_once(tmp_path: Path, isolated_indexer) -> None:
+    root = tmp_path / "project"
+    (root / "vendor").mkdir(parents=True)
+    license_text = "# Licensed under the MIT license\n"
+    (root / "a.py").write_text(license_text)
+    (root / "vendor" / "b.py").write_text(license_text)
+    project = build_project(root)
+
+    indexer.index_project(project)
+    assert isolated_indexer == [license_text.rstrip("\n")]
+
+    other = build_project(root)
+    indexer.index_project(other)
+    assert len(isolated_indexer) == 1
+    assert indexer._embedding_cache.stats()["hits"] == 2
+
+
+def test_changing_chunker_settings_rebuilds_and_drops_old_chunks(tmp_path: Path, isolated_indexer, monkeypatch) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "notes.md").write_text("\n".join(f"line {i} " + "x" * 60 for i in range(40)))
+    project = build_project(root)
+    indexer.index_project(project)
+    collection = indexer._active_collection(project.id)
+    before = len(collection.get()["ids"])
+
+    monkeypatch.setattr(indexer._settings, "chunk_max_chars", 4000)
+    result = indexer.index_project(project)
+
+    assert result["files_updated"] == 1
+    assert len(collection.get()["ids"]) == 1 < before
+
+
+def test_lexical_search_finds_identifiers_without_embedding(tmp_path: Path, isolated_indexer) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "main.py").write_text("def _apply_patch_for_project(project_id):\n    return project_id\n")
+    (root / "other.py").write_text("def apply(x):\n    return x\n")
+    project = build_project(root)
+    indexer.index_project(project)
+    isolated_indexer.clear()
+
+    hits = indexer.search_chunks(project.id, "_apply_patch_for_project", k=5, mode="lexical")
+
+    assert isolated_indexer == []
+    assert hits[0]["meta"]["file_path"] == "main.py"
+    assert hits[0]["meta"]["symbols"] == "_apply_patch_for_project"
+
+
+def test_hybrid_search_fuses_both_rankings(tmp_path: Path, isolated_indexer) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "a.py").write_text("def alpha():\n    return 1\n")
+    (root / "b.py").write_text("def beta():\n    return 2\n")
+    project = build_project(root)
+    indexer.index_project(project)
+
+    hits = indexer.search_chunks(project.id, "beta", k=2, mode="hybrid")
+
+    assert [hit["meta"]["file_path"] for hit in hits][0] == "b.py"
+    assert len({hit["id"] for hit in hits}) == len(hits)
+
+
+def test_lexical_index_tracks_deletions(tmp_path: Path, isolated_indexer) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "gone.py").write_text("def vanishing_symbol():\n    pass\n")
+    project = build_project(root)
+    indexer.index_project(project)
+    assert indexer.search_chunks(project.id, "vanishing_symbol", mode="lexical")
+
+    (root / "gone.py").unlink()
+    indexer.index_project(project)
+
+    assert indexer.search_chunks(project.id, "vanishing_symbol", mode="lexical") == []
+
+
+def test_repeated_search_is_served_from_cache_until_reindex(tmp_path: Path, isolated_indexer) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "a.py").write_text("def alpha():\n    return 1\n")
+    project = build_project(root)
+    indexer.index_project(project)
+    isolated_indexer.clear()
+
+    first = indexer.search_chunks(project.id, "alpha", k=3)
+    second = indexer.search_chunks(project.id, "alpha", k=3)
+    assert first == second
+    assert isolated_indexer == ["alpha"]
+    assert indexer.search_cache_stats()["results"]["hits"] == 1
+
+    (root / "b.py").write_text("def alphabet():\n    return 2\n")
+    indexer.index_project(project)
+    isolated_indexer.clear()
+    third = indexer.search_chunks(project.id, "alpha", k=3)
+
+    # The index changed, so results are recomputed but the query embedding is reused.
+    assert len(third) == 2
+    assert isolated_indexer == []
+    assert indexer.search_cache_stats()["query_embeddings"]["hits"] == 1
+
+
+def test_search_racing_a_write_is_not_cached_under_the_new_generation(
+    tmp_path: Path, isolated_indexer, monkeypatch
+) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "a.py").write_text("def alpha():\n    return 1\n")
+    project = build_project(root)
+    indexer.index_project(project)
+    real_search = indexer._vector_search_many
+
+    def search_during_write(*args, **kwargs):
+        hits = real_search(*args, **kwargs)
+        # A watcher flush lands while the query is running.
+        indexer._bump_generation(project.id)
+        return hits
+
+    monkeypatch.setattr(indexer, "_vector_search_many", search_during_write)
+    indexer.search_chunks(project.id, "alpha", k=3)
+    monkeypatch.setattr(indexer, "_vector_search_many", real_search)
+    indexer.search_chunks(project.id, "alpha", k=3)
+
+    assert indexer.search_cache_stats()["results"]["hits"] == 0
+
+
+def test_writes_by_another_worker_invalidate_cached_results(tmp_path: Path, isolated_indexer) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "a.py").write_text("def alpha():\n    return 1\n")
+    project = build_project(root)
+    indexer.index_project(project)
+    indexer.search_chunks(project.id, "alpha", k=3)
+    indexer.search_chunks(project.id, "alpha", k=3)
+    assert indexer.search_cache_stats()["results"]["hits"] == 1
+
+    # Another process's store on the same file records a write to the index.
+    IndexStatusStore(root=tmp_path / "data").bump_generation(project.id)
+    indexer.search_chunks(project.id, "alpha", k=3)
+
+    assert indexer.search_cache_stats()["results"]["hits"] == 1
+
+
+def test_search_many_batches_encoding_and_keeps_order(tmp_path: Path, isolated_indexer, monkeypatch) -> None:
+    projects = []
+    for name in ("one", "two"):
+        root = tmp_path / name
+        root.mkdir()
+        (root / f"{name}.py").write_text(f"def {name}_func():\n    return '{name}'\n")
+        project = build_project(root)
+        indexer.index_project(project)
+        projects.append(project)
+    calls = []
+    monkeypatch.setattr(indexer, "_embed", lambda texts, model=None: calls.append(list(texts)) or _fake_embed(texts))
+
+    requests = [
+        {"project_id": projects[1].id, "query": "two_func", "k": 3, "mode": "vector"},
+        {"project_id": projects[0].id, "query": "one_func", "k": 3, "mode": "lexical"},
+        {"project_id": projects[0].id, "query": "first", "k": 1, "mode": "hybrid"},
+        {"project_id": projects[0].id, "query": "second", "k": 2, "mode": "vector"},
+    ]
+    results = indexer.search_many(requests)
+
+    assert calls == [["two_func", "first", "second"]]
+    assert [hit["meta"]["file_path"] for hit in results[0]] == ["two.py"]
+    assert [hit["meta"]["file_path"] for hit in results[1]] == ["one.py"]
+    assert len(results[2]) == 1
+    assert len(results[3]) == 1
+    assert results == [indexer.search_chunks(**request) for request in requests]
+
+
+@pytest.mark.parametrize("backend", ["chroma", "int8"])
+def test_search_filters_narrow_both_indexes(tmp_path: Path, isolated_indexer, monkeypatch, backend: str) -> None:
+    if backend != "chroma":
+        monkeypatch.setattr(indexer._settings, "vector_storage", backend)
+        indexer._clients[backend] = QuantizedClient(backend, root=tmp_path / "data")
+    root = tmp_path / "project"
+    (root / "src").mkdir(parents=True)
+    (root / "docs").mkdir()
+    (root / "src" / "config.py").write_text("def load_config():\n    return {}\n")
+    (root / "docs" / "config.md").write_text("# load_config\n\nHow to load config.\n")
+    (root / "old.py").write_text("def load_config_legacy():\n    pass\n")
+    os.utime(root / "old.py", (1_000_000, 1_000_000))
+    project = build_project(root)
+    indexer.index_project(project)
+
+    for mode in ("vector", "lexical", "hybrid"):
+        hits = indexer.search_chunks(project.id, "load_config", k=10, mode=mode, paths=["src"])
+        assert {hit["meta"]["file_path"] for hit in hits} == {os.path.join("src", "config.py")}
+
+        hits = indexer.search_chunks(project.id, "load_config", k=10, mode=mode, extensions=["md"])
+        assert {hit["meta"]["file_path"] for hit in hits} == {os.path.join("docs", "config.md")}
+
+        hits = indexer.search_chunks(project.id, "load_config", k=10, mode=mode, modified_after=2_000_000)
+        assert "old.py" not in {hit["meta"]["file_path"] for hit in hits}
+        assert hits
+
+    assert indexer.search_chunks(project.id, "load_config", paths=["missing/"]) == []
+
+
+def test_path_filters_use_chunk_metadata_and_batch_file_lists(tmp_path: Path, isolated_indexer, monkeypatch) -> None:
+    root = tmp_path / "project"
+    (root / "src" / "pkg").mkdir(parents=True)
+    for i in range(5):
+        (root / "src" / "pkg" / f"m{i}.py").write_text(f"def load_{i}():\n    return {i}\n")
+    (root / "notes.md").write_text("# load\n")
+    project = build_project(root)
+    indexer.index_project(project)
+    queried = []
+    original = indexer._vector_search_many
+    monkeypatch.setattr(
+        indexer,
+        "_vector_search_many",
+        lambda project_id, embeddings, ks, wheres: queried.append(wheres) or original(project_id, embeddings, ks, wheres),
+    )
+    monkeypatch.setattr(search_filters, "MAX_IN_VALUES", 2)
+
+    hits = indexer.search_chunks(project.id, "load", k=10, mode="vector", paths=["src/pkg"], extensions=["py"])
+    assert len(hits) == 5
+    assert queried[-1] == [{"$and": [{"ext": {"$in": [".py"]}}, {"$or": [
+        {"file_path": {"$eq": os.path.join("src", "pkg")}}, {"dir_2": {"$eq": "src/pkg"}}
+    ]}]}]
+
+    # Globs cannot be expressed on the metadata, so the matching files are listed in batches.
+    hits = indexer.search_chunks(project.id, "load", k=4, mode="vector", paths=["src/*.py"])
+    assert len(queried[-1]) == 3
+    assert len(hits) == 4
+    assert [hit["score"] for hit in hits] == sorted((hit["score"] for hit in hits), reverse=True)
+
+
+def test_indexer_runs_on_quantized_storage(tmp_path: Path, isolated_indexer, monkeypatch) -> None:
+    monkeypatch.setattr(indexer._settings, "vector_storage", "int8")
+    indexer._clients["int8"] = QuantizedClient("int8", root=tmp_path / "data")
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "a.py").write_text("def alpha():\n    return 1\n")
+    (root / "b.py").write_text("def beta():\n    return 2\n")
+    project = build_project(root)
+    indexer.index_project(project)
+
+    hits = indexer.search_chunks(project.id, "beta", k=1, paths=["b.py"])
+    assert [hit["meta"]["file_path"] for hit in hits] == ["b.py"]
+
+    (root / "b.py").unlink()
+    indexer.index_project(project)
+    assert indexer._active_collection(project.id).get()["ids"] == ["a.py:0"]
+
+
+def test_jobs_for_different_projects_index_in_parallel(tmp_path: Path, isolated_indexer, monkeypatch) -> None:
+    import threading
+    import time
+
+    from engine.app.index_jobs import IndexJobManager
+
+    # Each project's embed call waits for the other's, which only returns if both hold their lock at once.
+    both_embedding = threading.Barrier(2, timeout=5)
+
+    def overlapping_embed(texts, model=None):
+        both_embedding.wait()
+        return _fake_embed(texts)
+
+    monkeypatch.setattr(indexer, "_embed", overlapping_embed)
+    projects = []
+    for name in ("one", "two"):
+        root = tmp_path / name
+        root.mkdir()
+        (root / f"{name}.py").write_text(f"{name} = 1\n")
+        projects.append(build_project(root))
+    manager = IndexJobManager(indexer.index_project, max_workers=2)
+
+    jobs = [manager.submit(project) for project in projects]
+    deadline = time.monotonic() + 10
+    while any(job.state not in ("completed", "failed") for job in jobs):
+        assert time.monotonic() < deadline, "timed out waiting for jobs"
+        time.sleep(0.01)
+
+    assert [job.state for job in jobs] == ["completed", "completed"]
+    assert not both_embedding.broken
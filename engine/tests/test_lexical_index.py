@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from engine.app.lexical_index import LexicalIndex, build_match_query
+
+
+def test_build_match_query_splits_identifiers_into_phrases() -> None:
+    assert build_match_query("_apply_patch_for_project") == '"apply patch for project"'
+    assert build_match_query('foo "bar" foo') == '"foo" OR "bar"'
+    assert build_match_query("*** ---") == ""
+
+
+def test_symbol_matches_outrank_body_mentions(tmp_path: Path) -> None:
+    index = LexicalIndex("proj", root=tmp_path)
+    index.upsert(
+        ["body.py:0", "def.py:0"],
+        ["x = load_config()  # calls load_config", "def load_config():\n    return {}"],
+        [{"file_path": "body.py"}, {"file_path": "def.py", "symbols": "load_config"}],
+    )
+
+    hits = index.search("load_config", k=5)
+
+    assert [hit["id"] for hit in hits] == ["def.py:0", "body.py:0"]
+    assert hits[0]["score"] > hits[1]["score"]
+
+
+def test_upsert_replaces_and_delete_removes(tmp_path: Path) -> None:
+    index = LexicalIndex("proj", root=tmp_path)
+    index.upsert(["a:0"], ["old words"], [{"file_path": "a"}])
+    index.upsert(["a:0"], ["new words"], [{"file_path": "a"}])
+    assert index.count() == 1
+    assert index.search("old") == []
+    assert index.search("new")[0]["text"] == "new words"
+
+    index.delete(["a:0"])
+    assert index.search("new") == []
@@ -0,0 +1,73 @@
+import os
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from engine.app import indexer, main, project_tree, storage
+from engine.app.schemas import Project
+from engine.app.search_cache import LRUCache
+
+
+def build_project(tmp_path: Path) -> Project:
+    root = tmp_path / "project"
+    for rel in ["a.py", "src/app.py", "src/deep/x/y.py", "src-extra/z.py", "node_modules/m.js", ".env"]:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+    return Project(id="tree", name="Tree", path=str(root))
+
+
+def native(*rels: str) -> list:
+    return [rel.replace("/", os.sep) for rel in rels]
+
+
+def test_pages_respect_depth_subpath_and_cursor(tmp_path: Path) -> None:
+    tree = project_tree._walk(build_project(tmp_path))
+
+    top = project_tree.list_page(tree, max_depth=1)
+    assert [e["path"] for e in top["tree"]] == native("a.py", "src", "src-extra")
+    sub = project_tree.list_page(tree, native("src")[0])
+    assert [e["path"] for e in sub["tree"]] == native("src/app.py", "src/deep", "src/deep/x", "src/deep/x/y.py")
+
+    first = project_tree.list_page(tree, limit=3)
+    rest = project_tree.list_page(tree, cursor=first["next_cursor"], limit=10)
+    assert first["next_cursor"] == native("src/app.py")[0]
+    assert rest["next_cursor"] is None
+    assert [e["path"] for e in first["tree"] + rest["tree"]] == native(
+        "a.py", "src", "src/app.py", "src/deep", "src/deep/x", "src/deep/x/y.py", "src-extra", "src-extra/z.py"
+    )
+
+
+def test_watched_tree_is_cached_until_the_watcher_sees_a_change(tmp_path: Path, monkeypatch) -> None:
+    project = build_project(tmp_path)
+    monkeypatch.setattr(project_tree, "_trees", LRUCache(4))
+    monkeypatch.setattr(indexer, "_tree_generations", {})
+    monkeypatch.setattr(indexer, "tree_generation", lambda project_id: indexer._tree_generations.get(project_id, 0))
+    walks = []
+    real_walk = project_tree._walk
+    monkeypatch.setattr(project_tree, "_walk", lambda p: walks.append(p.id) or real_walk(p))
+
+    first = project_tree.snapshot(project)
+    (Path(project.path) / "b.py").write_text("b")
+    assert project_tree.snapshot(project) is first
+    indexer._bump_tree_generation(project.id)
+    assert "b.py" in project_tree.snapshot(project).paths
+    assert len(walks) == 2
+
+
+def test_tree_route_returns_304_for_a_matching_etag(tmp_path: Path, monkeypatch) -> None:
+    project = build_project(tmp_path)
+    monkeypatch.setattr(storage, "get_project", lambda project_id: project if project_id == project.id else None)
+    monkeypatch.setattr(indexer, "touch_project", lambda project: None)
+    client = TestClient(main.app)
+
+    res = client.get(f"/api/projects/{project.id}/tree", params={"max_depth": 1})
+    assert res.status_code == 200
+    assert [e["path"] for e in res.json()["tree"]] == native("a.py", "src", "src-extra")
+
+    again = client.get(
+        f"/api/projects/{project.id}/tree", params={"max_depth": 1}, headers={"If-None-Match": res.headers["etag"]}
+    )
+    assert again.status_code == 304
+    assert client.get(f"/api/projects/{project.id}/tree", headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get(f"/api/projects/{project.id}/tree", params={"path": "missing"}).status_code == 404
@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from engine.app.quantized_store import QuantizedClient, quantize
+
+
+def _vectors(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("precision", ["int8", "float16"])
+def test_quantize_round_trip_is_close(precision: str) -> None:
+    vectors = _vectors(50)
+    codes, scales = quantize(vectors, precision)
+
+    restored = codes.astype(np.float32) * scales[:, None]
+
+    assert np.abs(restored - vectors).max() < 0.01
+
+
+@pytest.mark.parametrize("precision", ["int8", "float16", "float32"])
+def test_query_matches_exact_search_after_rerank(tmp_path: Path, precision: str) -> None:
+    vectors = _vectors(500)
+    collection = QuantizedClient(precision, root=tmp_path).get_or_create_collection("proj--m--32")
+    ids = [f"f{i}.py:0" for i in range(500)]
+    collection.upsert(ids=ids, embeddings=vectors, documents=ids, metadatas=[{"file_path": i} for i in ids])
+
+    queries = _vectors(20, seed=1)
+    res = collection.query(query_embeddings=queries, n_results=5)
+
+    for q, got, distances in zip(queries, res["ids"], res["distances"]):
+        exact = np.argsort(((vectors - q) ** 2).sum(axis=1))[:5]
+        assert got == [ids[i] for i in exact]
+        assert distances == sorted(distances)
+
+
+def test_delete_filter_and_reload(tmp_path: Path) -> None:
+    client = QuantizedClient("int8", root=tmp_path)
+    collection = client.create_collection("proj--m--32", metadata={"model": "m"})
+    vectors = _vectors(4)
+    metas = [{"file_path": p, "modified": float(i)} for i, p in enumerate(["a.py", "b.py", "c.py", "d.py"])]
+    collection.upsert(ids=["a", "b", "c", "d"], embeddings=vectors, documents=["A", "B", "C", "D"], metadatas=metas)
+    collection.delete(ids=["a"])
+
+    where = {"$and": [{"file_path": {"$in": ["b.py", "d.py"]}}, {"modified": {"$gt": 1.5}}]}
+    assert collection.query(query_embeddings=vectors[1:2], n_results=3, where=where)["ids"] == [["d"]]
+
+    reopened = QuantizedClient("int8", root=tmp_path).get_collection("proj--m--32")
+    assert reopened.count() == 3
+    assert sorted(reopened.get()["ids"]) == ["b", "c", "d"]
+    assert reopened.metadata == {"model": "m"}
+
+    client.delete_collection("proj--m--32")
+    assert client.list_collections() == []
+
+
+def test_filters_on_path_fields_after_delete(tmp_path: Path) -> None:
+    collection = QuantizedClient("float16", root=tmp_path).get_or_create_collection("proj--m--32")
+    paths = ["src/a.py", "src/a.py", "src/b.md", "lib/c.py"]
+    metas = [{"file_path": p, "ext": p[-3:], "dir_1": p.split("/")[0]} for p in paths]
+    collection.upsert(ids=["a0", "a1", "b", "c"], embeddings=_vectors(4), documents=paths, metadatas=metas)
+    collection.delete(ids=["a0"])
+
+    where = {"$and": [{"ext": {"$in": [".py"]}}, {"$or": [{"dir_1": {"$eq": "src"}}, {"file_path": {"$eq": "lib/c.py"}}]}]}
+    assert sorted(collection.query(query_embeddings=_vectors(1, seed=2), n_results=4, where=where)["ids"][0]) == ["a1", "c"]
+
+
+def test_quantized_files_are_smaller_than_float32(tmp_path: Path) -> None:
+    vectors = _vectors(2000, dim=384)
+    ids = [f"f{i}.py:0" for i in range(2000)]
+    sizes = {}
+    for precision in ("float32", "float16", "int8"):
+        client = QuantizedClient(precision, root=tmp_path / precision)
+        collection = client.get_or_create_collection("proj--m--384")
+        collection.upsert(ids=ids, embeddings=vectors, documents=ids, metadatas=[{"file_path": i} for i in ids])
+        collection.close()
+        sizes[precision] = sum(path.stat().st_size for path in (tmp_path / precision).rglob("*") if path.is_file())
+
+    assert sizes["float16"] < 0.6 * sizes["float32"]
+    assert sizes["int8"] < 0.85 * sizes["float32"]
+
+    reopened = QuantizedClient("int8", root=tmp_path / "int8").get_collection("proj--m--384")
+    restored = np.stack(reopened.get(ids=ids[:5], include=["embeddings"])["embeddings"])
+    assert np.abs(restored - vectors[:5]).max() < 1e-3
@@ -0,0 +1,170 @@
+import sqlite3
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from engine.app import indexer
+from engine.app.collection_registry import CollectionRegistry, collection_name
+from engine.app.quantized_store import QuantizedClient
+from engine.app.schemas import Project
+
+
+def _fake_embed(texts, model=None):
+    return np.asarray([[float(len(text)), 1.0, 0.0] for text in texts], dtype=np.float32)
+
+
+def build_project(root: Path) -> Project:
+    return Project(id=f"p-{uuid.uuid4().hex[:8]}", name="Project", path=str(root))
+
+
+def test_collection_names_slug_the_model() -> None:
+    assert collection_name("p1", "sentence-transformers/all-MiniLM-L6-v2", 384) == (
+        "p1--sentence-transformers-all-minilm-l6-v2--384"
+    )
+    assert collection_name("p1", "///", 8) == "p1--model--8"
+
+
+def test_shadow_is_promoted_in_one_step(tmp_path: Path) -> None:
+    registry = CollectionRegistry(root=tmp_path)
+    assert registry.get("p1") is None
+
+    registry.set_active("p1", "p1--old--3", "old", 3)
+    registry.set_shadow("p1", "p1--new--4", "new", 4, "int8")
+    assert registry.get("p1")["shadow"] == {"name": "p1--new--4", "model": "new", "dim": 4, "backend": "int8"}
+
+    registry.promote("p1")
+    # Another worker's registry on the same file sees the swap.
+    assert CollectionRegistry(root=tmp_path).get("p1") == {
+        "active": {"name": "p1--new--4", "model": "new", "dim": 4, "backend": "int8"},
+        "shadow": None,
+    }
+
+
+def test_registries_from_before_backends_default_to_chroma(tmp_path: Path) -> None:
+    conn = sqlite3.connect(str(tmp_path / "collections.sqlite3"))
+    conn.execute(
+        "CREATE TABLE collections (project_id TEXT PRIMARY KEY, name TEXT NOT NULL, model TEXT NOT NULL,"
+        " dim INTEGER, shadow_name TEXT, shadow_model TEXT, shadow_dim INTEGER)"
+    )
+    conn.execute("INSERT INTO collections (project_id, name, model, dim) VALUES ('p1', 'p1', 'm', 3)")
+    conn.commit()
+    conn.close()
+
+    assert CollectionRegistry(root=tmp_path).get("p1")["active"]["backend"] == "chroma"
+
+
+def test_model_change_migrates_through_a_shadow_collection(tmp_path: Path, isolated_indexer, monkeypatch) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "a.py").write_text("def alpha():\n    return 1\n")
+    project = build_project(root)
+    submitted = []
+    monkeypatch.setattr(indexer.migration_jobs, "submit", lambda project: submitted.append(project.id))
+    indexer.index_project(project)
+    old_name = indexer._collections.get(project.id)["active"]["name"]
+
+    monkeypatch.setattr(indexer, "_embedder_model_name", "new-model")
+    indexer._embedding_dims["new-model"] = 3
+    models = []
+    monkeypatch.setattr(indexer, "_embed", lambda texts, model=None: models.append(model) or _fake_embed(texts))
+
+    # Until the swap, searches still embed with the model that built the active collection.
+    indexer.search_chunks(project.id, "alpha")
+    assert models == [indexer._settings.embedding_model]
+    indexer.index_project(project)
+    assert submitted == [project.id]
+
+    result = indexer.migrate_project(project)
+
+    entry = indexer._collections.get(project.id)
+    assert result["migrated"] is True
+    assert entry["shadow"] is None
+    assert entry["active"]["model"] == "new-model"
+    assert entry["active"]["name"] != old_name
+    assert old_name not in [c.name for c in indexer._get_client().list_collections()]
+    assert indexer._active_collection(project.id).get()["ids"] == ["a.py:0"]
+    models.clear()
+    assert indexer.search_chunks(project.id, "alpha")
+    assert models == ["new-model"]
+
+
+def test_writes_during_migration_reach_the_shadow(tmp_path: Path, isolated_indexer, monkeypatch) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "a.py").write_text("a = 1\n")
+    project = build_project(root)
+    monkeypatch.setattr(indexer.migration_jobs, "submit", lambda project: None)
+    indexer.index_project(project)
+    indexer._collections.set_shadow(project.id, f"{project.id}--shadow--3", "other", 3)
+
+    (root / "b.py").write_text("b = 1\n")
+    indexer.index_project(project)
+
+    shadow = indexer._get_client().get_collection(f"{project.id}--shadow--3")
+    assert shadow.get()["ids"] == ["b.py:0"]
+
+
+def test_backend_change_copies_vectors_without_reembedding(tmp_path: Path, isolated_indexer, monkeypatch) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "a.py").write_text("def alpha():\n    return 1\n")
+    project = build_project(root)
+    submitted = []
+    monkeypatch.setattr(indexer.migration_jobs, "submit", lambda project: submitted.append(project.id))
+    indexer.index_project(project)
+    old_name = indexer._collections.get(project.id)["active"]["name"]
+
+    indexer._clients["numpy"] = QuantizedClient("float32", root=tmp_path / "numpy")
+    monkeypatch.setattr(indexer._settings, "vector_storage_projects", {project.id: "numpy"})
+    indexer.index_project(project)
+    assert submitted == [project.id]
+    isolated_indexer.clear()
+
+    result = indexer.migrate_project(project)
+
+    assert result["migrated"] is True
+    assert isolated_indexer == []
+    assert indexer._collections.get(project.id)["active"]["backend"] == "numpy"
+    assert old_name not in [c.name for c in indexer._get_client("chroma").list_collections()]
+    assert [hit["id"] for hit in indexer.search_chunks(project.id, "alpha", mode="vector")] == ["a.py:0"]
+
+
+def test_legacy_chroma_collection_is_adopted_and_copied_to_another_backend(
+    tmp_path: Path, isolated_indexer, monkeypatch
+) -> None:
+    project = build_project(tmp_path)
+    legacy = indexer._get_client("chroma").create_collection(name=project.id)
+    legacy.upsert(ids=["a.py:0"], documents=["alpha"], metadatas=[{"file_path": "a.py"}], embeddings=[[5.0, 1.0, 0.0]])
+    indexer._clients["numpy"] = QuantizedClient("float32", root=tmp_path / "numpy")
+    monkeypatch.setattr(indexer._settings, "vector_storage_projects", {project.id: "numpy"})
+
+    entry = indexer._collection_entry(project.id)
+    assert (entry["active"]["name"], entry["active"]["backend"]) == (project.id, "chroma")
+    result = indexer.migrate_project(project)
+
+    assert result["migrated"] is True
+    assert isolated_indexer == []
+    assert indexer._collections.get(project.id)["active"]["backend"] == "numpy"
+    assert project.id not in [c.name for c in indexer._get_client("chroma").list_collections()]
+    assert indexer._active_collection(project.id).get()["ids"] == ["a.py:0"]
+
+
+def test_projects_on_other_backends_never_open_chroma(tmp_path: Path, isolated_indexer, monkeypatch) -> None:
+    monkeypatch.setattr(indexer, "_clients", {"numpy": QuantizedClient("float32", root=tmp_path / "numpy")})
+    monkeypatch.setattr(indexer._settings, "vector_storage", "numpy")
+    opened = []
+    real_get_client = indexer._get_client
+    monkeypatch.setattr(indexer, "_get_client", lambda backend=None: opened.append(backend) or real_get_client(backend))
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "a.py").write_text("def alpha():\n    return 1\n")
+    project = build_project(root)
+
+    indexer.index_project(project)
+
+    assert indexer.search_chunks(project.id, "alpha", mode="vector")
+    assert indexer._adopt_legacy_collection("other") is None
+    assert "chroma" not in opened
+    assert not (tmp_path / "data" / "chroma").exists()
+    assert indexer._no_legacy == {project.id, "other"}
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from engine.app import indexer
+
+
+class FakeModel:
+    def __init__(self):
+        self.pools_started = 0
+        self.calls = []
+
+    def start_multi_process_pool(self, target_devices=None):
+        self.pools_started += 1
+        return {"devices": target_devices}
+
+    def encode(self, texts, pool=None, chunk_size=None, normalize_embeddings=False):
+        self.calls.append((len(texts), pool, chunk_size))
+        return np.ones((len(texts), 3), dtype=np.float32)
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(indexer, "_embedder", model)
+    monkeypatch.setattr(indexer, "_embed_pool", None)
+    monkeypatch.setattr(indexer.atexit, "register", lambda fn: None)
+    return model
+
+
+def test_small_batches_stay_in_process(fake_model, monkeypatch) -> None:
+    monkeypatch.setattr(indexer._settings, "embed_processes", 4)
+    monkeypatch.setattr(indexer._settings, "embed_pool_min_shard", 100)
+
+    indexer._embed(["a"] * 199)
+
+    assert fake_model.pools_started == 0
+    assert fake_model.calls == [(199, None, None)]
+
+
+def test_large_batches_are_sharded_across_the_pool(fake_model, monkeypatch) -> None:
+    monkeypatch.setattr(indexer._settings, "embed_processes", 4)
+    monkeypatch.setattr(indexer._settings, "embed_pool_min_shard", 100)
+
+    indexer._embed(["a"] * 400)
+    indexer._embed(["b"] * 499)
+    indexer._embed(["c"] * 250)
+
+    assert fake_model.pools_started == 1
+    (_, pool, chunk), (_, _, chunk_odd), (_, _, chunk_fewer) = fake_model.calls
+    assert pool == {"devices": ["cpu"] * 4}
+    assert chunk == 100
+    assert chunk_odd == 125
+    # Too few texts for four shards of 100: two workers get 125 each.
+    assert chunk_fewer == 125
+
+
+def test_pool_disabled_by_default(fake_model, monkeypatch) -> None:
+    monkeypatch.setattr(indexer._settings, "embed_processes", 0)
+    indexer._embed(["a"] * 1000)
+    assert fake_model.pools_started == 0
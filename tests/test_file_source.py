@@ -0,0 +1,124 @@
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from engine.app import file_source, git_index
+from engine.app.ignore import GitignoreTree
+from engine.app.schemas import Project
+
+needs_git = pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+
+def write(root: Path, files: dict) -> None:
+    for rel, text in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def git(root: Path, *args: str) -> str:
+    return subprocess.run(["git", "-C", str(root), *args], check=True, capture_output=True, text=True).stdout
+
+
+def project(root: Path, source: str) -> Project:
+    return Project(id="p", name="p", path=str(root), file_source=source)
+
+
+def files(entries) -> set:
+    return {entry.rel.replace(os.sep, "/") for entry in entries if not entry.is_dir}
+
+
+def test_nested_gitignore_files_override_their_parents(tmp_path: Path) -> None:
+    write(
+        tmp_path,
+        {
+            ".gitignore": "*.log\nbuild/\n",
+            "src/.gitignore": "!keep.log\n/generated.py\n",
+            "src/keep.log": "",
+            "src/drop.log": "",
+            "src/generated.py": "",
+            "src/sub/generated.py": "",
+            "build/out.py": "",
+        },
+    )
+    (tmp_path / ".git" / "info").mkdir(parents=True)
+    (tmp_path / ".git" / "info" / "exclude").write_text("src/sub/\n")
+    rules = GitignoreTree(tmp_path)
+
+    assert not rules.match("src/keep.log")
+    assert rules.match("src/drop.log")
+    assert rules.match("src/generated.py")
+    assert rules.match("src/sub", is_dir=True)
+    assert rules.ignored("build/out.py")
+    assert not rules.ignored("src/main.py")
+
+
+def test_gitignore_source_walks_without_ignored_paths(tmp_path: Path) -> None:
+    write(tmp_path, {".gitignore": "out/\n", "a.py": "", "out/b.py": "", "lib/.gitignore": "*.py\n", "lib/c.py": ""})
+    skip = lambda rel, is_dir: rel == ".git"  # noqa: E731
+
+    assert files(file_source.iter_entries(project(tmp_path, "walk"), skip)) == {
+        ".gitignore", "a.py", "out/b.py", "lib/.gitignore", "lib/c.py"
+    }
+    assert files(file_source.iter_entries(project(tmp_path, "gitignore"), skip)) == {".gitignore", "a.py", "lib/.gitignore"}
+    assert file_source.excluded(project(tmp_path, "gitignore"), os.path.join("lib", "c.py"))
+
+
+@needs_git
+@pytest.mark.parametrize("version", ["2", "3", "4"])
+def test_parse_index_matches_git_ls_files(tmp_path: Path, version: str) -> None:
+    write(tmp_path, {f"src/pkg{i}/module_{j}.py": "x" for i in range(5) for j in range(12)})
+    write(tmp_path, {"README.md": "r", "src/pkg0/é.py": "u"})
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "add", "-A")
+    git(tmp_path, "update-index", "--index-version", version)
+    if version == "3":
+        # Intent-to-add entries carry the extended flags that make an entry v3.
+        write(tmp_path, {"new.py": ""})
+        git(tmp_path, "add", "-N", "new.py")
+
+    parsed = git_index.parse_index((tmp_path / ".git" / "index").read_bytes())
+
+    assert parsed == git(tmp_path, "-c", "core.quotePath=false", "ls-files").splitlines()
+
+
+@needs_git
+def test_git_source_lists_tracked_files_and_follows_the_index(tmp_path: Path) -> None:
+    write(tmp_path, {"a.py": "", "src/b.py": "", "src/vendor/c.py": "", "untracked.py": ""})
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "add", "a.py", "src")
+    proj = project(tmp_path, "git")
+    skip = lambda rel, is_dir: rel == os.path.join("src", "vendor")  # noqa: E731
+
+    entries = list(file_source.iter_entries(proj, skip))
+
+    assert files(entries) == {"a.py", "src/b.py"}
+    assert {entry.rel for entry in entries if entry.is_dir} == {"src"}
+    assert all(entry.stat is not None for entry in entries if not entry.is_dir)
+    assert file_source.excluded(proj, "untracked.py")
+    stamp = file_source.stamp(proj)
+
+    (tmp_path / "a.py").unlink()
+    git(tmp_path, "add", "untracked.py")
+
+    assert files(file_source.iter_entries(proj, skip)) == {"src/b.py", "untracked.py"}
+    assert files(file_source.iter_entries(proj, skip, stat=False)) == {"a.py", "src/b.py", "untracked.py"}
+    assert not file_source.excluded(proj, "untracked.py")
+    assert file_source.stamp(proj) != stamp
+
+
+def test_git_source_without_an_index_falls_back_to_gitignore(tmp_path: Path) -> None:
+    write(tmp_path, {".gitignore": "*.log\n", "a.py": "", "b.log": ""})
+
+    assert git_index.tracked_files(tmp_path) is None
+    assert files(file_source.iter_entries(project(tmp_path, "git"), lambda rel, is_dir: False)) == {".gitignore", "a.py"}
+
+
+def test_parse_index_rejects_other_files() -> None:
+    with pytest.raises(git_index.GitIndexError):
+        git_index.parse_index(b"not an index at all")
+    with pytest.raises(git_index.GitIndexError):
+        git_index.parse_index(b"DIRC\x00\x00\x00\x02\x00\x00\x00\x05")
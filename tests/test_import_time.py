@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# This file also runs from the top-level tests/ copy, so find the root rather than counting parents.
+REPO_ROOT = next(parent for parent in Path(__file__).resolve().parents if (parent / "pyproject.toml").exists())
+# Importing the API used to take 7-10s because chromadb, sentence_transformers
+# and torch were pulled in eagerly; without them it is well under a second.
+IMPORT_BUDGET_SECONDS = 3.0
+HEAVY_MODULES = ("chromadb", "sentence_transformers", "torch")
+
+PROBE = """
+import importlib, json, sys, time
+started = time.perf_counter()
+importlib.import_module(%r)
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+@pytest.mark.parametrize("module", ["app.main", "engine.app.main"])
+def test_import_main_stays_within_budget(tmp_path: Path, module: str) -> None:
+    env = {**os.environ, "DECODIFIER_DATA_DIR": str(tmp_path)}
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE % (module, HEAVY_MODULES)],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+
+    assert result["loaded"] == [], f"heavy modules imported eagerly: {result['loaded']}"
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS
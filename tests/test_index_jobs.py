@@ -0,0 +1,93 @@
+import threading
+import time
+
+from engine.app.index_jobs import IndexJobManager
+from engine.app.schemas import Project
+
+
+def wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out waiting for job"
+        time.sleep(0.01)
+
+
+def test_duplicate_submissions_coalesce() -> None:
+    release = threading.Event()
+    calls = []
+
+    def runner(project, force=False, job=None):
+        calls.append(project.id)
+        release.wait(5)
+        return {"project_id": project.id}
+
+    manager = IndexJobManager(runner, max_workers=1)
+    project = Project(id="p1", name="Project", path=".")
+    first = manager.submit(project)
+    second = manager.submit(project)
+    assert first is second
+
+    release.set()
+    wait_for(lambda: first.state == "completed")
+    assert calls == ["p1"]
+    assert first.as_dict()["result"] == {"project_id": "p1"}
+
+    third = manager.submit(project)
+    assert third is not first
+
+
+def test_cancel_stops_running_job() -> None:
+    started = threading.Event()
+
+    def runner(project, force=False, job=None):
+        started.set()
+        while True:
+            job.files_scanned += 1
+            job.check_cancelled()
+            time.sleep(0.01)
+
+    manager = IndexJobManager(runner, max_workers=1)
+    job = manager.submit(Project(id="p2", name="Project", path="."))
+    started.wait(5)
+    manager.cancel("p2", job.id)
+    wait_for(lambda: job.state == "cancelled")
+    assert manager.active("p2") is None
+    assert job.as_dict()["files_scanned"] > 0
+
+
+def test_force_submit_is_not_dropped_while_a_job_is_active() -> None:
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+
+    def runner(project, force=False, job=None):
+        calls.append(force)
+        started.set()
+        release.wait(5)
+        return {}
+
+    manager = IndexJobManager(runner, max_workers=1)
+    blocker = manager.submit(Project(id="other", name="Project", path="."))
+    started.wait(5)
+    project = Project(id="p3", name="Project", path=".")
+    queued = manager.submit(project)
+    # Not started yet: the pending job itself becomes a forced one.
+    assert manager.submit(project, force=True) is queued
+    assert queued.force
+
+    release.set()
+    wait_for(lambda: queued.state == "completed")
+    release.clear()
+    started.clear()
+    calls.clear()
+    running = manager.submit(project)
+    started.wait(5)
+    followup = manager.submit(project, force=True)
+    assert followup is not running
+    assert manager.submit(project, force=True) is followup
+    assert followup.state == "queued"
+
+    release.set()
+    wait_for(lambda: followup.state == "completed")
+    assert calls == [False, True]
+    assert blocker.state == "completed"
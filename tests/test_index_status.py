@@ -0,0 +1,137 @@
+import os
+import sqlite3
+import uuid
+from pathlib import Path
+
+from watchdog.events import FileModifiedEvent
+
+from engine.app import indexer
+from engine.app.collection_registry import CollectionRegistry
+from engine.app.index_manifest import FileRecord, IndexManifest
+from engine.app.index_status import IndexStatusStore, estimate_staleness
+from engine.app.schemas import Project
+
+
+def build_project(root: Path) -> Project:
+    return Project(id=f"p-{uuid.uuid4().hex[:8]}", name="Project", path=str(root))
+
+
+def test_update_keeps_other_columns_and_rejects_unknown_ones(tmp_path: Path) -> None:
+    store = IndexStatusStore(root=tmp_path)
+    assert store.get("p1") is None
+
+    store.update("p1", state="indexed", file_count=2, watcher={"state": "running"})
+    store.update("p1", note="done")
+    row = IndexStatusStore(root=tmp_path).get("p1")
+
+    assert (row["state"], row["note"], row["file_count"]) == ("indexed", "done", 2)
+    assert row["watcher"] == {"state": "running"}
+    try:
+        store.update("p1", colour="blue")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown column accepted")
+
+
+def test_generations_are_shared_and_old_stores_gain_new_columns(tmp_path: Path) -> None:
+    conn = sqlite3.connect(str(tmp_path / "index_status.sqlite3"))
+    conn.execute(
+        "CREATE TABLE index_status (project_id TEXT PRIMARY KEY, state TEXT, note TEXT, updated_at REAL,"
+        " last_indexed_at REAL, file_count INTEGER, chunk_count INTEGER, model TEXT, chunker TEXT, pid INTEGER,"
+        " watcher TEXT)"
+    )
+    conn.execute("INSERT INTO index_status (project_id, state) VALUES ('p1', 'indexed')")
+    conn.commit()
+    conn.close()
+    store, other = IndexStatusStore(root=tmp_path), IndexStatusStore(root=tmp_path)
+
+    assert store.generations(["p1", "p2"]) == {"p1": 0}
+    other.bump_generation("p1")
+    other.bump_generation("p2")
+
+    assert store.generations(["p1", "p2"]) == {"p1": 1, "p2": 1}
+    assert store.get("p1")["state"] == "indexed"
+
+
+def test_estimate_counts_changed_missing_files_and_new_entries(tmp_path: Path) -> None:
+    (tmp_path / "src").mkdir()
+    for name in ("a.py", "b.py"):
+        (tmp_path / "src" / name).write_text("x = 1\n")
+    manifest = IndexManifest("p1", root=tmp_path / "data")
+    for name in ("a.py", "b.py"):
+        stat = (tmp_path / "src" / name).stat()
+        manifest.set(os.path.join("src", name), FileRecord(stat.st_size, stat.st_mtime_ns, "digest"))
+    indexed_at = (tmp_path / "src").stat().st_mtime + 1
+
+    assert estimate_staleness(manifest, tmp_path, indexed_at)["stale"] is False
+
+    (tmp_path / "src" / "a.py").write_text("x = 22\n")
+    (tmp_path / "src" / "b.py").unlink()
+    os.utime(tmp_path / "src", (indexed_at + 5, indexed_at + 5))
+
+    assert estimate_staleness(manifest, tmp_path, indexed_at) == {
+        "stale": True,
+        "changed_files": 1,
+        "missing_files": 1,
+        "changed_dirs": 1,
+    }
+
+
+def test_status_is_persisted_and_reports_staleness(tmp_path: Path, isolated_indexer, monkeypatch) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "a.py").write_text("a = 1\n")
+    (root / "b.py").write_text("b = 1\n")
+    project = build_project(root)
+    assert indexer.get_status_map([project])[project.id]["state"] == "not_indexed"
+
+    indexer.index_project(project)
+    # A fresh store on the same file stands in for a restarted or different worker process.
+    monkeypatch.setattr(indexer, "_status_store", IndexStatusStore(root=tmp_path / "data"))
+    monkeypatch.setattr(indexer, "_collections", CollectionRegistry(root=tmp_path / "data"))
+    monkeypatch.setattr(indexer, "_embedding_dims", {indexer._embedder_model_name: 3})
+    status = indexer.get_status_map([project])[project.id]
+
+    assert status["state"] == "indexed"
+    assert (status["file_count"], status["chunk_count"]) == (2, 2)
+    assert status["model"] == indexer._embedder_model_name
+    assert status["staleness"]["stale"] is False
+
+    (root / "a.py").write_text("a = 22\n")
+    (root / "b.py").unlink()
+    indexer._staleness.clear()
+    staleness = indexer.get_status_map([project])[project.id]["staleness"]
+    assert staleness["stale"] is True
+    assert (staleness["changed_files"], staleness["missing_files"]) == (1, 1)
+
+
+def test_watcher_batches_keep_the_staleness_estimate_current(tmp_path: Path, isolated_indexer) -> None:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "a.py").write_text("a = 1\n")
+    project = build_project(root)
+    indexer.index_project(project)
+    handler = indexer._ChangeHandler(project, debounce=60)
+
+    (root / "b.py").write_text("b = 1\n")
+    os.utime(root / "a.py", (2_000_000_000, 2_000_000_000))
+    indexer._staleness.clear()
+    staleness = indexer.get_status_map([project])[project.id]["staleness"]
+    assert (staleness["changed_files"], staleness["changed_dirs"]) == (1, 1)
+
+    for name in ("a.py", "b.py"):
+        handler.on_modified(FileModifiedEvent(str(root / name)))
+    handler.flush()
+    indexer._staleness.clear()
+    status = indexer.get_status_map([project])[project.id]
+
+    assert status["staleness"]["stale"] is False
+    assert status["file_count"] == 2
+
+
+def test_indexing_row_from_dead_process_reports_interrupted(tmp_path: Path, isolated_indexer) -> None:
+    project = build_project(tmp_path)
+    indexer._status_store.update(project.id, state="indexing", note="Indexing...", pid=2**22 + 12345)
+
+    assert indexer.get_status_map([project])[project.id]["state"] == "interrupted"
@@ -0,0 +1,41 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from engine.app.scanner import scan
+
+
+def build_tree(root: Path) -> None:
+    for rel in ["a.py", "src/b.py", "src/deep/c.py", "src/deep/d.txt", "node_modules/x/y.js", "docs/e.md"]:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_scan_prunes_skipped_directories_and_stats_files(tmp_path: Path, workers: int) -> None:
+    build_tree(tmp_path)
+    asked = []
+
+    def skip(rel: str, is_dir: bool) -> bool:
+        asked.append(rel)
+        return rel == "node_modules" or rel.endswith(".txt")
+
+    entries = {entry.rel: entry for entry in scan(tmp_path, skip, workers=workers)}
+
+    files = {rel for rel, entry in entries.items() if not entry.is_dir}
+    assert files == {"a.py", os.path.join("src", "b.py"), os.path.join("src", "deep", "c.py"), os.path.join("docs", "e.md")}
+    assert {rel for rel, entry in entries.items() if entry.is_dir} == {"src", os.path.join("src", "deep"), "docs"}
+    assert not any(rel.startswith("node_modules" + os.sep) for rel in asked)
+    assert entries["a.py"].stat.st_size == len("a.py")
+    assert entries["src"].stat is None
+
+
+def test_scan_from_a_subdirectory_keeps_project_relative_paths(tmp_path: Path) -> None:
+    build_tree(tmp_path)
+
+    rels = sorted(entry.rel for entry in scan(tmp_path, lambda rel, is_dir: False, start=tmp_path / "src", stat=False))
+
+    assert rels == [os.path.join("src", *parts) for parts in [("b.py",), ("deep",), ("deep", "c.py"), ("deep", "d.txt")]]
+    assert all(entry.stat is None for entry in scan(tmp_path, lambda rel, is_dir: False, stat=False))
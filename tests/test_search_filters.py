@@ -0,0 +1,58 @@
+import os
+
+from engine.app import search_filters
+from engine.app.search_filters import SearchFilter, path_metadata
+
+
+def test_paths_accept_prefixes_and_globs() -> None:
+    flt = SearchFilter.from_request({"paths": ["src/app/", "docs/*.md"]})
+    rels = ["src/app/main.py", "src/application.py", "docs/guide.md", "docs/img/a.png", "README.md"]
+
+    assert flt.select(rels) == ["docs/guide.md", "src/app/main.py"]
+
+
+def test_extensions_are_normalised_and_combined_with_paths() -> None:
+    flt = SearchFilter.from_request({"paths": ["src"], "extensions": ["PY", ".ts"]})
+
+    assert flt.matches_path("src/a.py")
+    assert flt.matches_path("src/web/b.ts")
+    assert not flt.matches_path("src/c.md")
+    assert not flt.matches_path("tests/a.py")
+
+
+def test_where_clause_combines_paths_and_modified_after() -> None:
+    assert SearchFilter().where(None) is None
+    assert SearchFilter(modified_after=10).where(None) == {"modified": {"$gt": 10.0}}
+    assert SearchFilter(paths=("a",), modified_after=1.5).where(["a/x.py"]) == {
+        "$and": [{"file_path": {"$in": ["a/x.py"]}}, {"modified": {"$gt": 1.5}}]
+    }
+
+
+def test_path_metadata_and_field_clauses() -> None:
+    assert path_metadata(os.path.join("src", "app", "Main.PY")) == {"ext": ".py", "dir_1": "src", "dir_2": "src/app"}
+    flt = SearchFilter.from_request({"paths": ["src/app", "README.md"], "extensions": ["py"]})
+
+    assert flt.wheres(["src/app/main.py"], fields=True) == [
+        {
+            "$and": [
+                {"ext": {"$in": [".py"]}},
+                {
+                    "$or": [
+                        {"file_path": {"$eq": os.path.join("src", "app")}},
+                        {"dir_2": {"$eq": "src/app"}},
+                        {"file_path": {"$eq": "README.md"}},
+                        {"dir_1": {"$eq": "README.md"}},
+                    ]
+                },
+            ]
+        }
+    ]
+
+
+def test_file_lists_are_split_into_batches(monkeypatch) -> None:
+    monkeypatch.setattr(search_filters, "MAX_IN_VALUES", 2)
+    flt = SearchFilter(paths=("src/*.py",))
+
+    assert not flt.by_fields
+    assert flt.wheres(["a", "b", "c"], fields=True) == [{"file_path": {"$in": ["a", "b"]}}, {"file_path": {"$in": ["c"]}}]
+    assert flt.wheres([]) == [{"file_path": {"$in": []}}]
@@ -0,0 +1,49 @@
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from engine.app.collection_registry import CollectionRegistry
+from engine.app.vector_store import open_store
+
+
+def test_numpy_store_is_exact_and_persists(tmp_path: Path) -> None:
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((200, 16)).astype(np.float32)
+    ids = [f"c{i}" for i in range(200)]
+    store = open_store("numpy", root=tmp_path)
+    collection = store.create_collection("proj--m--16")
+    collection.upsert(ids=ids, embeddings=vectors, documents=ids, metadatas=[{"file_path": i} for i in ids])
+    collection.close()
+
+    reopened = open_store("numpy", root=tmp_path).get_collection("proj--m--16")
+    query = rng.standard_normal(16).astype(np.float32)
+    res = reopened.query(query_embeddings=query[None, :], n_results=10)
+
+    exact = np.argsort(((vectors - query) ** 2).sum(axis=1))[:10]
+    assert res["ids"][0] == [ids[i] for i in exact]
+    assert (tmp_path / "vectors" / "float32" / "proj--m--16.sqlite3").exists()
+
+
+def test_unknown_backend_is_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        open_store("faiss", root=tmp_path)
+
+
+def test_registry_upgrades_rows_written_before_backends(tmp_path: Path) -> None:
+    conn = sqlite3.connect(str(tmp_path / "collections.sqlite3"))
+    conn.execute(
+        "CREATE TABLE collections (project_id TEXT PRIMARY KEY, name TEXT NOT NULL, model TEXT NOT NULL, dim INTEGER,"
+        " shadow_name TEXT, shadow_model TEXT, shadow_dim INTEGER)"
+    )
+    conn.execute("INSERT INTO collections (project_id, name, model, dim) VALUES ('p', 'p--m--3', 'm', 3)")
+    conn.commit()
+    conn.close()
+    registry = CollectionRegistry(root=tmp_path)
+
+    assert registry.get("p")["active"]["backend"] == "chroma"
+
+    registry.set_shadow("p", "p--m--3", "m", 3, "numpy")
+    registry.promote("p")
+    assert registry.get("p") == {"active": {"name": "p--m--3", "model": "m", "dim": 3, "backend": "numpy"}, "shadow": None}
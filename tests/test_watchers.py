@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import pytest
+
+from engine.app import indexer
+from engine.app.index_status import IndexStatusStore
+from engine.app.schemas import Project
+
+
+@pytest.fixture
+def watch_registry(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(indexer, "_handlers", {})
+    monkeypatch.setattr(indexer, "_evicted", {})
+    monkeypatch.setattr(indexer, "_refused", {})
+    monkeypatch.setattr(indexer, "_status_store", IndexStatusStore(root=tmp_path / "data"))
+    monkeypatch.setattr(indexer._settings, "watch_idle_seconds", 0)
+    yield
+    indexer.stop_all_watchers()
+
+
+def make_tree(tmp_path: Path) -> Project:
+    root = tmp_path / "project"
+    for rel in ("src/pkg", "docs", "node_modules/lib/deep", "web/node_modules/x", "web/app"):
+        (root / rel).mkdir(parents=True)
+    return Project(id="watched", name="Watched", path=str(root))
+
+
+def test_plan_skips_ignored_subtrees(tmp_path: Path) -> None:
+    project = make_tree(tmp_path)
+    root = Path(project.path)
+    plan, dirs = indexer._plan_watches(root, root, indexer._ignore_matcher(project))
+    planned = {str(path.relative_to(root)): recursive for path, recursive in plan}
+
+    # Directories holding an ignored subtree are watched flat; clean subtrees get one recursive watch.
+    assert planned == {".": False, "src": True, "docs": True, "web": False, "web/app": True}
+    assert dirs == 6
+
+
+def test_watch_limit_refuses_and_reports(tmp_path: Path, watch_registry, monkeypatch) -> None:
+    project = make_tree(tmp_path)
+    monkeypatch.setattr(indexer._settings, "watch_max_dirs", 3)
+
+    with pytest.raises(indexer.WatchLimitExceeded):
+        indexer.start_watcher(project)
+
+    listing = indexer.list_watchers()
+    assert listing["watchers"][0]["state"] == "refused"
+    assert indexer._status_store.get(project.id)["watcher"]["state"] == "refused"
+
+
+def test_start_stop_and_idle_eviction(tmp_path: Path, watch_registry, monkeypatch) -> None:
+    project = make_tree(tmp_path)
+    submitted = []
+    monkeypatch.setattr(indexer, "_start_watcher", indexer.start_watcher)
+    monkeypatch.setattr(indexer.index_jobs, "submit", lambda project, force=False: submitted.append(project.id))
+
+    info = indexer.start_watcher(project)
+    assert info["state"] == "running"
+    assert info["watched_dirs"] == 6
+    assert indexer.list_watchers()["watched_dirs"] == 6
+
+    assert indexer.evict_idle_watchers(idle=0) == [project.id]
+    assert indexer.watcher_info(project.id)["state"] == "evicted"
+    assert indexer.list_watchers()["watched_dirs"] == 0
+
+    indexer.touch_project(project)
+    assert indexer.watcher_info(project.id)["state"] == "running"
+    assert submitted == [project.id]
+
+    assert indexer.stop_watcher(project.id)
+    assert indexer.watcher_info(project.id)["state"] == "stopped"
+    assert indexer._status_store.get(project.id)["watcher"]["state"] == "stopped"